@@ -4,11 +4,13 @@ from datetime import timedelta
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm # OAuth2PasswordBearerはsecurity.pyから使う
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.core import security  # securityモジュール
+from app.core.password_hashing import HashingBusyError, login_throttle, password_hasher
 from app.db.session import get_db
 from app.models.user import User as UserModel  # SQLAlchemyモデルを UserModelとしてインポート
 from app.schemas.token import Token
@@ -16,40 +18,67 @@ from app.schemas.user import User as UserSchema  # Pydanticモデルを UserSche
 
 router = APIRouter()
 
-def _authenticate(db: Session, form_data: OAuth2PasswordRequestForm) -> Token:
+
+def _find_user(db: Session, email: str) -> Any:
+    return db.query(UserModel).filter(UserModel.email == email).first()
+
+
+async def _authenticate(db: Session, form_data: OAuth2PasswordRequestForm) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests.
     (OAuth2互換トークンログイン、将来のリクエストのためのアクセストークンを取得します。)
+
+    Accounts with too many recent failures are rejected before any DB or
+    bcrypt work; bcrypt itself runs in the bounded password hashing pool and
+    the user lookup in the threadpool, so the event loop never blocks.
     """
-    user = db.query(UserModel).filter(UserModel.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    retry_after = login_throttle.retry_after(form_data.username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts. Try again later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    user = await run_in_threadpool(_find_user, db, form_data.username)
+    try:
+        verified = user is not None and await password_hasher.verify(form_data.password, user.hashed_password)
+    except HashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login is temporarily busy. Please retry.",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
+        login_throttle.record_failure(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_throttle.reset(form_data.username)
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = security.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": user.email, "uid": user.id}, expires_delta=access_token_expires
     )
     return Token(access_token=access_token, token_type="bearer")
 
 
 @router.post("/login", response_model=Token, summary="OAuth2 password flow login")
-def login_access_token(
+async def login_access_token(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Token:
-    return _authenticate(db, form_data)
+    return await _authenticate(db, form_data)
 
 
 @router.post("/token", response_model=Token, summary="Token issue compatible with legacy client")
-def issue_access_token(
+async def issue_access_token(
     db: Session = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Token:
     """Alias endpoint expected by the legacy front-end (`/auth/token`)."""
-    return _authenticate(db, form_data)
+    return await _authenticate(db, form_data)
 
 @router.post("/test-token", response_model=UserSchema) # レスポンスモデルをPydanticスキーマに変更
 def test_token(current_user: UserModel = Depends(security.get_current_user)): # Dependsで取得するのはSQLAlchemyモデル
@@ -7,7 +7,8 @@ from app.db.session import get_db
 from app.models.project import Project
 from app.models.user import User
 from app.schemas.calculation import CalculationInput, CalculationResult
-from app.services.calculation import perform_energy_calculation
+from app.services.calculation import CALCULATION_VERSION, headline_metrics, input_hash, recalculate_energy
+from app.services.project_revisions import project_document, record_revision
 
 router = APIRouter()
 
@@ -18,7 +19,11 @@ def calculate_energy(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """エネルギー計算実行（バリデーション機能付き）"""
+    """エネルギー計算実行（バリデーション機能付き）
+
+    計算バージョンと正規化した入力のハッシュが前回と同じなら保存済みの結果を返す（検証・再計算・書き込みなし）。
+    外皮のみ / 設備のみの変更は該当部分だけ再計算する。計算バージョンが変わった結果は再利用しない。
+    """
     from app.validators.building_validators import validate_calculation_input, format_validation_report
     
     project = db.query(Project).filter(Project.id == project_id).first()
@@ -27,6 +32,14 @@ def calculate_energy(
     if project.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="権限がありません")
 
+    digest = input_hash(input_data)
+    if (
+        project.input_hash == digest
+        and project.calculation_version == CALCULATION_VERSION
+        and project.result_data
+    ):
+        return CalculationResult(**project.result_data)
+
     # 入力データバリデーション
     try:
         validation_errors, can_calculate = validate_calculation_input(input_data.dict())
@@ -54,11 +67,19 @@ def calculate_energy(
 
     # 計算実行
     try:
-        result = perform_energy_calculation(input_data)
+        result, _ = recalculate_energy(
+            input_data, project.input_data, project.result_data, project.calculation_version
+        )
+        previous_document, previous_hash = project_document(project), project.input_hash
         
-        # 計算結果をプロジェクトに保存
+        # 計算結果をプロジェクトに保存（履歴は前回との差分で記録）
         project.input_data = input_data.dict()
         project.result_data = result.dict()
+        project.input_hash = digest
+        project.calculation_version = CALCULATION_VERSION
+        for column, value in headline_metrics(project.input_data, project.result_data).items():
+            setattr(project, column, value)
+        record_revision(db, project, previous_document, previous_hash)
         db.add(project)
         db.commit()
         db.refresh(project)
@@ -1,8 +1,8 @@
 # backend/app/api/endpoints/projects.py
 # -*- coding: utf-8 -*-
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app import schemas # schemas/__init__.py でインポートしている場合
@@ -13,6 +13,7 @@ from app.models.project import Project as ProjectModel # SQLAlchemyモデル
 from app.models.user import User as UserModel # SQLAlchemyモデル (オーナー特定用)
 from app.db.session import get_db
 from app.core import security
+from app.services.project_revisions import RevisionNotFound, diff_revisions, list_revisions, reconstruct_revision
 # from app.crud import project as crud_project # CRUD操作用のモジュール (あれば)
 
 router = APIRouter()
@@ -36,21 +37,41 @@ def create_project(
     db.refresh(db_project)
     return db_project
 
-@router.get("/", response_model=List[schemas.project.Project]) # スキーマ名は適宜調整
+PROJECT_LIST_MAX_LIMIT = 500
+
+@router.get("/", response_model=List[schemas.project.ProjectSummary])
 def read_projects(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[int] = Query(None, ge=1, description="前ページの X-Next-Cursor"),
+    limit: int = Query(100, ge=1, le=PROJECT_LIST_MAX_LIMIT),
     current_user: UserModel = Depends(security.get_current_active_user)
 ) -> Any:
     """
-    Retrieve projects for the current user.
+    Retrieve projects for the current user (newest first).
+    Only summary columns are selected; input_data / result_data are never loaded.
+    When more projects exist, the X-Next-Cursor header holds the cursor for the next page.
     (現在のユーザーのプロジェクト一覧を取得します。)
     """
-    # projects = crud_project.get_projects_by_owner(db, owner_id=current_user.id, skip=skip, limit=limit)
-    # 簡単な例:
-    projects = db.query(ProjectModel).filter(ProjectModel.owner_id == current_user.id).offset(skip).limit(limit).all()
-    return projects
+    query = db.query(
+        ProjectModel.id,
+        ProjectModel.name,
+        ProjectModel.description,
+        ProjectModel.owner_id,
+        ProjectModel.created_at,
+        ProjectModel.updated_at,
+        ProjectModel.bei,
+        ProjectModel.floor_area,
+        ProjectModel.is_compliant,
+        ProjectModel.result_data.isnot(None).label("has_result"),
+    ).filter(ProjectModel.owner_id == current_user.id)
+    if cursor is not None:
+        query = query.filter(ProjectModel.id < cursor)
+    rows = query.order_by(ProjectModel.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return [dict(row._mapping) for row in rows]
 
 @router.get("/{project_id}", response_model=schemas.project.Project) # スキーマ名は適宜調整
 def read_project(
@@ -70,6 +91,69 @@ def read_project(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
     return project
 
+def _get_owned_project_id(db: Session, project_id: int, current_user: UserModel) -> int:
+    owned = (
+        db.query(ProjectModel.id)
+        .filter(ProjectModel.id == project_id, ProjectModel.owner_id == current_user.id)
+        .first()
+    )
+    if not owned:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
+    return owned.id
+
+@router.get("/{project_id}/revisions")
+def read_project_revisions(
+    *,
+    db: Session = Depends(get_db),
+    project_id: int,
+    current_user: UserModel = Depends(security.get_current_active_user)
+) -> Any:
+    """
+    List calculation revisions of a project (newest first).
+    (プロジェクトの計算履歴一覧を取得します。)
+    """
+    _get_owned_project_id(db, project_id, current_user)
+    return {"project_id": project_id, "revisions": list_revisions(db, project_id)}
+
+@router.get("/{project_id}/revisions/diff")
+def diff_project_revisions(
+    *,
+    db: Session = Depends(get_db),
+    project_id: int,
+    from_revision: int = Query(..., ge=1),
+    to_revision: int = Query(..., ge=1),
+    current_user: UserModel = Depends(security.get_current_active_user)
+) -> Any:
+    """
+    JSON Patch (RFC 6902) turning one revision into another.
+    (2つのリビジョン間の差分を JSON Patch で返します。)
+    """
+    _get_owned_project_id(db, project_id, current_user)
+    try:
+        patch = diff_revisions(db, project_id, from_revision, to_revision)
+    except RevisionNotFound as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return {"project_id": project_id, "from_revision": from_revision, "to_revision": to_revision, "patch": patch}
+
+@router.get("/{project_id}/revisions/{revision}")
+def read_project_revision(
+    *,
+    db: Session = Depends(get_db),
+    project_id: int,
+    revision: int,
+    current_user: UserModel = Depends(security.get_current_active_user)
+) -> Any:
+    """
+    Reconstruct the input and result of one revision.
+    (指定リビジョンの入力・計算結果を復元します。)
+    """
+    _get_owned_project_id(db, project_id, current_user)
+    try:
+        document = reconstruct_revision(db, project_id, revision)
+    except RevisionNotFound as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    return {"project_id": project_id, "revision": revision, **document}
+
 # (オプション) プロジェクト更新・削除エンドポイント
 # @router.put("/{project_id}", response_model=schemas.project.Project)
 # ...
@@ -3,6 +3,7 @@
 from typing import Any, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app import schemas # schemas/__init__.py でインポートしている場合
@@ -12,12 +13,25 @@ from app import schemas # schemas/__init__.py でインポートしている場
 from app.models.user import User as UserModel # SQLAlchemyモデル
 from app.db.session import get_db
 from app.core import security
+from app.core.password_hashing import HashingBusyError, password_hasher
 # from app.crud import user as crud_user # CRUD操作用のモジュール (あれば)
 
 router = APIRouter()
 
+
+def _email_taken(db: Session, email: str) -> bool:
+    return db.query(UserModel.id).filter(UserModel.email == email).first() is not None
+
+
+def _save_user(db: Session, db_user: UserModel) -> UserModel:
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
 @router.post("/", response_model=schemas.user.User) # schemas.user.User のようにアクセス
-def create_user(
+async def create_user(
     *,
     db: Session = Depends(get_db),
     user_in: schemas.user.UserCreate # schemas.user.UserCreate のようにアクセス
@@ -25,25 +39,31 @@ def create_user(
     """
     Create new user.
     (新規ユーザーを作成します。)
+
+    DB access runs in the threadpool and hashing in the password hashing
+    pool, so the event loop never blocks.
     """
     # crud_user.create_user を使う方が一般的
-    user = db.query(UserModel).filter(UserModel.email == user_in.email).first()
-    if user:
+    if await run_in_threadpool(_email_taken, db, user_in.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The user with this email already exists in the system.",
         )
-    hashed_password = security.get_password_hash(user_in.password)
+    try:
+        hashed_password = await password_hasher.hash(user_in.password)
+    except HashingBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Registration is temporarily busy. Please retry.",
+            headers={"Retry-After": "1"},
+        )
     db_user = UserModel(
         email=user_in.email,
         username=user_in.username or user_in.email.split("@")[0],
         hashed_password=hashed_password,
         is_active=user_in.is_active,
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(_save_user, db, db_user)
 
 @router.get("/me", response_model=schemas.user.User)
 def read_users_me(
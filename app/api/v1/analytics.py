@@ -1,12 +1,19 @@
 """Manufacturer analytics and data reporting API."""
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import extract, func as sql_func
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, time, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Tuple
 
-from app.db.session import get_db
-from app.models.product_event import ProductEvent
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy import Integer, String, cast, extract, func as sql_func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.models.product_event_daily import ProductEventDaily
 from app.models.referral import Referral
+from app.services.analytics_counters import overview_counters
+from app.services.analytics_rollup import report_window_start
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
@@ -15,113 +22,139 @@ router = APIRouter(prefix="/analytics", tags=["Analytics"])
 async def manufacturer_report(
     manufacturer: str,
     months: int = Query(3, ge=1, le=12),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    """メーカー別のデータレポート。スポンサー契約先に提供。"""
-    _ = months
-
-    selection_count = (
-        db.query(sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.manufacturer == manufacturer)
-        .filter(ProductEvent.event_type == "selected")
-        .scalar()
-        or 0
-    )
-
-    by_category = dict(
-        db.query(ProductEvent.category, sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.manufacturer == manufacturer)
-        .group_by(ProductEvent.category)
-        .all()
-    )
-
-    by_zone = dict(
-        db.query(ProductEvent.building_zone, sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.manufacturer == manufacturer)
-        .filter(ProductEvent.building_zone.isnot(None))
-        .group_by(ProductEvent.building_zone)
-        .all()
+    """メーカー別のデータレポート。スポンサー契約先に提供。
+
+    日次ロールアップ (product_event_daily) を1クエリで集計する。
+    集計期間は当月を含む直近 months か月（UTC、月初から）。
+    """
+    since = report_window_start(months)
+    daily = ProductEventDaily
+    year = extract("year", daily.day)
+    month = extract("month", daily.day)
+
+    # Own rows, broken down by every dimension the report shows.
+    own = (
+        select(
+            literal("own").label("kind"),
+            daily.manufacturer,
+            daily.category,
+            daily.building_zone,
+            daily.building_use,
+            daily.event_type,
+            year.label("year"),
+            month.label("month"),
+            sql_func.sum(daily.count).label("count"),
+        )
+        .where(daily.manufacturer == manufacturer)
+        .where(daily.day >= since)
+        .group_by(
+            daily.manufacturer,
+            daily.category,
+            daily.building_zone,
+            daily.building_use,
+            daily.event_type,
+            year,
+            month,
+        )
     )
-
-    by_use = dict(
-        db.query(ProductEvent.building_use, sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.manufacturer == manufacturer)
-        .filter(ProductEvent.building_use.isnot(None))
-        .group_by(ProductEvent.building_use)
-        .all()
+    # Selections per manufacturer in the categories this manufacturer appears in.
+    own_categories = (
+        select(daily.category).where(daily.manufacturer == manufacturer).where(daily.day >= since).distinct()
     )
-
-    by_month = (
-        db.query(
-            extract("year", ProductEvent.created_at).label("year"),
-            extract("month", ProductEvent.created_at).label("month"),
-            sql_func.count(ProductEvent.id).label("count"),
+    competitors_q = (
+        select(
+            literal("competitor").label("kind"),
+            daily.manufacturer,
+            daily.category,
+            cast(null(), Integer).label("building_zone"),
+            cast(null(), String).label("building_use"),
+            daily.event_type,
+            cast(null(), Integer).label("year"),
+            cast(null(), Integer).label("month"),
+            sql_func.sum(daily.count).label("count"),
         )
-        .filter(ProductEvent.manufacturer == manufacturer)
-        .group_by("year", "month")
-        .order_by("year", "month")
-        .all()
+        .where(daily.event_type == "selected")
+        .where(daily.day >= since)
+        .where(daily.category.in_(own_categories))
+        .group_by(daily.manufacturer, daily.category, daily.event_type)
     )
+    rows = (await db.execute(union_all(own, competitors_q))).all()
+
+    selection_count = 0
+    by_category: Dict[str, int] = defaultdict(int)
+    by_zone: Dict[int, int] = defaultdict(int)
+    by_use: Dict[str, int] = defaultdict(int)
+    by_month: Dict[Tuple[int, int], int] = defaultdict(int)
+    competitor_counts: Dict[str, List[Tuple[str, int]]] = defaultdict(list)
+    for row in rows:
+        count = int(row.count)
+        if row.kind == "competitor":
+            competitor_counts[row.category].append((row.manufacturer, count))
+            continue
+        if row.event_type == "selected":
+            selection_count += count
+        by_category[row.category] += count
+        if row.building_zone:
+            by_zone[row.building_zone] += count
+        if row.building_use:
+            by_use[row.building_use] += count
+        by_month[(int(row.year), int(row.month))] += count
 
     lead_count = (
-        db.query(sql_func.count(Referral.id))
-        .filter(Referral.manufacturer == manufacturer)
-        .scalar()
-        or 0
-    )
-
-    categories = list(by_category.keys())
-    competitors = {}
-    for category in categories:
-        top_manufacturers = (
-            db.query(ProductEvent.manufacturer, sql_func.count(ProductEvent.id).label("cnt"))
-            .filter(ProductEvent.category == category)
-            .filter(ProductEvent.event_type == "selected")
-            .group_by(ProductEvent.manufacturer)
-            .order_by(sql_func.count(ProductEvent.id).desc())
-            .limit(5)
-            .all()
+        await db.execute(
+            select(sql_func.count(Referral.id))
+            .where(Referral.manufacturer == manufacturer)
+            .where(Referral.created_at >= datetime.combine(since, time.min, timezone.utc))
         )
-        competitors[category] = [
+    ).scalar() or 0
+
+    competitors = {
+        category: [
             {"manufacturer": m, "count": c}
-            for m, c in top_manufacturers
+            for m, c in sorted(competitor_counts.get(category, []), key=lambda item: (-item[1], item[0]))[:5]
         ]
+        for category in by_category
+    }
 
     return {
         "manufacturer": manufacturer,
+        "months": months,
+        "since": since.isoformat(),
         "total_selections": selection_count,
         "total_leads": lead_count,
-        "by_category": by_category,
-        "by_zone": by_zone,
-        "by_use": by_use,
+        "by_category": dict(by_category),
+        "by_zone": dict(by_zone),
+        "by_use": dict(by_use),
         "by_month": [
-            {"year": int(r.year), "month": int(r.month), "count": r.count}
-            for r in by_month
+            {"year": y, "month": m, "count": c}
+            for (y, m), c in sorted(by_month.items())
         ],
         "competitor_comparison": competitors,
     }
 
 
 @router.get("/overview")
-async def analytics_overview(db: Session = Depends(get_db)) -> dict:
-    """全体概要（管理者用）。"""
-    total_calculations = (
-        db.query(sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.event_type == "selected")
-        .scalar()
-        or 0
-    )
-    total_leads = db.query(sql_func.count(Referral.id)).scalar() or 0
-    by_manufacturer = dict(
-        db.query(ProductEvent.manufacturer, sql_func.count(ProductEvent.id))
-        .filter(ProductEvent.event_type == "selected")
-        .group_by(ProductEvent.manufacturer)
-        .order_by(sql_func.count(ProductEvent.id).desc())
-        .all()
-    )
-
-    return {
-        "total_calculations": total_calculations,
-        "total_leads": total_leads,
-        "by_manufacturer": by_manufacturer,
+async def analytics_overview(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """全体概要（管理者用）。
+
+    インクリメンタルカウンタから定数時間で返す（定期的にDBと突合）。
+    ETag / Last-Modified を付与し、条件付きリクエストには304を返す。
+    """
+    if not overview_counters.loaded:
+        await overview_counters.reconcile(db)
+    snapshot = overview_counters.snapshot()
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": format_datetime(snapshot.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
     }
+    if snapshot.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return snapshot.payload
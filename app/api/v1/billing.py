@@ -17,8 +17,9 @@ from app.services.stripe_billing import (
     construct_webhook_event,
     create_customer_portal_session,
     create_checkout_session,
-    process_webhook_event,
+    get_receipt_links,
 )
+from app.services.stripe_webhooks import record_webhook_event, stripe_webhook_worker
 
 router = APIRouter(prefix="/billing", tags=["Billing"])
 
@@ -56,6 +57,16 @@ async def subscription_status(
     return check_subscription(str(email), db=db, project_id=project_id)
 
 
+@router.get("/receipts")
+async def receipt_links(
+    email: EmailStr,
+    project_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+) -> dict:
+    """Return invoice/receipt links for the purchase behind the current status."""
+    return get_receipt_links(str(email), db=db, project_id=project_id)
+
+
 @router.post("/checkout")
 async def create_checkout(req: CheckoutRequest, db: Session = Depends(get_db)) -> dict:
     """Create a Stripe Checkout session for a supported billing plan."""
@@ -107,14 +118,28 @@ async def stripe_webhook(
     request: Request,
     db: Session = Depends(get_db),
 ) -> dict:
-    """Receive Stripe webhook events for billing synchronization."""
+    """Receive Stripe webhook events for billing synchronization.
+
+    Verifies the signature, stores the event in the inbox and acknowledges
+    immediately; the webhook worker applies it. Redeliveries are acknowledged
+    without being stored or processed again.
+    """
     payload = await request.body()
     signature = request.headers.get("stripe-signature", "")
 
     try:
         event = construct_webhook_event(payload=payload, signature=signature)
-        return process_webhook_event(event=event, db=db)
+        stored, created = record_webhook_event(db, event)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except BillingConfigurationError as exc:
         raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    if created:
+        stripe_webhook_worker.submit(stored.id)
+    return {
+        "received": True,
+        "event_id": stored.event_id,
+        "event_type": stored.event_type,
+        "duplicate": not created,
+    }
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends
@@ -11,7 +10,8 @@ from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.contact_inquiry import ContactInquiry
-from app.services.contact import contact_public_email, send_contact_messages
+from app.services.contact import contact_public_email, queue_contact_messages
+from app.services.email_outbox import email_sender
 
 router = APIRouter(prefix="/contact", tags=["Contact"])
 
@@ -59,23 +59,18 @@ async def submit_contact_inquiry(
         status="received",
     )
     db.add(inquiry)
+    db.flush()
+    # The notification and auto-reply are delivered by the email outbox sender.
+    queue_contact_messages(db, inquiry)
     db.commit()
     db.refresh(inquiry)
-
-    delivery = send_contact_messages(inquiry)
-    inquiry.status = "notified" if delivery.notification_sent else "stored"
-    inquiry.notification_sent_at = datetime.now(timezone.utc) if delivery.notification_sent else None
-    errors = [message for message in [delivery.notification_error, delivery.auto_reply_error] if message]
-    inquiry.notification_error = " | ".join(errors) if errors else None
-    db.commit()
-    db.refresh(inquiry)
+    email_sender.notify()
 
     return {
         "status": "received",
         "message": "お問い合わせを受け付けました。",
         "inquiry_id": inquiry.id,
         "stored": True,
-        "notification_sent": delivery.notification_sent,
-        "auto_reply_sent": delivery.auto_reply_sent,
+        "notification_queued": True,
         "support_email": contact_public_email(),
     }
@@ -8,10 +8,23 @@ from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.onboarding_registration import OnboardingRegistration
+from app.services.admin_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ListingCursorError, list_page
 
 router = APIRouter(prefix="/onboarding", tags=["Onboarding"])
 
 VALID_ONBOARDING_STATUSES = {"pending", "contacted", "approved", "rejected"}
+REGISTRATION_LIST_COLUMNS = (
+    "id",
+    "company_name",
+    "email",
+    "phone",
+    "partner_code",
+    "source",
+    "status",
+    "notes",
+    "created_at",
+    "updated_at",
+)
 
 
 class OnboardingRequest(BaseModel):
@@ -91,19 +104,24 @@ async def register_partner_user(
 @router.get("/list")
 async def list_partner_users(
     source: Optional[str] = Query(None),
+    status: Optional[str] = Query(None, description="ステータスで絞り込み"),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db),
 ) -> dict:
-    """パートナー経由の登録一覧（管理用）。"""
-    query = db.query(OnboardingRegistration)
+    """パートナー経由の登録一覧（管理用）。新しい順、next_cursor で続きを取得。"""
+    filters = []
     if source:
-        query = query.filter(OnboardingRegistration.source == source)
-
-    registrations = (
-        query.order_by(OnboardingRegistration.created_at.desc())
-        .limit(100)
-        .all()
-    )
-    return {"registrations": [_serialize_registration(row) for row in registrations]}
+        filters.append(OnboardingRegistration.source == source)
+    if status:
+        filters.append(OnboardingRegistration.status == status.strip().lower())
+    try:
+        page = list_page(
+            db, OnboardingRegistration, REGISTRATION_LIST_COLUMNS, filters=filters, cursor=cursor, limit=limit
+        )
+    except ListingCursorError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"registrations": page["items"], "next_cursor": page["next_cursor"]}
 
 
 @router.patch("/{registration_id}")
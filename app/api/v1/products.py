@@ -1,15 +1,30 @@
 """Product catalog API endpoints."""
 
-from typing import Optional
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
-from app.models.product_event import ProductEvent
-from app.services.ai_recommend import get_ai_recommendations
-from app.services.products import get_recommended_products, load_products
+from app.db.session import get_async_db
+from app.services.ai_recommend import cached_ai_recommendations, get_ai_recommendations, stream_ai_recommendations
+from app.services.event_ingest import IngestQueueFull, product_event_buffer
+from app.services.local_recommend import get_local_recommendations_async
+from app.services.product_index import UnsearchableSpecFieldError, get_product_index_async
+from app.services.product_query import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    ProductQuery,
+    ProductQueryError,
+    SpecFilter,
+    query_products_page,
+)
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
@@ -18,18 +33,74 @@ async def list_products(
     category: str,
     zone: Optional[int] = Query(None, ge=1, le=8, description="地域区分 1-8"),
     use: Optional[str] = Query(None, description="建物用途 (例: office, hotel)"),
-    db: Session = Depends(get_db),
+    manufacturer: Optional[str] = Query(None, description="メーカー名 (完全一致)"),
+    partner: Optional[bool] = Query(None, description="パートナー製品のみ / 除外"),
+    spec: List[str] = Query([], description="仕様値フィルタ field:op:value (例: u_value:lte:1.5, apf:gte:6)"),
+    fields: Optional[str] = Query(None, description="返す仕様項目 (カンマ区切り, 例: u_value,eta_c)"),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    """製品一覧を返す。zone/useでフィルタ可能。パートナー製品が優先表示。"""
+    """製品一覧を返す。パートナー製品が優先表示。
+
+    フィルタ・射影・ページングはSQL側で処理する。次ページは next_cursor を cursor に渡して取得。
+    """
+    try:
+        query = ProductQuery(
+            category=category,
+            zone=zone,
+            use=use,
+            manufacturer=manufacturer,
+            partner=partner,
+            specs=tuple(SpecFilter.parse(raw) for raw in spec),
+            fields=tuple(f.strip() for f in fields.split(",") if f.strip()) if fields else None,
+            cursor=cursor,
+            limit=limit,
+        )
+        page = await query_products_page(db, query)
+    except ProductQueryError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"カテゴリ '{category}' は存在しません。")
+
+    products = page["products"]
+    return {
+        "category": category,
+        "count": len(products),
+        "products": products,
+        "next_cursor": page["next_cursor"],
+    }
+
+
+@router.get("/{category}/search")
+async def search_products(
+    category: str,
+    spec: List[str] = Query([], description="仕様値条件 field:op:value (例: u_value:lte:1.5, capacity_kw:gte:10)"),
+    zone: Optional[int] = Query(None, ge=1, le=8, description="地域区分 1-8"),
+    use: Optional[str] = Query(None, description="建物用途 (例: office, hotel)"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    """数値仕様の範囲条件で製品を検索する（メモリ上の列指向インデックス）。パートナー製品が優先表示。"""
     try:
-        if zone is not None or use is not None:
-            products = get_recommended_products(category, zone=zone, use=use, db=db)
-        else:
-            products = load_products(category, db=db)
+        specs = [SpecFilter.parse(raw) for raw in spec]
+        index = await get_product_index_async(category, db)
+        started = time.perf_counter()
+        products = index.search(specs, zone=zone, use=use, limit=limit)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    except ProductQueryError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    except UnsearchableSpecFieldError as exc:
+        raise HTTPException(status_code=422, detail=f"検索できない仕様項目です: {exc.args[0]}")
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"カテゴリ '{category}' は存在しません。")
 
-    return {"category": category, "count": len(products), "products": products}
+    return {
+        "category": category,
+        "count": len(products),
+        "products": products,
+        "query_ms": round(elapsed_ms, 3),
+    }
 
 
 @router.post("/recommend")
@@ -38,15 +109,74 @@ async def recommend_products(
     use: str = Query(...),
     floor_area: float = Query(..., gt=0),
     current_bei: Optional[float] = Query(None),
+    tier: str = Query("local", pattern="^(local|ai)$", description="local: 即時スコアリング / ai: Claude 推薦"),
+    db: AsyncSession = Depends(get_async_db),
 ) -> dict:
-    """AI が建物条件に基づいて最適な製品を推薦。パートナー製品優先。"""
-    recommendations = await get_ai_recommendations(
-        zone=zone,
-        use=use,
-        floor_area=floor_area,
-        current_bei=current_bei,
+    """建物条件に基づいて最適な製品を推薦。パートナー製品優先。
+
+    既定はローカルのスコアリング（数ミリ秒、DBに取り込まれた製品カタログを使用）。
+    tier=ai は Claude を呼び、結果が得られない場合はローカル結果を返す。
+    """
+    params = {"zone": zone, "use": use, "floor_area": floor_area, "current_bei": current_bei}
+    recommendations = []
+    if tier == "ai":
+        try:
+            recommendations = await get_ai_recommendations(**params)
+        except Exception:
+            logger.exception("AI recommendation failed; falling back to local ranking")
+        if recommendations:
+            return {"recommendations": recommendations, "count": len(recommendations), "tier": "ai"}
+
+    recommendations = await get_local_recommendations_async(db, **params)
+    return {"recommendations": recommendations, "count": len(recommendations), "tier": "local"}
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/recommend/stream")
+async def stream_recommendations(
+    zone: int = Query(..., ge=1, le=8),
+    use: str = Query(...),
+    floor_area: float = Query(..., gt=0),
+    current_bei: Optional[float] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """推薦を Server-Sent Events で配信する。
+
+    1. ``local``: ローカルスコアリング結果（即時）
+    2. ``recommendation``: Claude の推薦を [RECOMMEND] ブロック単位で逐次
+       （キャッシュ済みの場合は ``recommendations`` で一覧を1イベントで送信）
+    3. ``done``: AI 推薦件数（失敗時は ``error`` の後に送信）
+
+    同じ条件の推薦が処理中であれば、新たに Claude を呼ばずにその結果を共有する。
+    """
+    params = {"zone": zone, "use": use, "floor_area": floor_area, "current_bei": current_bei}
+    local = await get_local_recommendations_async(db, **params)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("local", local)
+        cached = cached_ai_recommendations(**params)
+        if cached is not None:
+            yield _sse("recommendations", cached)
+            yield _sse("done", {"count": len(cached)})
+            return
+        count = 0
+        try:
+            async for rec in stream_ai_recommendations(**params):
+                count += 1
+                yield _sse("recommendation", rec)
+        except Exception:
+            logger.exception("AI recommendation stream failed")
+            yield _sse("error", {"detail": "AI推薦の取得に失敗しました。"})
+        yield _sse("done", {"count": count})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return {"recommendations": recommendations, "count": len(recommendations)}
 
 
 @router.post("/track-selection")
@@ -59,20 +189,30 @@ async def track_product_selection(
     building_use: Optional[str] = None,
     floor_area: Optional[float] = None,
     session_id: Optional[str] = None,
-    db: Session = Depends(get_db),
 ) -> dict:
-    """製品選択イベントを記録（メーカーデータレポート用）。"""
-    event = ProductEvent(
-        event_type="selected",
-        product_id=product_id,
-        product_name=product_name,
-        manufacturer=manufacturer,
-        category=category,
-        building_zone=building_zone,
-        building_use=building_use,
-        floor_area=floor_area,
-        session_id=session_id,
-    )
-    db.add(event)
-    db.commit()
+    """製品選択イベントを記録（メーカーデータレポート用）。
+
+    イベントはワーカー内のバッファに積まれ、バックグラウンドでまとめて書き込まれる。
+    """
+    try:
+        await product_event_buffer.submit(
+            {
+                "event_type": "selected",
+                "product_id": product_id,
+                "product_name": product_name,
+                "manufacturer": manufacturer,
+                "category": category,
+                "building_zone": building_zone,
+                "building_use": building_use,
+                "floor_area": floor_area,
+                "session_id": session_id,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+    except IngestQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="イベントの受付が混み合っています。しばらくしてから再送してください。",
+            headers={"Retry-After": "1"},
+        )
     return {"status": "tracked"}
@@ -1,18 +1,45 @@
 """Referral (manufacturer introduction) API endpoints."""
 
+from email.utils import format_datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import extract, func as sql_func
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.models.referral import Referral
-from app.services.referral import send_referral_notification
+from app.services.admin_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, ListingCursorError, list_page
+from app.services.analytics_counters import overview_counters
+from app.services.email_outbox import email_sender
+from app.services.referral import queue_referral_notification
+from app.services.referral_stats import (
+    load_referral_stats,
+    record_referral_created,
+    record_referral_status_change,
+)
 
 router = APIRouter(prefix="/referral", tags=["Referral"])
 VALID_REFERRAL_STATUSES = {"pending", "contacted", "quoted", "closed"}
+REFERRAL_LIST_COLUMNS = (
+    "id",
+    "architect_name",
+    "architect_email",
+    "architect_company",
+    "architect_phone",
+    "project_name",
+    "building_use",
+    "building_zone",
+    "floor_area",
+    "product_category",
+    "product_id",
+    "product_name",
+    "manufacturer",
+    "status",
+    "notes",
+    "created_at",
+    "updated_at",
+)
 
 
 class ReferralRequest(BaseModel):
@@ -76,10 +103,13 @@ async def create_referral(req: ReferralRequest, db: Session = Depends(get_db)) -
         status="pending",
     )
     db.add(referral)
+    db.flush()
+    record_referral_created(db, referral)
+    queue_referral_notification(db, req.model_dump(), referral.id)
     db.commit()
     db.refresh(referral)
-
-    send_referral_notification(req.model_dump())
+    overview_counters.record_leads()
+    email_sender.notify()
 
     return {
         "referral_id": referral.id,
@@ -92,15 +122,24 @@ async def create_referral(req: ReferralRequest, db: Session = Depends(get_db)) -
 
 
 @router.get("/list")
-async def list_referrals(db: Session = Depends(get_db)) -> dict:
-    """紹介一覧（管理用）。"""
-    referrals = (
-        db.query(Referral)
-        .order_by(Referral.created_at.desc())
-        .limit(100)
-        .all()
-    )
-    return {"referrals": [_serialize_referral(r) for r in referrals]}
+async def list_referrals(
+    status: Optional[str] = Query(None, description="ステータスで絞り込み"),
+    manufacturer: Optional[str] = Query(None, description="メーカー名 (完全一致)"),
+    cursor: Optional[str] = Query(None, description="前ページの next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+) -> dict:
+    """紹介一覧（管理用）。新しい順、next_cursor で続きを取得。"""
+    filters = []
+    if status:
+        filters.append(Referral.status == status.strip().lower())
+    if manufacturer:
+        filters.append(Referral.manufacturer == manufacturer)
+    try:
+        page = list_page(db, Referral, REFERRAL_LIST_COLUMNS, filters=filters, cursor=cursor, limit=limit)
+    except ListingCursorError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return {"referrals": page["items"], "next_cursor": page["next_cursor"]}
 
 
 @router.patch("/{referral_id}")
@@ -121,7 +160,9 @@ async def update_referral(
     if referral is None:
         raise HTTPException(status_code=404, detail="referral not found")
 
+    previous_status = referral.status
     referral.status = status
+    record_referral_status_change(db, referral, previous_status)
     if req.notes is not None:
         referral.notes = req.notes.strip() or None
 
@@ -131,36 +172,19 @@ async def update_referral(
 
 
 @router.get("/stats")
-async def referral_stats(db: Session = Depends(get_db)) -> dict:
-    """紹介実績の集計（パートナー管理用）。"""
-    total = db.query(sql_func.count(Referral.id)).scalar() or 0
-    by_status = dict(
-        db.query(Referral.status, sql_func.count(Referral.id))
-        .group_by(Referral.status)
-        .all()
-    )
-    by_manufacturer = dict(
-        db.query(Referral.manufacturer, sql_func.count(Referral.id))
-        .group_by(Referral.manufacturer)
-        .all()
-    )
-    by_month = (
-        db.query(
-            extract("year", Referral.created_at).label("year"),
-            extract("month", Referral.created_at).label("month"),
-            sql_func.count(Referral.id).label("count"),
-        )
-        .group_by("year", "month")
-        .order_by("year", "month")
-        .all()
-    )
-
-    return {
-        "total": total,
-        "by_status": by_status,
-        "by_manufacturer": by_manufacturer,
-        "by_month": [
-            {"year": int(r.year), "month": int(r.month), "count": r.count}
-            for r in by_month
-        ],
+async def referral_stats(request: Request, response: Response, db: Session = Depends(get_db)):
+    """紹介実績の集計（パートナー管理用）。
+
+    月次ロールアップ (referral_monthly_stats) を1クエリで読む。
+    ETag / Last-Modified を付与し、条件付きリクエストには304を返す。
+    """
+    snapshot = load_referral_stats(db)
+    headers = {
+        "ETag": snapshot.etag,
+        "Last-Modified": format_datetime(snapshot.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
     }
+    if snapshot.not_modified(request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return snapshot.payload
@@ -19,9 +19,40 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-only-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Verified token principals are cached per worker (LRU) for this long;
+    # user updates invalidate them immediately in the worker that made them.
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+    # bcrypt runs in a dedicated per-worker thread pool; requests beyond
+    # workers + queue are rejected with 503 instead of piling up.
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_QUEUE: int = 32
+    # Per-account login throttling (per worker): after this many failures the
+    # account is locked out for AUTH_LOGIN_LOCKOUT_SECONDS without hashing.
+    AUTH_LOGIN_MAX_FAILURES: int = 5
+    AUTH_LOGIN_LOCKOUT_SECONDS: float = 300.0
 
     # Database
     DATABASE_URL: str = "sqlite:///./energy_calc.db"
+    # Create missing tables from the app lifespan. Deploys run scripts/migrate_db.py
+    # before starting workers and set this to false.
+    DB_AUTO_CREATE_SCHEMA: bool = True
+    # Connection pool (ignored for SQLite). Recycle below the server/proxy idle timeout.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Product event ingestion buffer (per worker). Events are flushed in batches
+    # when EVENT_BATCH_SIZE is reached or EVENT_FLUSH_SECONDS after the first one.
+    EVENT_QUEUE_MAX_SIZE: int = 10000
+    EVENT_BATCH_SIZE: int = 500
+    EVENT_FLUSH_SECONDS: float = 1.0
+    EVENT_ENQUEUE_TIMEOUT_SECONDS: float = 0.25
+    # /analytics/overview is served from per-worker counters that are reloaded
+    # from the database at this interval.
+    ANALYTICS_OVERVIEW_RECONCILE_SECONDS: float = 60.0
 
     # Feature defaults
     DEFAULT_TARIFF_PER_KWH: float = 25.0
@@ -32,6 +63,16 @@ class Settings(BaseSettings):
     STRIPE_WEBHOOK_SECRET: str = ""
     STRIPE_PRICE_ID_ENERGY: str = ""
     STRIPE_PRICE_ID_PROJECT_PASS: str = ""
+    # Webhook inbox worker: retry failed events up to this many attempts and
+    # poll for due retries (and events stored by other workers) at this interval.
+    STRIPE_WEBHOOK_MAX_ATTEMPTS: int = 8
+    STRIPE_WEBHOOK_POLL_SECONDS: float = 5.0
+
+    # Email outbox sender: messages per SMTP connection, retry limit and the
+    # poll interval for retries (new messages wake the sender immediately).
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6
+    EMAIL_OUTBOX_POLL_SECONDS: float = 10.0
 
     # Upload limits
     MAX_UPLOAD_SIZE_BYTES: int = 10 * 1024 * 1024  # 10MB
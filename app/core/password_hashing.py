@@ -0,0 +1,150 @@
+"""Password hashing off the request path, plus per-account login throttling.
+
+bcrypt costs ~100 ms of CPU per call. ``password_hasher`` runs it in a small
+dedicated thread pool (bcrypt releases the GIL), so a burst of logins neither
+blocks the event loop nor occupies the shared request threadpool. The pool is
+bounded: when AUTH_HASH_WORKERS + AUTH_HASH_MAX_QUEUE calls are in flight,
+new ones fail fast with ``HashingBusyError``.
+
+``login_throttle`` remembers failed logins per account; once an account hits
+AUTH_LOGIN_MAX_FAILURES it is rejected without touching the database or
+bcrypt until the lockout expires. Attempts rejected during the lockout are
+not counted, so it ends AUTH_LOGIN_LOCKOUT_SECONDS after the last counted
+failure. Both are per worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core import security
+from app.core.config import settings
+
+THROTTLE_MAX_ENTRIES = 10000
+
+
+class HashingBusyError(RuntimeError):
+    """The password hashing pool is saturated."""
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int = settings.AUTH_HASH_WORKERS,
+        max_queue: int = settings.AUTH_HASH_MAX_QUEUE,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+
+    def _finished(self, _future: Any) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise HashingBusyError("password hashing pool is saturated")
+            self._in_flight += 1
+            executor = self._ensure_executor()
+        future = executor.submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(security.verify_password, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(security.get_password_hash, password)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "queue_depth": max(in_flight - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class LoginThrottle:
+    def __init__(
+        self,
+        max_failures: int = settings.AUTH_LOGIN_MAX_FAILURES,
+        lockout_seconds: float = settings.AUTH_LOGIN_LOCKOUT_SECONDS,
+        max_entries: int = THROTTLE_MAX_ENTRIES,
+    ) -> None:
+        self.max_failures = max_failures
+        self.lockout_seconds = lockout_seconds
+        self.max_entries = max_entries
+        # account -> (failures, expires_at on the monotonic clock)
+        self._failures: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(account: str) -> str:
+        return account.strip().lower()
+
+    def retry_after(self, account: str) -> Optional[int]:
+        """Seconds until *account* may try again, or None if it is not locked out."""
+        if self.max_failures <= 0:
+            return None
+        key = self._key(account)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._failures.get(key)
+            if entry is None:
+                return None
+            failures, expires_at = entry
+            if expires_at <= now:
+                del self._failures[key]
+                return None
+            if failures < self.max_failures:
+                return None
+            return max(int(expires_at - now + 0.999), 1)
+
+    def record_failure(self, account: str) -> None:
+        key = self._key(account)
+        now = time.monotonic()
+        with self._lock:
+            failures, expires_at = self._failures.pop(key, (0, now))
+            if expires_at <= now:
+                failures = 0
+            # Each failure extends the window, so a steady trickle stays locked out.
+            self._failures[key] = (failures + 1, now + self.lockout_seconds)
+            while len(self._failures) > self.max_entries:
+                self._failures.popitem(last=False)
+
+    def reset(self, account: Optional[str] = None) -> None:
+        with self._lock:
+            if account is None:
+                self._failures.clear()
+            else:
+                self._failures.pop(self._key(account), None)
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
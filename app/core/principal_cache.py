@@ -0,0 +1,115 @@
+"""Per-worker cache of verified token principals.
+
+Authenticated requests decode the JWT and then need the user behind it. The
+principal (id, email, username, is_active) is cached for a short TTL in a
+bounded LRU, so the hot path of project endpoints does not query ``users``.
+Any update or delete of a User row flushed by this worker drops its entry
+immediately; other workers pick up the change within the TTL.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+
+PrincipalKey = Tuple[Optional[int], str]
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as seen by endpoints (read-only, detached from any session)."""
+
+    id: int
+    email: str
+    username: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, username=user.username, is_active=bool(user.is_active))
+
+
+class PrincipalCache:
+    def __init__(
+        self,
+        ttl_seconds: float = settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+        max_entries: int = settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[PrincipalKey, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: PrincipalKey) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: PrincipalKey, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop entries for *user_id* (all entries if None)."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k, (_, p) in self._entries.items() if p.id == user_id]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+principal_cache = PrincipalCache()
+
+
+def load_principal(db: Session, email: str, user_id: Optional[int] = None) -> Optional[Principal]:
+    """Principal for the token subject *email* (and ``uid`` claim, if present), cached."""
+    key = (user_id, email)
+    principal = principal_cache.get(key)
+    if principal is not None:
+        return principal
+
+    if user_id is not None:
+        user = db.get(User, user_id)
+        if user is None or user.email != email:
+            return None
+    else:
+        user = db.query(User).filter(User.email == email).first()
+        if user is None:
+            return None
+    principal = Principal.from_user(user)
+    principal_cache.put(key, principal)
+    return principal
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    principal_cache.invalidate(target.id)
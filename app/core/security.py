@@ -12,6 +12,7 @@ from app.core.config import settings
 from app.db.session import get_db # データベースセッション取得用
 from sqlalchemy.orm import Session
 from app.models.user import User # Userモデル
+from app.core.principal_cache import Principal, load_principal
 from app.schemas.token import TokenData # TokenDataスキーマ (トークンペイロード用)
 
 # パスワードハッシュ化のコンテキスト設定
@@ -46,6 +47,21 @@ def create_access_token(
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> TokenData:
+    """
+    Verifies the token signature/expiry and returns its subject and user id.
+    Raises JWTError if the token is invalid.
+    (トークンの署名・期限を検証し、sub と uid を返します。)
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    username: Optional[str] = payload.get("sub")
+    if username is None:
+        raise JWTError("token has no subject")
+    uid = payload.get("uid")
+    # Tokens issued before the uid claim existed carry only the email.
+    return TokenData(username=username, user_id=uid if isinstance(uid, int) else None)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verifies a plain password against a hashed password.
@@ -64,10 +80,11 @@ def get_password_hash(password: str) -> str:
 
 async def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
-) -> User:
+) -> Principal:
     """
     Decodes the access token and returns the current user.
     Raises HTTPException if the token is invalid or the user is not found.
+    The user is served from the principal cache when possible (no DB query).
     (アクセストークンをデコードし、現在のユーザーを返します。
      トークンが無効かユーザーが見つからない場合はHTTPExceptionを発生させます。)
     """
@@ -77,27 +94,19 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: Optional[str] = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username) # usernameをTokenDataにセット
+        token_data = decode_access_token(token)
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.email == token_data.username).first()
-    # もしCRUD操作を使うなら:
-    # from app.crud import user as crud_user
-    # user = crud_user.get_user_by_email(db, email=token_data.username)
-
+    user = load_principal(db, token_data.username, token_data.user_id)
     if user is None:
         raise credentials_exception
     return user
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Checks if the current user is active.
     Raises HTTPException if the user is inactive.
@@ -0,0 +1,74 @@
+"""Schema registration and DDL helpers.
+
+DDL runs once per deploy (``python -m scripts.migrate_db``) or, for local
+development, from the application lifespan — never at import time.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.db.base import Base
+
+# Numeric spec fields filtered by the products API (``spec=u_value:lte:1.5``).
+# PostgreSQL gets expression indexes matching ``specs[field].as_float()``.
+INDEXED_SPEC_FIELDS = ("u_value", "eta_c", "apf", "lambda_value", "lm_per_w", "efficiency_percent")
+
+
+def register_models() -> None:
+    # Import model modules so SQLAlchemy metadata has all tables.
+    from app.models import billing_entitlement  # noqa: F401
+    from app.models import billing_project_pass  # noqa: F401
+    from app.models import contact_inquiry  # noqa: F401
+    from app.models import email_outbox  # noqa: F401
+    from app.models import onboarding_registration  # noqa: F401
+    from app.models import product  # noqa: F401
+    from app.models import product_event  # noqa: F401
+    from app.models import product_event_daily  # noqa: F401
+    from app.models import project  # noqa: F401
+    from app.models import project_revision  # noqa: F401
+    from app.models import referral  # noqa: F401
+    from app.models import referral_monthly_stat  # noqa: F401
+    from app.models import stripe_webhook_event  # noqa: F401
+    from app.models import user  # noqa: F401
+
+
+def create_schema(bind: Engine) -> None:
+    """Create all missing tables and indexes on *bind*."""
+    register_models()
+    Base.metadata.create_all(bind=bind)
+    ensure_columns(bind)
+    ensure_indexes(bind)
+
+
+def ensure_columns(bind: Engine) -> None:
+    """Add nullable columns declared after a table was first created (create_all skips them)."""
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        present = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in present and column.nullable]
+        if not missing:
+            continue
+        with bind.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
+
+def ensure_indexes(bind: Engine) -> None:
+    """Add indexes declared after a table was first created (create_all skips them)."""
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=bind, checkfirst=True)
+
+    if bind.dialect.name == "postgresql":
+        with bind.begin() as conn:
+            for field in INDEXED_SPEC_FIELDS:
+                conn.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS ix_products_spec_{field} "
+                        f"ON products (category, (CAST((specs ->> '{field}') AS FLOAT)))"
+                    )
+                )
@@ -1,27 +1,93 @@
 # backend/app/db/session.py
 # -*- coding: utf-8 -*-
+from typing import Any, AsyncGenerator, Dict, Generator, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session # Sessionをインポート
-from typing import Generator # Generatorをインポート
 
 from app.core.config import settings # データベースURLをconfigから取得
 
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """
+    Engine keyword arguments shared by the sync and async engines.
+    (同期・非同期エンジン共通の接続プール設定。SQLiteではプール設定を適用しません。)
+    """
+    if _is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """
+    Map a sync DATABASE_URL to its async driver (asyncpg / aiosqlite).
+    (同期用DATABASE_URLを非同期ドライバ用URLに変換します。)
+    """
+    scheme, _, rest = url.partition("://")
+    base_scheme = scheme.split("+", 1)[0]
+    if base_scheme in ("postgres", "postgresql"):
+        parts = urlsplit(f"postgresql+asyncpg://{rest}")
+        # asyncpg does not understand libpq's sslmode; it takes ssl=<mode>.
+        query = [("ssl" if key == "sslmode" else key, value) for key, value in parse_qsl(parts.query)]
+        return urlunsplit(parts._replace(query=urlencode(query)))
+    if base_scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
 # データベースエンジンを作成
-# connect_args は SQLite を使う場合にのみ必要となることがあります。
-# PostgreSQL の場合は通常不要ですが、特定のSSL設定などが必要な場合は指定します。
-_connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True, connect_args=_connect_args)
-# PostgreSQLでSSLモードが必要な場合の例:
-# engine = create_engine(
-#     settings.DATABASE_URL,
-#     pool_pre_ping=True,
-#     connect_args={"sslmode": "require"} # 例
-# )
+# PostgreSQL では接続プールのサイズ・リサイクル間隔を settings から設定します。
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 
 
 # セッションローカルを作成 (データベースセッションのファクトリ)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期エンジンは初回利用時に作成します (ドライバの読み込みを起動時に行わないため)。
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        url = async_database_url(settings.DATABASE_URL)
+        options = engine_options(settings.DATABASE_URL)
+        if _is_sqlite(settings.DATABASE_URL):
+            options = {}  # aiosqlite runs each connection on its own thread
+        _async_engine = create_async_engine(url, **options)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
 def get_db() -> Generator[Session, None, None]:
     """
     Dependency to get a database session.
@@ -33,4 +99,13 @@ def get_db() -> Generator[Session, None, None]:
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency for `async def` routes: DB waits yield to the event loop.
+    (async def ルート用のセッション。DB待ちの間イベントループをブロックしません。)
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
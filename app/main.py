@@ -1,10 +1,15 @@
 """Main FastAPI application entry point."""
 
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
+from app.core.password_hashing import password_hasher
 from app.api.api import api_router as management_router
 from app.api.v1.routes import router as public_router
 from app.api.v1.billing import router as billing_router
@@ -14,27 +19,19 @@ from app.api.v1.analytics import router as analytics_router
 from app.api.v1.onboarding import router as onboarding_router
 from app.api.v1.residential import router as residential_router
 from app.api.v1.contact import router as contact_router
-from app.db.base import Base
-from app.db.session import engine
+from app.db.schema import create_schema
+from app.db.session import dispose_async_engine, engine
 from app.middleware.security import SecurityMiddleware, RateLimitMiddleware, LoggingMiddleware, RequestSizeLimitMiddleware
+from app.services.analytics_counters import overview_counters
+from app.services.email_outbox import email_sender
+from app.services.event_ingest import product_event_buffer
+from app.services.stripe_webhooks import stripe_webhook_worker
 from app.services.readiness import evaluate_production_readiness
+from app.services.warmup import run_warmup, warmup_state
 
 load_dotenv()
 
 
-def _register_models() -> None:
-    # Import model modules so SQLAlchemy metadata has all tables.
-    from app.models import billing_entitlement  # noqa: F401
-    from app.models import billing_project_pass  # noqa: F401
-    from app.models import contact_inquiry  # noqa: F401
-    from app.models import onboarding_registration  # noqa: F401
-    from app.models import product  # noqa: F401
-    from app.models import product_event  # noqa: F401
-    from app.models import project  # noqa: F401
-    from app.models import referral  # noqa: F401
-    from app.models import user  # noqa: F401
-
-
 def _enforce_production_readiness() -> None:
     if settings.env.lower() != "production":
         return
@@ -52,11 +49,24 @@ def _enforce_production_readiness() -> None:
     )
 
 
-_enforce_production_readiness()
-_register_models()
-
-# Create database tables on startup
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Runs once per worker before it accepts connections.
+    _enforce_production_readiness()
+    if settings.DB_AUTO_CREATE_SCHEMA:
+        await run_in_threadpool(create_schema, engine)
+    await run_in_threadpool(run_warmup)
+    product_event_buffer.start()
+    overview_counters.start()
+    stripe_webhook_worker.start()
+    email_sender.start()
+    yield
+    await email_sender.stop()
+    await stripe_webhook_worker.stop()
+    await overview_counters.stop()
+    await product_event_buffer.stop()
+    password_hasher.shutdown()
+    await dispose_async_engine()
 
 
 app = FastAPI(
@@ -66,6 +76,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_PREFIX}/openapi.json",
     docs_url=f"{settings.API_PREFIX}/docs" if settings.env.lower() == "development" else None,
     redoc_url=f"{settings.API_PREFIX}/redoc" if settings.env.lower() == "development" else None,
+    lifespan=lifespan,
 )
 
 # CORS configuration shared across public/front-end clients
@@ -75,6 +86,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security-oriented middleware stack
@@ -105,3 +117,17 @@ async def read_root() -> dict[str, str]:
 @app.get("/healthz", tags=["Health"], summary="Service health")
 async def health_check() -> dict[str, str]:
     return {"status": "ok", "service": settings.APP_NAME}
+
+
+@app.get("/readyz", tags=["Health"], summary="Worker readiness (warm-up state)")
+async def readiness_check() -> JSONResponse:
+    state = warmup_state()
+    return JSONResponse(
+        status_code=200 if state["status"] == "warm" else 503,
+        content={
+            "status": state["status"],
+            "service": settings.APP_NAME,
+            "warmup": state,
+            "password_hashing": password_hasher.stats(),
+        },
+    )
@@ -0,0 +1,36 @@
+"""Outbound email queue, delivered by the background email sender."""
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_email_outbox_kind_reference", "kind", "reference_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # What the message is for, e.g. "contact_notification"; reference_id points
+    # at the row it was sent about (contact inquiry, referral, ...).
+    kind = Column(String(50), nullable=False)
+    reference_id = Column(Integer, nullable=True)
+
+    to_email = Column(String(200), nullable=False)
+    reply_to = Column(String(200), nullable=True)
+    subject = Column(String(300), nullable=False)
+    body = Column(Text, nullable=False)
+
+    # pending -> sending -> sent | failed (retried) | dead (gave up)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
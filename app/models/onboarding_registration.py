@@ -1,6 +1,8 @@
 """Partner onboarding registration model."""
 
-from sqlalchemy import Column, DateTime, Integer, String, Text
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -8,6 +10,12 @@ from app.db.base import Base
 
 class OnboardingRegistration(Base):
     __tablename__ = "onboarding_registrations"
+    # Admin list: newest first by (created_at, id), optionally filtered.
+    __table_args__ = (
+        Index("ix_onboarding_registrations_created_at_id", "created_at", "id"),
+        Index("ix_onboarding_registrations_source_created_at_id", "source", "created_at", "id"),
+        Index("ix_onboarding_registrations_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -20,5 +28,8 @@ class OnboardingRegistration(Base):
     status = Column(String(50), nullable=False, default="pending")
     notes = Column(Text, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set from Python as well so SQLite stores the same precision the list cursor compares with.
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,6 +1,6 @@
 """Product catalog model for PostgreSQL storage."""
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, JSON, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, JSON, String
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -8,6 +8,10 @@ from app.db.base import Base
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset order of the products API: partner first, then name, product_id.
+        Index("ix_products_category_partner_name", "category", "partner", "name", "product_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(String(100), unique=True, nullable=False, index=True)
@@ -1,6 +1,6 @@
 """Product selection event tracking for manufacturer analytics."""
 
-from sqlalchemy import Column, DateTime, Float, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -8,6 +8,13 @@ from app.db.base import Base
 
 class ProductEvent(Base):
     __tablename__ = "product_events"
+    __table_args__ = (
+        # Analytics access paths: per-manufacturer and per-category time windows,
+        # and the rollup rebuild which scans by created_at.
+        Index("ix_product_events_manufacturer_created_at", "manufacturer", "created_at"),
+        Index("ix_product_events_category_type_created_at", "category", "event_type", "created_at"),
+        Index("ix_product_events_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     event_type = Column(String(50), nullable=False, index=True)
@@ -0,0 +1,32 @@
+"""Daily rollup of product events for manufacturer analytics."""
+
+from sqlalchemy import Column, Date, Index, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+
+
+class ProductEventDaily(Base):
+    __tablename__ = "product_event_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "day",
+            "event_type",
+            "manufacturer",
+            "category",
+            "building_zone",
+            "building_use",
+            name="uq_product_event_daily_key",
+        ),
+        Index("ix_product_event_daily_manufacturer_day", "manufacturer", "day"),
+        Index("ix_product_event_daily_category_day", "category", "day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False, index=True)
+    event_type = Column(String(50), nullable=False)
+    manufacturer = Column(String(100), nullable=False)
+    category = Column(String(50), nullable=False)
+    # 0 / "" stand for "not given" so the key stays unique (NULLs never conflict).
+    building_zone = Column(Integer, nullable=False, default=0)
+    building_use = Column(String(100), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
@@ -1,5 +1,5 @@
 # backend/app/models/project.py
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, DateTime
+from sqlalchemy import Boolean, Column, Float, Index, Integer, String, ForeignKey, JSON, DateTime
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -7,6 +7,8 @@ from app.db.base import Base
 
 class Project(Base):
     __tablename__ = "projects"
+    # Project list: owner's projects, newest id first (keyset on id).
+    __table_args__ = (Index("ix_projects_owner_id_id", "owner_id", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -18,6 +20,16 @@ class Project(Base):
     # ���̓f�[�^�ƌv�Z���ʂ�JSON�`���ŕۑ�
     input_data = Column(JSON)
     result_data = Column(JSON)
+    # sha256 of CALCULATION_VERSION + the canonical CalculationInput that produced result_data
+    input_hash = Column(String(64), nullable=True)
+    # CALCULATION_VERSION that produced result_data; older results are never reused
+    calculation_version = Column(Integer, nullable=True)
+
+    # Headline metrics copied from result_data at calculation time, so the
+    # project list never has to load the JSON columns.
+    bei = Column(Float, nullable=True)
+    floor_area = Column(Float, nullable=True)
+    is_compliant = Column(Boolean, nullable=True)
     
     # ���[�U�[�Ƃ̃����[�V����
     owner = relationship("User", back_populates="projects")
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""Calculation history of a project (input + result), stored as deltas."""
+
+from sqlalchemy import Boolean, Column, DateTime, ForeignKey, Integer, JSON, String, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ProjectRevision(Base):
+    __tablename__ = "project_revisions"
+    __table_args__ = (UniqueConstraint("project_id", "revision", name="uq_project_revisions_project_revision"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
+    revision = Column(Integer, nullable=False)
+
+    # Either a full document ({"input_data", "result_data"}) or a JSON Patch
+    # (RFC 6902) against the previous revision.
+    is_snapshot = Column(Boolean, nullable=False, default=False)
+    snapshot = Column(JSON, nullable=True)
+    patch = Column(JSON, nullable=True)
+    input_hash = Column(String(64), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,6 +1,8 @@
 """Referral tracking model."""
 
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text
 from sqlalchemy.sql import func
 
 from app.db.base import Base
@@ -8,6 +10,12 @@ from app.db.base import Base
 
 class Referral(Base):
     __tablename__ = "referrals"
+    # Admin list: newest first by (created_at, id), optionally filtered.
+    __table_args__ = (
+        Index("ix_referrals_created_at_id", "created_at", "id"),
+        Index("ix_referrals_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_referrals_manufacturer_created_at_id", "manufacturer", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -29,5 +37,8 @@ class Referral(Base):
     status = Column(String(50), default="pending")
     notes = Column(Text, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set from Python as well so SQLite stores the same precision the list cursor compares with.
+    created_at = Column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -0,0 +1,20 @@
+"""Monthly referral counts per manufacturer and status, behind /referral/stats."""
+
+from sqlalchemy import Column, Date, DateTime, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+
+
+class ReferralMonthlyStat(Base):
+    __tablename__ = "referral_monthly_stats"
+    __table_args__ = (
+        UniqueConstraint("month", "manufacturer", "status", name="uq_referral_monthly_stats_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # First day of the month the referrals were created in (UTC).
+    month = Column(Date, nullable=False)
+    manufacturer = Column(String(100), nullable=False)
+    status = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
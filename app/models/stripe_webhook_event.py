@@ -0,0 +1,31 @@
+"""Inbox of verified Stripe webhook deliveries, processed asynchronously."""
+
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class StripeWebhookEvent(Base):
+    __tablename__ = "stripe_webhook_events"
+    __table_args__ = (
+        # Worker poll: due pending/failed events in arrival order.
+        Index("ix_stripe_webhook_events_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Stripe's evt_... id; the unique constraint is what makes redeliveries no-ops.
+    event_id = Column(String(255), nullable=False, unique=True)
+    event_type = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    # pending -> processing -> processed | failed (retried) | dead (gave up)
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,5 +1,6 @@
 # backend/app/schemas/project.py
 # -*- coding: utf-8 -*-
+from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel
 
@@ -29,5 +30,14 @@ class Project(ProjectInDBBase):
     # owner: Optional[User] = None # オーナー情報 (例)
     pass
 
+# 一覧用の軽量プロジェクション (input_data / result_data は含めない)
+class ProjectSummary(ProjectInDBBase):
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    bei: Optional[float] = None
+    floor_area: Optional[float] = None
+    is_compliant: Optional[bool] = None
+    has_result: bool = False
+
 class ProjectInDB(ProjectInDBBase):
     pass
\ No newline at end of file
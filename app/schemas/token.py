@@ -18,6 +18,6 @@ class TokenData(BaseModel):
     (JWTトークン内に埋め込まれるデータ（ペイロード）用のスキーマ。)
     """
     username: Optional[str] = None # 通常、ユーザー名やメールアドレスなど、ユーザーを識別する情報
-    # 他にもトークンに含めたい情報があれば追加できます (例: user_id: Optional[int] = None)
+    user_id: Optional[int] = None # uid クレーム (ユーザーの不変ID)
 
 # (オプション) トークンリフレッシュ機能がある場合は、リフレッシュトークン関連のスキーマもここに追加
\ No newline at end of file
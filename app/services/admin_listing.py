@@ -0,0 +1,77 @@
+"""Keyset pagination for the admin list endpoints (referrals, onboarding).
+
+Lists are ordered newest first by ``(created_at, id)`` and continue from an
+opaque cursor holding the last row's key, so each page is one index range
+scan of ``limit + 1`` rows no matter how deep the admin pages. Only the
+requested columns are selected; rows come back as plain dicts.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+
+class ListingCursorError(ValueError):
+    """Invalid cursor supplied by the client."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise ListingCursorError("invalid cursor") from None
+
+
+def list_page(
+    db: Session,
+    model: Any,
+    columns: Sequence[str],
+    *,
+    filters: Sequence[Any] = (),
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """One page of *model* rows, newest first: ``{"items": [...], "next_cursor": ...}``."""
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ListingCursorError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    created_col, id_col = model.created_at, model.id
+    stmt = select(*(getattr(model, name) for name in columns)).where(*filters)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(created_col < created_at, and_(created_col == created_at, id_col < row_id)))
+    stmt = stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+
+    rows = db.execute(stmt).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["created_at"], last["id"])
+
+    items: List[Dict[str, Any]] = []
+    for row in rows:
+        item = dict(row)
+        for name in TIMESTAMP_FIELDS:
+            if name in item:
+                item[name] = str(item[name])
+        items.append(item)
+    return {"items": items, "next_cursor": next_cursor}
@@ -1,18 +1,40 @@
-"""AI product recommendation engine using Claude API."""
+"""AI product recommendation engine using Claude API.
+
+Responses are cached per (zone, use, floor-area bucket, BEI bucket, catalog
+version) and concurrent identical requests, batch or streamed, share one
+in-flight API call. The call runs as its own task, so a caller that
+disconnects does not cancel it for the others; empty replies are not cached.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import functools
 import logging
 import os
 import re
-from typing import Any, Dict, List, Optional
+import time
+from bisect import bisect_right
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
+from app.services.product_index import catalog_version
 from app.services.products import get_recommended_products
 
 logger = logging.getLogger(__name__)
 
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest")
+AI_RECOMMEND_CACHE_TTL_SECONDS = float(os.getenv("AI_RECOMMEND_CACHE_TTL_SECONDS", "3600"))
+AI_RECOMMEND_CACHE_MAX_ENTRIES = 1024
+
+# 延床面積の区分 (m2): 300 / 2000 は省エネ法の規模区分、それ以上は目安。
+FLOOR_AREA_BUCKETS = (300, 2000, 5000, 10000, 50000)
+BEI_BUCKET_WIDTH = 0.05
+
+CacheKey = Tuple[Any, ...]
+_cache: Dict[CacheKey, Tuple[float, List[Dict[str, Any]]]] = {}
+_inflight: Dict[CacheKey, "_Flight"] = {}
 
 USE_LABELS = {
     "office": "事務所",
@@ -96,29 +118,121 @@ def _format_spec(category: str, product: Dict[str, Any]) -> str:
     return ""
 
 
+_BLOCK_START = "[RECOMMEND]"
+_BLOCK_END = "[/RECOMMEND]"
+
+
+def _parse_block(block: str) -> Optional[Dict[str, Any]]:
+    recommendation: Dict[str, Any] = {}
+    for line in block.strip().split("\n"):
+        line = line.strip()
+        if ":" not in line:
+            continue
+        key, _, value = line.partition(":")
+        key = key.strip()
+        value = value.strip()
+        if key in ("category", "product_id", "reason", "estimated_bei_impact"):
+            recommendation[key] = value
+    return recommendation if recommendation.get("product_id") else None
+
+
 def parse_recommendation(raw_text: str) -> List[Dict[str, Any]]:
     """Parse structured [RECOMMEND] blocks from Claude response."""
     results: List[Dict[str, Any]] = []
     blocks = re.findall(r"\[RECOMMEND\](.*?)\[/RECOMMEND\]", raw_text, re.DOTALL)
 
     for block in blocks:
-        recommendation: Dict[str, Any] = {}
-        for line in block.strip().split("\n"):
-            line = line.strip()
-            if ":" not in line:
-                continue
-            key, _, value = line.partition(":")
-            key = key.strip()
-            value = value.strip()
-            if key in ("category", "product_id", "reason", "estimated_bei_impact"):
-                recommendation[key] = value
-
-        if recommendation.get("product_id"):
+        recommendation = _parse_block(block)
+        if recommendation:
             results.append(recommendation)
 
     return results
 
 
+class RecommendationStreamParser:
+    """Incremental parse_recommendation: feed text deltas, get finished blocks."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._buffer += chunk
+        finished: List[Dict[str, Any]] = []
+        while True:
+            start = self._buffer.find(_BLOCK_START)
+            if start < 0:
+                # Keep a tail that may hold the beginning of a split start marker.
+                self._buffer = self._buffer[-(len(_BLOCK_START) - 1):]
+                return finished
+            end = self._buffer.find(_BLOCK_END, start + len(_BLOCK_START))
+            if end < 0:
+                self._buffer = self._buffer[start:]
+                return finished
+            recommendation = _parse_block(self._buffer[start + len(_BLOCK_START):end])
+            if recommendation:
+                finished.append(recommendation)
+            self._buffer = self._buffer[end + len(_BLOCK_END):]
+
+
+def recommendation_cache_key(
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+) -> CacheKey:
+    """Requests with the same key get the same recommendations."""
+    bei_bucket = None if current_bei is None else round(current_bei / BEI_BUCKET_WIDTH)
+    return (
+        zone,
+        use,
+        bisect_right(FLOOR_AREA_BUCKETS, floor_area),
+        bei_bucket,
+        tuple(categories) if categories is not None else None,
+        catalog_version(),
+    )
+
+
+def reset_recommendation_cache() -> None:
+    _cache.clear()
+    _inflight.clear()
+
+
+def _cache_get(key: CacheKey) -> Optional[List[Dict[str, Any]]]:
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, recommendations = entry
+    if time.monotonic() >= expires_at:
+        _cache.pop(key, None)
+        return None
+    return recommendations
+
+
+def _cache_put(key: CacheKey, recommendations: List[Dict[str, Any]]) -> None:
+    while len(_cache) >= AI_RECOMMEND_CACHE_MAX_ENTRIES:
+        _cache.pop(next(iter(_cache)))
+    _cache[key] = (time.monotonic() + AI_RECOMMEND_CACHE_TTL_SECONDS, recommendations)
+
+
+async def _complete(prompt: str) -> str:
+    """Send *prompt* to Claude and return the text of the reply ("" if empty)."""
+    import anthropic
+
+    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    # The SDK client is blocking; keep the event loop free for other requests.
+    message = await asyncio.to_thread(
+        client.messages.create,
+        model=ANTHROPIC_MODEL,
+        max_tokens=1500,
+        messages=[{"role": "user", "content": prompt}],
+    )
+    if not message.content:
+        return ""
+    return message.content[0].text
+
+
 async def get_ai_recommendations(
     *,
     zone: int,
@@ -127,13 +241,111 @@ async def get_ai_recommendations(
     current_bei: Optional[float] = None,
     categories: Optional[List[str]] = None,
 ) -> List[Dict[str, Any]]:
-    """Call Claude API for product recommendations."""
+    """Return Claude product recommendations, served from cache when possible."""
     if not ANTHROPIC_API_KEY:
         logger.warning("ANTHROPIC_API_KEY not set; returning empty recommendations")
         return []
 
-    import anthropic
-
+    key = recommendation_cache_key(
+        zone=zone, use=use, floor_area=floor_area, current_bei=current_bei, categories=categories
+    )
+    cached = _cache_get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    params = dict(zone=zone, use=use, floor_area=floor_area, current_bei=current_bei, categories=categories)
+    flight = _join_or_start(key, _fetch_and_cache, params)
+    # shield: a caller that goes away must not cancel the call the others are waiting for.
+    return copy.deepcopy(await asyncio.shield(flight.task))
+
+
+class _Flight:
+    """One in-flight Claude call shared by every request with the same cache key.
+
+    ``recommendations`` grows as blocks arrive (all at once for a batch call);
+    stream followers replay it and wait for more until the task finishes.
+    """
+
+    def __init__(self) -> None:
+        self.recommendations: List[Dict[str, Any]] = []
+        self.task: "asyncio.Task[List[Dict[str, Any]]]"
+        self._update = asyncio.Event()
+
+    def publish(self, recommendations: List[Dict[str, Any]]) -> None:
+        if recommendations:
+            self.recommendations.extend(recommendations)
+            self.notify()
+
+    def notify(self) -> None:
+        self._update.set()
+        self._update = asyncio.Event()
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        sent = 0
+        while True:
+            if sent < len(self.recommendations):
+                sent += 1
+                yield copy.deepcopy(self.recommendations[sent - 1])
+            elif self.task.done():
+                self.task.result()  # re-raise the call's failure
+                return
+            else:
+                await self._update.wait()
+
+
+def _join_or_start(
+    key: CacheKey,
+    fetch: Callable[..., Awaitable[List[Dict[str, Any]]]],
+    params: Dict[str, Any],
+) -> _Flight:
+    flight = _inflight.get(key)
+    if flight is None:
+        flight = _Flight()
+        flight.task = asyncio.ensure_future(fetch(key, flight, **params))
+        _inflight[key] = flight
+        flight.task.add_done_callback(functools.partial(_flight_done, key, flight))
+    return flight
+
+
+def _flight_done(key: CacheKey, flight: _Flight, task: "asyncio.Task[List[Dict[str, Any]]]") -> None:
+    if _inflight.get(key) is flight:
+        del _inflight[key]
+    flight.notify()
+    if not task.cancelled():
+        # Mark retrieved so a failure nobody is still waiting for is not logged as lost.
+        task.exception()
+
+
+def _finish(key: CacheKey, flight: _Flight) -> List[Dict[str, Any]]:
+    # An empty reply is usually a transient upstream problem; let the next request retry.
+    if flight.recommendations:
+        _cache_put(key, flight.recommendations)
+    return flight.recommendations
+
+
+async def _fetch_and_cache(key: CacheKey, flight: _Flight, **params: Any) -> List[Dict[str, Any]]:
+    flight.publish(await _fetch_recommendations(**params))
+    return _finish(key, flight)
+
+
+async def _stream_and_cache(key: CacheKey, flight: _Flight, **params: Any) -> List[Dict[str, Any]]:
+    parser = RecommendationStreamParser()
+    async for chunk in _stream_completion(build_recommendation_prompt(**params)):
+        finished = parser.feed(chunk)
+        for rec in finished:
+            _enrich(rec, zone=params["zone"], use=params["use"])
+        flight.publish(finished)
+    return _finish(key, flight)
+
+
+async def _fetch_recommendations(
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float],
+    categories: Optional[List[str]],
+) -> List[Dict[str, Any]]:
     prompt = build_recommendation_prompt(
         zone=zone,
         use=use,
@@ -141,29 +353,87 @@ async def get_ai_recommendations(
         current_bei=current_bei,
         categories=categories,
     )
+    raw = await _complete(prompt)
+    if not raw:
+        return []
 
-    client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-    message = client.messages.create(
+    recommendations = parse_recommendation(raw)
+    for rec in recommendations:
+        _enrich(rec, zone=zone, use=use)
+    return recommendations
+
+
+def _enrich(rec: Dict[str, Any], *, zone: int, use: str) -> None:
+    """Attach the catalog entry for rec["product_id"] as rec["product"]."""
+    category = rec.get("category", "")
+    product_id = rec.get("product_id", "")
+    try:
+        products = get_recommended_products(category, zone=zone, use=use)
+        match = next((p for p in products if p["id"] == product_id), None)
+        if match:
+            rec["product"] = match
+    except Exception:
+        logger.exception("Failed to enrich recommendation for %s/%s", category, product_id)
+
+
+async def _stream_completion(prompt: str) -> AsyncIterator[str]:
+    """Yield text deltas of Claude's reply as they arrive."""
+    import anthropic
+
+    client = anthropic.AsyncAnthropic(api_key=ANTHROPIC_API_KEY)
+    async with client.messages.stream(
         model=ANTHROPIC_MODEL,
         max_tokens=1500,
         messages=[{"role": "user", "content": prompt}],
-    )
+    ) as stream:
+        async for text in stream.text_stream:
+            yield text
 
-    if not message.content:
-        return []
 
-    raw = message.content[0].text
-    recommendations = parse_recommendation(raw)
+def cached_ai_recommendations(
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """The cached recommendations for these parameters, or None on a miss."""
+    key = recommendation_cache_key(
+        zone=zone, use=use, floor_area=floor_area, current_bei=current_bei, categories=categories
+    )
+    cached = _cache_get(key)
+    return copy.deepcopy(cached) if cached is not None else None
 
-    for rec in recommendations:
-        category = rec.get("category", "")
-        product_id = rec.get("product_id", "")
-        try:
-            products = get_recommended_products(category, zone=zone, use=use)
-            match = next((p for p in products if p["id"] == product_id), None)
-            if match:
-                rec["product"] = match
-        except Exception:
-            logger.exception("Failed to enrich recommendation for %s/%s", category, product_id)
 
-    return recommendations
+async def stream_ai_recommendations(
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield each recommendation as soon as its [RECOMMEND] block is complete.
+
+    Shares the cache and the in-flight calls with get_ai_recommendations: a
+    hit replays the cached list, a request already in flight (streamed or
+    not) is joined instead of calling Claude again, and a completed stream
+    fills the cache.
+    """
+    if not ANTHROPIC_API_KEY:
+        logger.warning("ANTHROPIC_API_KEY not set; returning empty recommendations")
+        return
+
+    key = recommendation_cache_key(
+        zone=zone, use=use, floor_area=floor_area, current_bei=current_bei, categories=categories
+    )
+    cached = _cache_get(key)
+    if cached is not None:
+        for rec in copy.deepcopy(cached):
+            yield rec
+        return
+
+    params = dict(zone=zone, use=use, floor_area=floor_area, current_bei=current_bei, categories=categories)
+    async for rec in _join_or_start(key, _stream_and_cache, params).follow():
+        yield rec
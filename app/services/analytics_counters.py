@@ -0,0 +1,171 @@
+"""In-process counters behind ``/analytics/overview``.
+
+The overview is served from memory: the event flusher and the referral
+endpoint increment the counters as rows are committed, and a background task
+periodically reloads them from the database (product_event_daily + referrals),
+which is the shared source of truth across workers. Between reconciliations a
+worker only sees its own increments, so counts may lag by at most one
+reconcile interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product_event_daily import ProductEventDaily
+from app.models.referral import Referral
+
+logger = logging.getLogger(__name__)
+
+
+async def load_overview_counts(db: AsyncSession) -> Tuple[Dict[str, int], int]:
+    """Selections per manufacturer and total leads, straight from the database."""
+    by_manufacturer = {
+        manufacturer: int(count)
+        for manufacturer, count in (
+            await db.execute(
+                select(ProductEventDaily.manufacturer, func.sum(ProductEventDaily.count))
+                .where(ProductEventDaily.event_type == "selected")
+                .group_by(ProductEventDaily.manufacturer)
+            )
+        ).all()
+    }
+    total_leads = (await db.execute(select(func.count(Referral.id)))).scalar() or 0
+    return by_manufacturer, int(total_leads)
+
+
+@dataclass(frozen=True)
+class OverviewSnapshot:
+    payload: Dict[str, Any]
+    etag: str
+    last_modified: datetime
+
+    def not_modified(self, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+        """Evaluate conditional request headers (If-None-Match wins, RFC 9110 13.2.2)."""
+        if if_none_match:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+
+class OverviewCounters:
+    def __init__(self, reconcile_seconds: float = settings.ANALYTICS_OVERVIEW_RECONCILE_SECONDS) -> None:
+        self.reconcile_seconds = reconcile_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all counts; the next overview request reloads them."""
+        self._by_manufacturer: Counter = Counter()
+        self._total_leads = 0
+        self._snapshot: Optional[OverviewSnapshot] = None
+        self.loaded = False
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.reconciled_at: Optional[datetime] = None
+
+    # -- updates -----------------------------------------------------------
+
+    def record_events(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """Count committed product events (only "selected" ones are shown)."""
+        if not self.loaded:
+            return
+        selected = Counter(row["manufacturer"] for row in rows if row.get("event_type") == "selected")
+        if selected:
+            self._by_manufacturer.update(selected)
+            self._touch()
+
+    def record_leads(self, count: int = 1) -> None:
+        if not self.loaded or count <= 0:
+            return
+        self._total_leads += count
+        self._touch()
+
+    def replace(self, by_manufacturer: Dict[str, int], total_leads: int) -> None:
+        """Install counts loaded from the database; keeps Last-Modified if nothing changed."""
+        changed = not self.loaded or dict(self._by_manufacturer) != by_manufacturer or self._total_leads != total_leads
+        self._by_manufacturer = Counter(by_manufacturer)
+        self._total_leads = total_leads
+        self.loaded = True
+        self.reconciled_at = datetime.now(timezone.utc)
+        if changed:
+            self._touch()
+
+    async def reconcile(self, db: Optional[AsyncSession] = None) -> None:
+        if db is None:
+            from app.db.session import AsyncSessionLocal
+
+            async with AsyncSessionLocal() as session:
+                self.replace(*await load_overview_counts(session))
+            return
+        self.replace(*await load_overview_counts(db))
+
+    def _touch(self) -> None:
+        self._snapshot = None
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+    # -- reads -------------------------------------------------------------
+
+    def snapshot(self) -> OverviewSnapshot:
+        """Current overview payload with validators; rebuilt only after a change."""
+        if self._snapshot is None:
+            by_manufacturer = dict(sorted(self._by_manufacturer.items(), key=lambda item: (-item[1], item[0])))
+            payload = {
+                "total_calculations": sum(by_manufacturer.values()),
+                "total_leads": self._total_leads,
+                "by_manufacturer": by_manufacturer,
+            }
+            digest = hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+            self._snapshot = OverviewSnapshot(payload, f'"{digest.hexdigest()[:32]}"', self.last_modified)
+        return self._snapshot
+
+    # -- periodic reconciliation --------------------------------------------
+
+    def start(self) -> None:
+        """Start the reconcile loop on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._task = loop.create_task(self._run(), name="analytics-overview-reconciler")
+
+    async def stop(self) -> None:
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_seconds)
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("Analytics overview reconciliation failed")
+
+
+overview_counters = OverviewCounters()
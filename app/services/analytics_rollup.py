@@ -0,0 +1,173 @@
+"""Daily rollups of product_events for the analytics endpoints.
+
+``product_event_daily`` holds one count per (day, event_type, manufacturer,
+category, zone, use). It is maintained incrementally by the event flusher
+(apply_rollups in the same transaction as the raw insert) and can be rebuilt
+from the raw table by ``python -m scripts.rebuild_analytics_rollups``, which
+also reconciles rows written by other paths. ``scripts.migrate_db`` backfills
+it from history while it is still empty. Days are UTC days on every path.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, exists, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.product_event import ProductEvent
+from app.models.product_event_daily import ProductEventDaily
+
+RollupKey = Tuple[date, str, str, str, int, str]
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return datetime.now(timezone.utc).date()
+
+
+def rollup_key(row: Dict[str, Any]) -> RollupKey:
+    return (
+        _as_date(row.get("created_at")),
+        row["event_type"],
+        row["manufacturer"],
+        row["category"],
+        row.get("building_zone") or 0,
+        row.get("building_use") or "",
+    )
+
+
+def aggregate(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse raw event rows into rollup rows with counts."""
+    counts = Counter(rollup_key(row) for row in rows)
+    return [
+        {
+            "day": day,
+            "event_type": event_type,
+            "manufacturer": manufacturer,
+            "category": category,
+            "building_zone": zone,
+            "building_use": use,
+            "count": count,
+        }
+        for (day, event_type, manufacturer, category, zone, use), count in counts.items()
+    ]
+
+
+async def apply_rollups(db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> None:
+    """Add the counts of *rows* to product_event_daily (caller commits)."""
+    rollups = aggregate(rows)
+    if not rollups:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        for rollup in rollups:
+            await _increment_portable(db, rollup)
+        return
+
+    stmt = upsert(ProductEventDaily).values(rollups)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "event_type", "manufacturer", "category", "building_zone", "building_use"],
+        set_={"count": ProductEventDaily.count + stmt.excluded.count},
+    )
+    await db.execute(stmt)
+
+
+async def _increment_portable(db: AsyncSession, rollup: Dict[str, Any]) -> None:
+    key = {k: v for k, v in rollup.items() if k != "count"}
+    existing = await db.scalar(select(ProductEventDaily).filter_by(**key).with_for_update())
+    if existing is None:
+        db.add(ProductEventDaily(**rollup))
+    else:
+        existing.count += rollup["count"]
+    await db.flush()
+
+
+def report_window_start(months: int, today: Optional[date] = None) -> date:
+    """First day of the window covering the current calendar month and the *months*-1 before it."""
+    today = today or datetime.now(timezone.utc).date()
+    month_index = today.year * 12 + (today.month - 1) - (months - 1)
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _utc_day(column: Any, dialect: str) -> Any:
+    """Calendar day of *column* in UTC, matching _as_date on the incremental path."""
+    if dialect == "postgresql":
+        # date() of a timestamptz follows the session TimeZone; pin it to UTC.
+        return func.date(func.timezone("UTC", column))
+    return func.date(column)
+
+
+def _rebuild_statements(dialect: str, since: Optional[date]) -> Tuple[Any, Any]:
+    day = _utc_day(ProductEvent.created_at, dialect)
+    query = select(
+        day.label("day"),
+        ProductEvent.event_type,
+        ProductEvent.manufacturer,
+        ProductEvent.category,
+        func.coalesce(ProductEvent.building_zone, 0).label("building_zone"),
+        func.coalesce(ProductEvent.building_use, "").label("building_use"),
+        func.count(ProductEvent.id).label("count"),
+    ).group_by(
+        day,
+        ProductEvent.event_type,
+        ProductEvent.manufacturer,
+        ProductEvent.category,
+        func.coalesce(ProductEvent.building_zone, 0),
+        func.coalesce(ProductEvent.building_use, ""),
+    )
+    clear = delete(ProductEventDaily)
+    if since is not None:
+        query = query.where(ProductEvent.created_at >= datetime.combine(since, datetime.min.time(), timezone.utc))
+        clear = clear.where(ProductEventDaily.day >= since)
+    # INSERT ... SELECT keeps the aggregation inside the database, so a full
+    # backfill over millions of events never materialises rows in Python.
+    fill = insert(ProductEventDaily).from_select(
+        ["day", "event_type", "manufacturer", "category", "building_zone", "building_use", "count"],
+        query,
+    )
+    return clear, fill
+
+
+async def rebuild_daily_rollups(db: AsyncSession, since: Optional[date] = None) -> int:
+    """Recompute rollups from product_events for days >= *since* (all days if None).
+
+    Runs in the caller's transaction and commits. Returns the number of rollup rows.
+    """
+    clear, fill = _rebuild_statements(db.get_bind().dialect.name, since)
+    await db.execute(clear)
+    result = await db.execute(fill)
+    await db.commit()
+    return max(result.rowcount or 0, 0)
+
+
+def backfill_daily_rollups(db: Session) -> Optional[int]:
+    """Fill product_event_daily from all history if it is empty but events exist.
+
+    Called by the migrate step, before workers start adding to the rollup, so
+    an empty table means it has never been filled. Returns the number of
+    rollup rows written, or None if nothing needed doing.
+    """
+    if db.scalar(select(exists().where(ProductEventDaily.id.isnot(None)))):
+        return None
+    if not db.scalar(select(exists().where(ProductEvent.id.isnot(None)))):
+        return None
+    clear, fill = _rebuild_statements(db.get_bind().dialect.name, None)
+    db.execute(clear)
+    result = db.execute(fill)
+    db.commit()
+    return max(result.rowcount or 0, 0)
@@ -2,6 +2,7 @@
 
 import logging
 import math
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Union
 
 logger = logging.getLogger(__name__)
@@ -29,6 +30,15 @@ USE_LABELS_JA = {
 }
 
 
+STANDARD_INTENSITIES_PATH = "data/bei/standard_intensities.yaml"
+
+
+@lru_cache(maxsize=1)
+def load_standard_intensities() -> Dict[str, Any]:
+    """Parse the standard intensity catalog once per process (read-only)."""
+    return load_yaml(STANDARD_INTENSITIES_PATH)
+
+
 def _use_label(use: str) -> str:
     return USE_LABELS_JA.get(use, use)
 
@@ -126,7 +136,7 @@ def evaluate_bei(request: BEIRequest) -> BEIResponse:
 def get_catalog_uses() -> CatalogUsesResponse:
     """Get available building use types from catalog."""
     try:
-        catalog = load_yaml("data/bei/standard_intensities.yaml")
+        catalog = load_standard_intensities()
         uses = list(catalog.get("uses", {}).keys()) if catalog.get("uses") else []
         return CatalogUsesResponse(uses=uses)
     except Exception as exc:
@@ -137,7 +147,7 @@ def get_catalog_uses() -> CatalogUsesResponse:
 def get_catalog_zones(use: str) -> CatalogZonesResponse:
     """Get available climate zones for a building use type."""
     try:
-        catalog = load_yaml("data/bei/standard_intensities.yaml")
+        catalog = load_standard_intensities()
         use_data = catalog.get("uses", {}).get(use, {})
         
         # Handle both structures: zones -> zone_id or direct zone_id
@@ -155,7 +165,7 @@ def get_catalog_zones(use: str) -> CatalogZonesResponse:
 def get_catalog_intensity(use: str, zone: str) -> CatalogIntensityResponse:
     """Get standard intensity data for specific use and zone."""
     try:
-        catalog = load_yaml("data/bei/standard_intensities.yaml")
+        catalog = load_standard_intensities()
         use_data = catalog.get("uses", {}).get(use, {})
         
         # Handle both structures
@@ -303,7 +313,7 @@ def validate_catalog(request: CatalogValidateRequest) -> CatalogValidateResponse
 def _get_standard_intensity(use: str, zone: str, notes: List[str]) -> StandardIntensity:
     """Get standard intensity for a specific use and zone."""
     try:
-        catalog = load_yaml("data/bei/standard_intensities.yaml")
+        catalog = load_standard_intensities()
         use_data = catalog.get("uses", {}).get(use, {})
         
         if not use_data:
@@ -1,7 +1,18 @@
 # backend/app/services/calculation.py
-from typing import Dict, Any
+import hashlib
+import json
+from typing import Dict, Any, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
 from app.schemas.calculation import CalculationInput, CalculationResult, EnvelopeResult, PrimaryEnergyResult
 
+INPUT_SECTIONS = ("building", "envelope", "systems")
+
+# 計算ロジック・基準値データ (building_standards, モデル建物の表) を変更したら上げる。
+# 入力ハッシュに含まれるため、上げると保存済みの結果は再利用されず全再計算になる。
+CALCULATION_VERSION = 1
+
 def get_climate_zone_standards(climate_zone: int) -> Dict[str, Any]:
     """地域区分による基準値取得（国土交通省告示準拠）"""
     from app.data.building_standards import ClimateZone, get_envelope_standard
@@ -118,23 +129,46 @@ def calculate_lighting_energy(lighting_system, floor_area: float) -> float:
     """照明エネルギー計算"""
     return lighting_system.power_density * floor_area * 24 * 365 * 3.6 / 1000000  # W/㎡ → MJ/年
 
-def perform_energy_calculation(input_data: CalculationInput) -> CalculationResult:
-    """建築物省エネ法に基づくエネルギー計算（モデル建物法対応）"""
+def input_hash(input_data: CalculationInput) -> str:
+    """CALCULATION_VERSION と正規化した入力 (キー順固定のJSON) の sha256。同一入力の再計算判定に使う。"""
+    canonical = json.dumps(
+        {"calculation_version": CALCULATION_VERSION, "input": input_data.model_dump(mode="json")},
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def headline_metrics(input_data: Optional[Dict[str, Any]], result_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """一覧表示用の代表値 (BEI・延床面積・適合判定) を入力/結果のJSONから取り出す。"""
+    input_data = input_data or {}
+    result_data = result_data or {}
+    primary = result_data.get("primary_energy_result") or {}
+    design = primary.get("total_energy_consumption")
+    standard = primary.get("standard_energy_consumption")
+    bei = round(design / standard, 2) if design is not None and standard else None
+    return {
+        "bei": bei,
+        "floor_area": (input_data.get("building") or {}).get("total_floor_area"),
+        "is_compliant": result_data.get("overall_compliance"),
+    }
+
+
+def calculate_envelope_section(input_data: CalculationInput) -> EnvelopeResult:
+    """外皮性能（envelope と地域区分に依存）"""
+    standards = get_climate_zone_standards(input_data.building.climate_zone)
+    return calculate_envelope_performance(input_data.envelope.parts, standards)
+
+
+def calculate_primary_energy_section(input_data: CalculationInput) -> PrimaryEnergyResult:
+    """一次エネルギー消費量（systems と建物情報に依存）"""
     from app.services.model_building import get_model_building_standards, calculate_actual_energy_consumption
-    
-    # 建物情報
+
     building_type = input_data.building.building_type
     total_floor_area = input_data.building.total_floor_area
     climate_zone = input_data.building.climate_zone
-    
-    # 地域区分による外皮基準値設定
-    standards = get_climate_zone_standards(climate_zone)
-    
-    print(f"計算開始: {building_type}, 床面積: {total_floor_area}㎡, 地域区分: {climate_zone}")
 
-    # 外皮性能計算
-    envelope_result = calculate_envelope_performance(input_data.envelope.parts, standards)
-    
     # モデル建物法による基準一次エネルギー消費量計算
     model_building_standards = get_model_building_standards(
         building_type, climate_zone, total_floor_area
@@ -151,8 +185,7 @@ def perform_energy_calculation(input_data: CalculationInput) -> CalculationResul
     energy_saving_rate = ((standard_energy - actual_total_energy) / standard_energy * 100) if standard_energy > 0 else 0
     is_energy_compliant = actual_total_energy <= standard_energy
     
-    # 結果作成
-    primary_energy_result = PrimaryEnergyResult(
+    return PrimaryEnergyResult(
         total_energy_consumption=round(actual_total_energy, 1),
         standard_energy_consumption=round(standard_energy, 1),
         energy_saving_rate=round(energy_saving_rate, 1),
@@ -160,8 +193,17 @@ def perform_energy_calculation(input_data: CalculationInput) -> CalculationResul
         energy_by_use={k: round(v, 1) for k, v in actual_energy["actual_energy_by_use"].items()},
         standard_energy_by_use=model_building_standards.get("standard_energy_by_use")
     )
-    
-    # 総合判定
+
+
+def build_calculation_result(
+    input_data: CalculationInput,
+    envelope_result: EnvelopeResult,
+    primary_energy_result: PrimaryEnergyResult,
+) -> CalculationResult:
+    """総合判定とメッセージを組み立てる"""
+    standards = get_climate_zone_standards(input_data.building.climate_zone)
+    energy_saving_rate = primary_energy_result.energy_saving_rate
+
     overall_compliance = (
         envelope_result.is_ua_compliant and 
         envelope_result.is_eta_a_compliant and 
@@ -182,11 +224,69 @@ def perform_energy_calculation(input_data: CalculationInput) -> CalculationResul
     else:
         message = f"省エネ基準不適合: {', '.join(message_parts)}"
     
-    print(f"計算完了: {message}")
-    
     return CalculationResult(
         envelope_result=envelope_result,
         primary_energy_result=primary_energy_result,
         overall_compliance=overall_compliance,
         message=message,
     )
+
+
+def perform_energy_calculation(input_data: CalculationInput) -> CalculationResult:
+    """建築物省エネ法に基づくエネルギー計算（モデル建物法対応）"""
+    building = input_data.building
+    print(f"計算開始: {building.building_type}, 床面積: {building.total_floor_area}㎡, 地域区分: {building.climate_zone}")
+
+    result = build_calculation_result(
+        input_data,
+        calculate_envelope_section(input_data),
+        calculate_primary_energy_section(input_data),
+    )
+    print(f"計算完了: {result.message}")
+    return result
+
+
+def changed_sections(input_data: CalculationInput, previous_input: Optional[Dict[str, Any]]) -> Set[str]:
+    """前回入力から変わったセクション (building / envelope / systems)"""
+    if not previous_input:
+        return set(INPUT_SECTIONS)
+    try:
+        previous = CalculationInput(**previous_input).model_dump(mode="json")
+    except (TypeError, ValidationError):
+        return set(INPUT_SECTIONS)
+    current = input_data.model_dump(mode="json")
+    return {section for section in INPUT_SECTIONS if current[section] != previous[section]}
+
+
+def recalculate_energy(
+    input_data: CalculationInput,
+    previous_input: Optional[Dict[str, Any]] = None,
+    previous_result: Optional[Dict[str, Any]] = None,
+    previous_version: Optional[int] = None,
+) -> Tuple[CalculationResult, Set[str]]:
+    """変更のあったセクションだけ再計算する。戻り値は (結果, 再計算したセクション)。
+
+    建物情報が変わった場合は外皮・一次エネとも基準値が変わるため全再計算。
+    外皮のみ / 設備のみの変更では、もう一方は前回結果を再利用する。
+    前回結果が別の CALCULATION_VERSION で計算されている場合は再利用しない。
+    """
+    changed = changed_sections(input_data, previous_input)
+    previous = None
+    if previous_result and previous_version == CALCULATION_VERSION and "building" not in changed:
+        try:
+            previous = CalculationResult(**previous_result)
+        except (TypeError, ValidationError):
+            previous = None
+    if previous is None:
+        return perform_energy_calculation(input_data), {"envelope", "primary_energy"}
+
+    recomputed: Set[str] = set()
+    envelope_result = previous.envelope_result
+    primary_energy_result = previous.primary_energy_result
+    if "envelope" in changed:
+        envelope_result = calculate_envelope_section(input_data)
+        recomputed.add("envelope")
+    if "systems" in changed:
+        primary_energy_result = calculate_primary_energy_section(input_data)
+        recomputed.add("primary_energy")
+    return build_calculation_result(input_data, envelope_result, primary_energy_result), recomputed
@@ -4,12 +4,12 @@ from __future__ import annotations
 
 import logging
 import os
-import smtplib
-from dataclasses import dataclass
-from email.mime.text import MIMEText
-from typing import Optional
+
+from sqlalchemy.orm import Session
 
 from app.models.contact_inquiry import ContactInquiry
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import enqueue_email, register_delivery_hook
 
 logger = logging.getLogger(__name__)
 
@@ -28,51 +28,12 @@ def contact_public_email() -> str:
     return os.getenv("CONTACT_PUBLIC_EMAIL", "").strip() or contact_notify_email()
 
 
-def _smtp_user() -> str:
-    return os.getenv("GMAIL_USER", "").strip()
-
-
-def _smtp_password() -> str:
-    return os.getenv("GMAIL_APP_PASSWORD", "").strip()
-
-
-def _send_plain_text_email(
-    *,
-    to_email: str,
-    subject: str,
-    body: str,
-    reply_to: Optional[str] = None,
-) -> None:
-    smtp_user = _smtp_user()
-    smtp_password = _smtp_password()
-    if not smtp_user or not smtp_password:
-        raise RuntimeError("SMTP credentials are not configured.")
-
-    msg = MIMEText(body, "plain", "utf-8")
-    msg["Subject"] = subject
-    msg["From"] = smtp_user
-    msg["To"] = to_email
-    if reply_to:
-        msg["Reply-To"] = reply_to
-
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-
+CONTACT_NOTIFICATION = "contact_notification"
+CONTACT_AUTO_REPLY = "contact_auto_reply"
 
-@dataclass
-class ContactDeliveryResult:
-    notification_sent: bool
-    auto_reply_sent: bool
-    notification_error: Optional[str] = None
-    auto_reply_error: Optional[str] = None
-
-
-def send_contact_messages(inquiry: ContactInquiry) -> ContactDeliveryResult:
-    """Send notification to support and auto-reply to the sender when possible."""
-    notify_error: Optional[str] = None
-    auto_reply_error: Optional[str] = None
 
+def queue_contact_messages(db: Session, inquiry: ContactInquiry) -> None:
+    """Queue the support notification and the auto-reply (caller commits)."""
     support_email = contact_notify_email()
     public_email = contact_public_email()
 
@@ -92,20 +53,16 @@ def send_contact_messages(inquiry: ContactInquiry) -> ContactDeliveryResult:
         ]
     )
 
-    notification_sent = False
-    try:
-        _send_plain_text_email(
-            to_email=support_email,
-            subject=notification_subject,
-            body=notification_body,
-            reply_to=inquiry.email,
-        )
-        notification_sent = True
-    except Exception as exc:  # pragma: no cover - defensive logging only
-        notify_error = str(exc)
-        logger.exception("Failed to send contact notification: %s", exc)
-
-    auto_reply_sent = False
+    enqueue_email(
+        db,
+        kind=CONTACT_NOTIFICATION,
+        reference_id=inquiry.id,
+        to_email=support_email,
+        subject=notification_subject,
+        body=notification_body,
+        reply_to=inquiry.email,
+    )
+
     auto_reply_subject = "お問い合わせを受け付けました | 楽々省エネ計算"
     auto_reply_body = "\n".join(
         [
@@ -121,21 +78,30 @@ def send_contact_messages(inquiry: ContactInquiry) -> ContactDeliveryResult:
         ]
     )
 
-    try:
-        _send_plain_text_email(
-            to_email=inquiry.email,
-            subject=auto_reply_subject,
-            body=auto_reply_body,
-            reply_to=public_email,
-        )
-        auto_reply_sent = True
-    except Exception as exc:  # pragma: no cover - defensive logging only
-        auto_reply_error = str(exc)
-        logger.exception("Failed to send contact auto-reply: %s", exc)
-
-    return ContactDeliveryResult(
-        notification_sent=notification_sent,
-        auto_reply_sent=auto_reply_sent,
-        notification_error=notify_error,
-        auto_reply_error=auto_reply_error,
+    enqueue_email(
+        db,
+        kind=CONTACT_AUTO_REPLY,
+        reference_id=inquiry.id,
+        to_email=inquiry.email,
+        subject=auto_reply_subject,
+        body=auto_reply_body,
+        reply_to=public_email,
     )
+
+
+def _record_contact_delivery(db: Session, message: EmailOutbox) -> None:
+    """Reflect the outcome of a contact email on its inquiry."""
+    inquiry = db.get(ContactInquiry, message.reference_id) if message.reference_id else None
+    if inquiry is None:
+        return
+    if message.status == "sent":
+        if message.kind == CONTACT_NOTIFICATION:
+            inquiry.status = "notified"
+            inquiry.notification_sent_at = message.sent_at
+        return
+    errors = [error for error in (inquiry.notification_error, message.last_error) if error]
+    inquiry.notification_error = " | ".join(errors)
+
+
+register_delivery_hook(CONTACT_NOTIFICATION, _record_contact_delivery)
+register_delivery_hook(CONTACT_AUTO_REPLY, _record_contact_delivery)
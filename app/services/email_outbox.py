@@ -0,0 +1,291 @@
+"""Email outbox: queue messages in the database, deliver them in the background.
+
+Request handlers call ``enqueue_email`` inside their own transaction and return
+as soon as it commits. The sender claims due rows in batches, delivers each
+batch over one authenticated SMTP connection and retries failures with
+exponential backoff. Rows are claimed with a conditional UPDATE, so several
+workers can run senders without delivering a message twice.
+
+Deliveries wait (rows stay pending) while SMTP credentials are not configured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import smtplib
+from datetime import datetime, timedelta, timezone
+from email.mime.text import MIMEText
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+CLAIMABLE_STATUSES = ("pending", "failed")
+RETRY_BACKOFF_SECONDS = 60.0
+MAX_RETRY_DELAY_SECONDS = 3600.0
+SENDING_LEASE_SECONDS = 300.0
+
+SessionFactory = Callable[[], Session]
+SmtpConnect = Callable[[], smtplib.SMTP]
+DeliveryHook = Callable[[Session, EmailOutbox], None]
+
+_delivery_hooks: Dict[str, DeliveryHook] = {}
+
+
+def _default_session_factory() -> Session:
+    from app.db.session import SessionLocal
+
+    return SessionLocal()
+
+
+def smtp_user() -> str:
+    return os.getenv("GMAIL_USER", "").strip()
+
+
+def smtp_password() -> str:
+    return os.getenv("GMAIL_APP_PASSWORD", "").strip()
+
+
+def smtp_configured() -> bool:
+    return bool(smtp_user() and smtp_password())
+
+
+def _smtp_connect() -> smtplib.SMTP:
+    """Open and authenticate one SMTP connection (Gmail over SSL by default)."""
+    host = os.getenv("SMTP_HOST", "").strip() or "smtp.gmail.com"
+    port = int(os.getenv("SMTP_PORT", "").strip() or 465)
+    server = smtplib.SMTP_SSL(host, port, timeout=30)
+    try:
+        server.login(smtp_user(), smtp_password())
+    except Exception:
+        server.close()
+        raise
+    return server
+
+
+def register_delivery_hook(kind: str, hook: DeliveryHook) -> None:
+    """Call *hook* when a message of *kind* is sent or given up (same transaction)."""
+    _delivery_hooks[kind] = hook
+
+
+def enqueue_email(
+    db: Session,
+    *,
+    kind: str,
+    to_email: str,
+    subject: str,
+    body: str,
+    reply_to: Optional[str] = None,
+    reference_id: Optional[int] = None,
+) -> EmailOutbox:
+    """Add a message to the outbox; it is sent after the caller commits."""
+    row = EmailOutbox(
+        kind=kind,
+        reference_id=reference_id,
+        to_email=to_email,
+        reply_to=reply_to,
+        subject=subject,
+        body=body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(row)
+    return row
+
+
+def _due_filter(now: datetime):
+    stale = now - timedelta(seconds=SENDING_LEASE_SECONDS)
+    return or_(
+        and_(EmailOutbox.status.in_(CLAIMABLE_STATUSES), EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == "sending", EmailOutbox.locked_at < stale),
+    )
+
+
+def claim_due_emails(db: Session, limit: int) -> List[EmailOutbox]:
+    """Move up to *limit* due rows to "sending" and return the ones this caller won."""
+    now = datetime.now(timezone.utc)
+    candidate_ids = list(
+        db.scalars(select(EmailOutbox.id).where(_due_filter(now)).order_by(EmailOutbox.id).limit(limit))
+    )
+    claimed: List[int] = []
+    for row_id in candidate_ids:
+        result = db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == row_id)
+            .where(_due_filter(now))
+            .values(status="sending", locked_at=now, attempts=EmailOutbox.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            claimed.append(row_id)
+    db.commit()
+    if not claimed:
+        return []
+    return list(
+        db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.id.in_(claimed))
+            .order_by(EmailOutbox.id)
+            .execution_options(populate_existing=True)
+        )
+    )
+
+
+def _build_message(row: EmailOutbox, sender: str) -> MIMEText:
+    msg = MIMEText(row.body, "plain", "utf-8")
+    msg["Subject"] = row.subject
+    msg["From"] = sender
+    msg["To"] = row.to_email
+    if row.reply_to:
+        msg["Reply-To"] = row.reply_to
+    return msg
+
+
+def _send_all(rows: List[EmailOutbox], connect: SmtpConnect) -> Dict[int, Optional[str]]:
+    """Send *rows* over one connection; returns {row id: error or None}."""
+    try:
+        server = connect()
+    except Exception as exc:
+        logger.warning("SMTP connection failed: %s", exc)
+        return {row.id: f"{type(exc).__name__}: {exc}" for row in rows}
+
+    errors: Dict[int, Optional[str]] = {}
+    try:
+        for index, row in enumerate(rows):
+            try:
+                server.send_message(_build_message(row, smtp_user()))
+                errors[row.id] = None
+            except smtplib.SMTPServerDisconnected as exc:
+                # The rest of the batch cannot go out on this connection.
+                for pending in rows[index:]:
+                    errors[pending.id] = f"{type(exc).__name__}: {exc}"
+                break
+            except Exception as exc:
+                errors[row.id] = f"{type(exc).__name__}: {exc}"
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+    return errors
+
+
+def deliver_due_emails(
+    session_factory: SessionFactory = _default_session_factory,
+    connect: SmtpConnect = _smtp_connect,
+    *,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """Claim and deliver one batch. Returns counts of sent/failed/dead messages."""
+    stats = {"sent": 0, "failed": 0, "dead": 0}
+    if not smtp_configured():
+        return stats
+
+    db = session_factory()
+    try:
+        rows = claim_due_emails(db, limit or settings.EMAIL_OUTBOX_BATCH_SIZE)
+        if not rows:
+            return stats
+        errors = _send_all(rows, connect)
+
+        now = datetime.now(timezone.utc)
+        for row in rows:
+            error = errors.get(row.id, "not attempted")
+            row.locked_at = None
+            if error is None:
+                row.status, row.sent_at, row.last_error = "sent", now, None
+            else:
+                row.last_error = error
+                if row.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    row.status = "dead"
+                    logger.error("Giving up on email %s (%s) after %d attempts: %s", row.id, row.kind, row.attempts, error)
+                else:
+                    row.status = "failed"
+                    delay = min(RETRY_BACKOFF_SECONDS * 2 ** (row.attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                    row.next_attempt_at = now + timedelta(seconds=delay)
+            stats[row.status] += 1
+            hook = _delivery_hooks.get(row.kind)
+            if hook is not None and row.status in ("sent", "dead"):
+                hook(db, row)
+        db.commit()
+        return stats
+    finally:
+        db.close()
+
+
+class EmailSender:
+    """Per-worker background sender; woken by new messages, otherwise polls."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory = _default_session_factory,
+        connect: SmtpConnect = _smtp_connect,
+        *,
+        poll_seconds: float = settings.EMAIL_OUTBOX_POLL_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory
+        self._connect = connect
+        self.poll_seconds = poll_seconds
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"sent": 0, "failed": 0, "dead": 0}
+
+    def start(self) -> None:
+        """Start the sender on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(), name="email-outbox-sender")
+
+    async def stop(self) -> None:
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self) -> None:
+        """Wake the sender after committing new outbox rows."""
+        if self._wakeup is not None and self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def flush(self) -> Dict[str, int]:
+        """Deliver batches until no due message is left."""
+        total = {"sent": 0, "failed": 0, "dead": 0}
+        while True:
+            stats = await asyncio.to_thread(deliver_due_emails, self._session_factory, self._connect)
+            for key, value in stats.items():
+                total[key] += value
+                self.stats[key] += value
+            if sum(stats.values()) < settings.EMAIL_OUTBOX_BATCH_SIZE:
+                return total
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Email outbox delivery failed")
+
+
+email_sender = EmailSender()
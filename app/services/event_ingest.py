@@ -0,0 +1,167 @@
+"""Buffered ingestion of product events.
+
+Request handlers enqueue events into a bounded in-memory queue; a background
+task writes them to ``product_events`` in multi-row INSERTs once a batch is
+full or the flush interval has passed. When the queue is full, callers wait
+up to ``enqueue_timeout`` for space and then get IngestQueueFull (503).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.models.product_event import ProductEvent
+
+logger = logging.getLogger(__name__)
+
+EventRow = Dict[str, Any]
+BatchWriter = Callable[[List[EventRow]], Awaitable[None]]
+
+WRITE_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.1
+_STOP = object()
+
+
+class IngestQueueFull(Exception):
+    """The event queue stayed full for the whole enqueue timeout."""
+
+
+async def write_product_events(rows: List[EventRow]) -> None:
+    """Insert *rows* into product_events in one executemany round trip.
+
+    The daily rollups are updated in the same transaction, and the overview
+    counters once it has committed.
+    """
+    from app.db.session import AsyncSessionLocal
+    from app.services.analytics_counters import overview_counters
+    from app.services.analytics_rollup import apply_rollups
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(ProductEvent), rows)
+        await apply_rollups(db, rows)
+        await db.commit()
+    overview_counters.record_events(rows)
+
+
+class EventBuffer:
+    def __init__(
+        self,
+        writer: BatchWriter = write_product_events,
+        *,
+        max_size: int = settings.EVENT_QUEUE_MAX_SIZE,
+        batch_size: int = settings.EVENT_BATCH_SIZE,
+        flush_seconds: float = settings.EVENT_FLUSH_SECONDS,
+        enqueue_timeout: float = settings.EVENT_ENQUEUE_TIMEOUT_SECONDS,
+    ) -> None:
+        self._writer = writer
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"accepted": 0, "rejected": 0, "written": 0, "batches": 0, "dropped": 0}
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the flusher on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._task = loop.create_task(self._run(), name="event-buffer-flusher")
+
+    async def stop(self) -> None:
+        """Flush everything queued so far and stop the flusher."""
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        assert self._queue is not None
+        if not self._task.done():
+            await self._queue.put(_STOP)
+            await self._task
+        self._task = None
+        await self._drain()
+
+    # -- producer side -----------------------------------------------------
+
+    async def submit(self, row: EventRow) -> None:
+        """Queue one event; microseconds unless the queue is full."""
+        self.start()
+        assert self._queue is not None
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(row), timeout=self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.stats["rejected"] += 1
+                raise IngestQueueFull(f"event queue full ({self.max_size})") from None
+        self.stats["accepted"] += 1
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    # -- consumer side -----------------------------------------------------
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _drain(self) -> None:
+        if self._queue is None:
+            return
+        while not self._queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[EventRow]) -> None:
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                await self._writer(batch)
+            except Exception:
+                logger.exception(
+                    "Product event flush failed (attempt %d/%d, %d events)", attempt, WRITE_RETRIES, len(batch)
+                )
+                if attempt < WRITE_RETRIES:
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+                continue
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+            return
+        self.stats["dropped"] += len(batch)
+
+
+product_event_buffer = EventBuffer()
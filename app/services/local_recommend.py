@@ -0,0 +1,217 @@
+"""Deterministic product recommendations computed locally (no LLM round trip).
+
+Each candidate from the product index gets an estimated BEI change:
+
+    ΔBEI ≈ -BEI × Σ share(end use) × saving(end use)
+
+``share`` is the end use's fraction of the standard primary energy for the
+building use, after the zone correction (STANDARD_ENERGY_CONSUMPTION ×
+REGIONAL_CORRECTION_FACTORS). ``saving`` is the relative reduction that the
+product's spec achieves against a reference product. The best product per
+category is returned in the same shape as the AI tier. Candidates come from the
+same catalog as /products: imported DB rows, or the YAML files for categories
+that have not been imported.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from app.data.compliance.building_standards import (
+    REGIONAL_CORRECTION_FACTORS,
+    STANDARD_ENERGY_CONSUMPTION,
+    BuildingType,
+    ClimateZone,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.product_index import ProductIndex, get_product_index, get_product_index_async
+
+DEFAULT_CATEGORIES = ["windows", "insulation", "hvac", "lighting"]
+
+# End uses counted in BEI (その他/コンセント is excluded by the model building method).
+BEI_END_USES = ("heating", "cooling", "ventilation", "hot_water", "lighting", "elevator")
+
+# Reference products the savings are measured against (typical existing spec).
+REFERENCE_SPECS = {
+    "windows": {"u_value": 4.65, "eta_c": 0.60},  # アルミサッシ + 単板ガラス
+    "insulation": {"lambda_value": 0.045},  # グラスウール 10K 相当
+    "hvac": {"apf": 4.0},
+    "lighting": {"lm_per_w": 100.0},  # Hf 蛍光灯相当
+}
+
+# Upper bound of the heating/cooling load attributable to each envelope element.
+WINDOW_LOAD_SHARE = 0.30
+INSULATION_LOAD_SHARE = 0.20
+
+# Partner products win ties and near-ties by this much BEI.
+PARTNER_BONUS = 0.005
+
+END_USE_LABELS = {"heating": "暖房", "cooling": "冷房", "lighting": "照明"}
+
+
+def end_use_shares(zone: int, use: str) -> Dict[str, float]:
+    """Zone-corrected share of each BEI end use in the standard primary energy."""
+    try:
+        building_type = BuildingType(use)
+    except ValueError:
+        building_type = BuildingType.OFFICE
+    base = dict(STANDARD_ENERGY_CONSUMPTION.get(building_type, STANDARD_ENERGY_CONSUMPTION[BuildingType.OFFICE]))
+    correction = REGIONAL_CORRECTION_FACTORS[ClimateZone(zone)]
+    base["heating"] *= correction["heating"]
+    base["cooling"] *= correction["cooling"]
+    total = sum(base.get(key, 0.0) for key in BEI_END_USES)
+    return {key: base.get(key, 0.0) / total for key in BEI_END_USES}
+
+
+def _ratio_saving(reference: float, value: Any, *, higher_is_better: bool) -> Optional[float]:
+    if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+        return None
+    saving = 1 - (reference / value if higher_is_better else value / reference)
+    return max(0.0, saving)
+
+
+def _window_savings(product: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    ref = REFERENCE_SPECS["windows"]
+    heating = _ratio_saving(ref["u_value"], product.get("u_value"), higher_is_better=False)
+    cooling = _ratio_saving(ref["eta_c"], product.get("eta_c"), higher_is_better=False)
+    if heating is None and cooling is None:
+        return None
+    return {"heating": (heating or 0.0) * WINDOW_LOAD_SHARE, "cooling": (cooling or 0.0) * WINDOW_LOAD_SHARE}
+
+
+def _insulation_savings(product: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    reference = REFERENCE_SPECS["insulation"]["lambda_value"]
+    saving = _ratio_saving(reference, product.get("lambda_value"), higher_is_better=False)
+    if saving is None:
+        return None
+    # Insulation mostly reduces heating load; cooling benefits far less.
+    return {"heating": saving * INSULATION_LOAD_SHARE, "cooling": saving * INSULATION_LOAD_SHARE * 0.3}
+
+
+def _hvac_savings(product: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    saving = _ratio_saving(REFERENCE_SPECS["hvac"]["apf"], product.get("apf"), higher_is_better=True)
+    if saving is None:
+        return None
+    return {"heating": saving, "cooling": saving}
+
+
+def _lighting_savings(product: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    saving = _ratio_saving(REFERENCE_SPECS["lighting"]["lm_per_w"], product.get("lm_per_w"), higher_is_better=True)
+    if saving is None:
+        return None
+    return {"lighting": saving}
+
+
+SAVINGS_MODELS: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, float]]]] = {
+    "windows": _window_savings,
+    "insulation": _insulation_savings,
+    "hvac": _hvac_savings,
+    "lighting": _lighting_savings,
+}
+
+
+def _reason(category: str, product: Dict[str, Any], savings: Dict[str, float], shares: Dict[str, float]) -> str:
+    main_use = max(savings, key=lambda key: savings[key] * shares[key])
+    label = END_USE_LABELS.get(main_use, main_use)
+    spec = {
+        "windows": f"U値{product.get('u_value', '?')}・ηc{product.get('eta_c', '?')}",
+        "insulation": f"熱伝導率{product.get('lambda_value', '?')}",
+        "hvac": f"APF{product.get('apf', '?')}",
+        "lighting": f"{product.get('lm_per_w', '?')}lm/W",
+    }[category]
+    return (
+        f"{label}は基準一次エネルギーの約{shares[main_use]:.0%}を占めます。"
+        f"{spec}により{label}エネルギーを約{savings[main_use]:.0%}削減できる見込みです。"
+    )
+
+
+def rank_category(
+    category: str,
+    *,
+    zone: int,
+    use: str,
+    current_bei: Optional[float] = None,
+    limit: int = 3,
+    index: Optional[ProductIndex] = None,
+) -> List[Dict[str, Any]]:
+    """Best *limit* products of *category* for the building, most BEI reduction first.
+
+    *index* defaults to the YAML catalog index.
+    """
+    model = SAVINGS_MODELS.get(category)
+    if model is None:
+        return []
+    if index is None:
+        index = get_product_index(category)
+    shares = end_use_shares(zone, use)
+    bei = current_bei if current_bei is not None and current_bei > 0 else 1.0
+
+    scored = []
+    for position, product in enumerate(index.filter(zone=zone, use=use)):
+        savings = model(product)
+        if not savings:
+            continue
+        impact = -bei * sum(shares[key] * value for key, value in savings.items())
+        if impact >= 0:
+            continue
+        score = impact - (PARTNER_BONUS if product.get("partner") else 0.0)
+        scored.append((score, position, product, savings, impact))
+    scored.sort(key=lambda item: (item[0], item[1]))
+
+    return [
+        {
+            "category": category,
+            "product_id": product["id"],
+            "reason": _reason(category, product, savings, shares),
+            "estimated_bei_impact": round(impact, 3),
+            "product": product,
+            "source": "local",
+        }
+        for _, _, product, savings, impact in scored[:limit]
+    ]
+
+
+def get_local_recommendations(
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+    indexes: Optional[Dict[str, ProductIndex]] = None,
+) -> List[Dict[str, Any]]:
+    """One recommendation per category, same shape as get_ai_recommendations.
+
+    ``floor_area`` is accepted for parity with the AI tier; shares are per m2,
+    so it does not change the ranking. *indexes* maps category to the product
+    index to rank (YAML catalog for categories not given).
+    """
+    results = []
+    for category in categories or DEFAULT_CATEGORIES:
+        index = (indexes or {}).get(category)
+        ranked = rank_category(category, zone=zone, use=use, current_bei=current_bei, limit=1, index=index)
+        results.extend(ranked)
+    return results
+
+
+async def get_local_recommendations_async(
+    db: AsyncSession,
+    *,
+    zone: int,
+    use: str,
+    floor_area: float,
+    current_bei: Optional[float] = None,
+    categories: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """get_local_recommendations over the DB catalog (YAML for categories not imported)."""
+    categories = categories or DEFAULT_CATEGORIES
+    indexes = {category: await get_product_index_async(category, db) for category in categories}
+    return get_local_recommendations(
+        zone=zone,
+        use=use,
+        floor_area=floor_area,
+        current_bei=current_bei,
+        categories=categories,
+        indexes=indexes,
+    )
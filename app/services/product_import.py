@@ -2,16 +2,25 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 import yaml
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.models.product import Product
+from app.services.product_index import invalidate_product_index
+from app.services.products import PRODUCT_CATEGORIES
 
 logger = logging.getLogger(__name__)
 PRODUCTS_DIR = Path(__file__).resolve().parents[2] / "data" / "products"
+DEFAULT_BATCH_SIZE = 500
 
 SPEC_FIELDS = {
     "windows": ["window_type", "frame_type", "glass_type", "u_value", "eta_c", "eta_h", "source"],
@@ -21,65 +30,191 @@ SPEC_FIELDS = {
     "solar": ["cell_type", "capacity_kw", "efficiency_percent", "panel_area_m2", "source"],
 }
 
+# Spec fields holding a single number; only these can be range-filtered.
+NUMERIC_SPEC_FIELDS = {
+    "windows": ("u_value", "eta_c", "eta_h"),
+    "insulation": ("lambda_value",),
+    "hvac": ("capacity_kw", "apf", "cop_cooling", "cop_heating"),
+    "lighting": ("lm_per_w", "wattage"),
+    "solar": ("capacity_kw", "efficiency_percent", "panel_area_m2"),
+}
 
-def import_category(db: Session, category: str) -> int:
-    """Import all products from a YAML category file. Returns count imported."""
+# Columns written by the importer; also the input of the content hash.
+CONTENT_FIELDS = (
+    "category",
+    "manufacturer",
+    "series",
+    "name",
+    "partner",
+    "catalog_url",
+    "specs",
+    "recommended_zones",
+    "recommended_uses",
+    "source",
+)
+
+
+@dataclass
+class ImportStats:
+    category: str
+    total: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    elapsed_s: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.total / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "category": self.category,
+            "total": self.total,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "skipped": self.skipped,
+            "elapsed_s": round(self.elapsed_s, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+        }
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """Stable hash of the importer-owned columns of a product row."""
+    payload = {field: row.get(field) for field in CONTENT_FIELDS}
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _row_from_item(
+    category: str,
+    item: Dict[str, Any],
+    spec_keys: List[str],
+    existing: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    # Missing manufacturer/series/name keep the stored value, as the per-row importer did.
+    existing = existing or {}
+    return {
+        "product_id": item["id"],
+        "category": category,
+        "manufacturer": item.get("manufacturer", existing.get("manufacturer", "")),
+        "series": item.get("series", existing.get("series", "")),
+        "name": item.get("name", existing.get("name", "")),
+        "partner": item.get("partner", False),
+        "catalog_url": item.get("catalog_url"),
+        "specs": {k: item[k] for k in spec_keys if k in item},
+        "recommended_zones": item.get("recommended_zones"),
+        "recommended_uses": item.get("recommended_uses"),
+        "source": f"data/products/{category}.yaml",
+    }
+
+
+def _fetch_existing(db: Session, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    columns = [Product.product_id] + [getattr(Product, field) for field in CONTENT_FIELDS]
+    result = db.execute(select(*columns).where(Product.product_id.in_(product_ids)))
+    return {row.product_id: dict(row._mapping) for row in result}
+
+
+def _upsert_rows(db: Session, rows: List[Dict[str, Any]], existing_ids: set) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(Product).values(rows)
+        update_columns = {field: stmt.excluded[field] for field in CONTENT_FIELDS}
+        update_columns["updated_at"] = func.now()
+        db.execute(stmt.on_conflict_do_update(index_elements=["product_id"], set_=update_columns))
+        return
+
+    # Other dialects: split on the prefetched ids and use executemany paths.
+    new_rows = [row for row in rows if row["product_id"] not in existing_ids]
+    if new_rows:
+        db.execute(Product.__table__.insert(), new_rows)
+    for row in rows:
+        if row["product_id"] in existing_ids:
+            values = {field: row[field] for field in CONTENT_FIELDS}
+            db.execute(
+                Product.__table__.update()
+                .where(Product.product_id == row["product_id"])
+                .values(**values, updated_at=func.now())
+            )
+
+
+def bulk_import_category(
+    db: Session,
+    category: str,
+    *,
+    incremental: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ImportStats:
+    """Upsert a YAML category in batches.
+
+    Each batch costs one SELECT for the existing rows and one
+    ``INSERT ... ON CONFLICT DO UPDATE``. With ``incremental=True`` rows whose
+    content hash matches the stored row are skipped entirely.
+    """
+    stats = ImportStats(category=category)
     path = PRODUCTS_DIR / f"{category}.yaml"
     if not path.exists():
         logger.warning("Product file not found: %s", path)
-        return 0
+        return stats
 
+    started = time.perf_counter()
     with open(path, "r", encoding="utf-8") as f:
         items = yaml.safe_load(f) or []
 
-    count = 0
-    spec_keys = SPEC_FIELDS.get(category, [])
-
+    # Later duplicates win, matching the sequential update behaviour.
+    by_id: Dict[str, Dict[str, Any]] = {}
     for item in items:
-        product_id = item.get("id")
-        if not product_id:
-            continue
-
-        existing = db.query(Product).filter(Product.product_id == product_id).first()
-        specs = {k: item[k] for k in spec_keys if k in item}
-
-        if existing:
-            existing.category = category
-            existing.manufacturer = item.get("manufacturer", existing.manufacturer)
-            existing.series = item.get("series", existing.series)
-            existing.name = item.get("name", existing.name)
-            existing.specs = specs
-            existing.partner = item.get("partner", False)
-            existing.catalog_url = item.get("catalog_url")
-            existing.recommended_zones = item.get("recommended_zones")
-            existing.recommended_uses = item.get("recommended_uses")
-            existing.source = f"data/products/{category}.yaml"
-        else:
-            product = Product(
-                product_id=product_id,
-                category=category,
-                manufacturer=item.get("manufacturer", ""),
-                series=item.get("series", ""),
-                name=item.get("name", ""),
-                partner=item.get("partner", False),
-                catalog_url=item.get("catalog_url"),
-                specs=specs,
-                recommended_zones=item.get("recommended_zones"),
-                recommended_uses=item.get("recommended_uses"),
-                source=f"data/products/{category}.yaml",
-            )
-            db.add(product)
+        if item.get("id"):
+            by_id[item["id"]] = item
+            stats.total += 1
 
-        count += 1
+    spec_keys = SPEC_FIELDS.get(category, [])
+    product_ids = list(by_id)
+    for start in range(0, len(product_ids), batch_size):
+        batch_ids = product_ids[start : start + batch_size]
+        existing = _fetch_existing(db, batch_ids)
+        rows = []
+        for product_id in batch_ids:
+            current = existing.get(product_id)
+            row = _row_from_item(category, by_id[product_id], spec_keys, current)
+            if current is None:
+                stats.inserted += 1
+            elif incremental and content_hash(row) == content_hash(current):
+                stats.skipped += 1
+                continue
+            else:
+                stats.updated += 1
+            rows.append(row)
+        if rows:
+            _upsert_rows(db, rows, set(existing))
 
     db.commit()
-    logger.info("Imported %d products for category '%s'", count, category)
-    return count
+    invalidate_product_index(category)
+    stats.elapsed_s = time.perf_counter() - started
+    logger.info(
+        "Imported %d products for category '%s' (inserted=%d updated=%d skipped=%d, %.0f rows/s)",
+        stats.total,
+        category,
+        stats.inserted,
+        stats.updated,
+        stats.skipped,
+        stats.rows_per_sec,
+    )
+    return stats
+
+
+def import_category(db: Session, category: str) -> int:
+    """Import all products from a YAML category file. Returns count imported."""
+    return bulk_import_category(db, category).total
 
 
 def import_all(db: Session) -> dict:
     """Import all product categories."""
     results = {}
-    for category in ["windows", "insulation", "hvac", "lighting", "solar"]:
+    for category in PRODUCT_CATEGORIES:
         results[category] = import_category(db, category)
     return results
@@ -0,0 +1,239 @@
+"""In-memory product index with zone/use bitsets and numeric spec columns.
+
+Each category is loaded once (DB or YAML), presorted partner-first and
+encoded as bitsets: bit ``i`` of a mask refers to ``products[i]``. A zone/use
+query is then a couple of integer ANDs and a walk over the set bits, which
+already come out in presorted order.
+
+Numeric spec fields (``NUMERIC_SPEC_FIELDS`` in product_import) are stored column-wise
+as sorted value arrays with prefix masks, so a range predicate is two
+bisections plus one XOR, and several predicates intersect with AND.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+if TYPE_CHECKING:
+    from app.services.product_query import SpecFilter
+
+INDEX_TTL_SECONDS = 300.0
+
+_lock = threading.Lock()
+_indexes: Dict[Tuple[str, str], "ProductIndex"] = {}
+_catalog_generation = 0
+
+
+class UnsearchableSpecFieldError(LookupError):
+    """A spec field that is unknown or not numeric for the category."""
+
+
+def _iter_bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@dataclass(frozen=True)
+class SpecColumn:
+    """Sorted values of one numeric spec field.
+
+    ``prefix_masks[k]`` is the OR of the bits of the first ``k`` sorted
+    entries, so the rows in sorted slice ``[lo, hi)`` are
+    ``prefix_masks[hi] ^ prefix_masks[lo]``.
+    """
+
+    values: Tuple[float, ...]
+    prefix_masks: Tuple[int, ...]
+
+    @classmethod
+    def build(cls, entries: List[Tuple[float, int]]) -> "SpecColumn":
+        entries.sort()
+        prefix = [0]
+        for _, position in entries:
+            prefix.append(prefix[-1] | (1 << position))
+        return cls(values=tuple(value for value, _ in entries), prefix_masks=tuple(prefix))
+
+    def range_mask(self, op: str, value: float) -> int:
+        values = self.values
+        if op == "lt":
+            lo, hi = 0, bisect_left(values, value)
+        elif op == "lte":
+            lo, hi = 0, bisect_right(values, value)
+        elif op == "gt":
+            lo, hi = bisect_right(values, value), len(values)
+        elif op == "gte":
+            lo, hi = bisect_left(values, value), len(values)
+        elif op == "eq":
+            lo, hi = bisect_left(values, value), bisect_right(values, value)
+        else:
+            raise ValueError(f"unsupported operator: {op}")
+        return self.prefix_masks[hi] ^ self.prefix_masks[lo]
+
+
+@dataclass(frozen=True)
+class ProductIndex:
+    category: str
+    products: Tuple[Dict[str, Any], ...]
+    all_mask: int
+    zone_masks: Dict[int, int]
+    use_masks: Dict[str, int]
+    # Products with no zone/use restriction match every zone/use.
+    any_zone_mask: int
+    any_use_mask: int
+    spec_columns: Dict[str, SpecColumn]
+    built_at: float
+
+    @classmethod
+    def build(cls, category: str, products: List[Dict[str, Any]]) -> "ProductIndex":
+        from app.services.product_import import NUMERIC_SPEC_FIELDS
+
+        ordered = sorted(products, key=lambda p: (not p.get("partner", False), p.get("name", "")))
+        zone_masks: Dict[int, int] = {}
+        use_masks: Dict[str, int] = {}
+        any_zone_mask = 0
+        any_use_mask = 0
+        for i, product in enumerate(ordered):
+            bit = 1 << i
+            zones = product.get("recommended_zones") or []
+            uses = product.get("recommended_uses") or []
+            if not zones:
+                any_zone_mask |= bit
+            for zone in zones:
+                zone_masks[zone] = zone_masks.get(zone, 0) | bit
+            if not uses:
+                any_use_mask |= bit
+            for use in uses:
+                use_masks[use] = use_masks.get(use, 0) | bit
+
+        spec_columns = {}
+        for field in NUMERIC_SPEC_FIELDS.get(category, ()):
+            entries = [(float(p[field]), i) for i, p in enumerate(ordered) if _is_number(p.get(field))]
+            if entries:
+                spec_columns[field] = SpecColumn.build(entries)
+        return cls(
+            category=category,
+            products=tuple(ordered),
+            all_mask=(1 << len(ordered)) - 1,
+            zone_masks=zone_masks,
+            use_masks=use_masks,
+            any_zone_mask=any_zone_mask,
+            any_use_mask=any_use_mask,
+            spec_columns=spec_columns,
+            built_at=time.monotonic(),
+        )
+
+    def mask_for(self, *, zone: Optional[int] = None, use: Optional[str] = None) -> int:
+        mask = self.all_mask
+        if zone is not None:
+            mask &= self.zone_masks.get(zone, 0) | self.any_zone_mask
+        if use is not None:
+            mask &= self.use_masks.get(use, 0) | self.any_use_mask
+        return mask
+
+    def filter(self, *, zone: Optional[int] = None, use: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Products matching zone/use, partner products first (copies)."""
+        return [dict(self.products[i]) for i in _iter_bits(self.mask_for(zone=zone, use=use))]
+
+    def search(
+        self,
+        specs: Sequence["SpecFilter"] = (),
+        *,
+        zone: Optional[int] = None,
+        use: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Products matching every spec range and zone/use, partner products first.
+
+        A product without a numeric value for a filtered field never matches.
+        Raises UnsearchableSpecFieldError for a field that is unknown or not
+        numeric for this category.
+        """
+        mask = self.mask_for(zone=zone, use=use)
+        for spec in specs:
+            if not mask:
+                break
+            column = self.spec_columns.get(spec.field)
+            if column is None:
+                if spec.field not in self._indexable_fields():
+                    raise UnsearchableSpecFieldError(spec.field)
+                return []
+            mask &= column.range_mask(spec.op, spec.value)
+
+        results = []
+        for i in _iter_bits(mask):
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(dict(self.products[i]))
+        return results
+
+    def _indexable_fields(self) -> Tuple[str, ...]:
+        from app.services.product_import import NUMERIC_SPEC_FIELDS
+
+        return NUMERIC_SPEC_FIELDS.get(self.category, ())
+
+
+def _cached(key: Tuple[str, str]) -> Optional[ProductIndex]:
+    with _lock:
+        index = _indexes.get(key)
+    if index is None or time.monotonic() - index.built_at > INDEX_TTL_SECONDS:
+        return None
+    return index
+
+
+def _store(key: Tuple[str, str], index: ProductIndex) -> ProductIndex:
+    with _lock:
+        _indexes[key] = index
+    return index
+
+
+def get_product_index(category: str, db: Optional[Session] = None) -> ProductIndex:
+    """Return the cached index for *category*, building it on miss/expiry."""
+    from app.services.products import load_products
+
+    key = (category, "yaml" if db is None else "db")
+    index = _cached(key)
+    if index is None:
+        index = _store(key, ProductIndex.build(category, load_products(category, db=db)))
+    return index
+
+
+async def get_product_index_async(category: str, db: AsyncSession) -> ProductIndex:
+    """Async variant of get_product_index for `async def` routes."""
+    from app.services.products import load_products_async
+
+    key = (category, "db")
+    index = _cached(key)
+    if index is None:
+        index = _store(key, ProductIndex.build(category, await load_products_async(category, db)))
+    return index
+
+
+def invalidate_product_index(category: Optional[str] = None) -> None:
+    """Drop cached indexes for *category* (or all categories)."""
+    global _catalog_generation
+    with _lock:
+        _catalog_generation += 1
+        if category is None:
+            _indexes.clear()
+            return
+        for key in [key for key in _indexes if key[0] == category]:
+            del _indexes[key]
+
+
+def catalog_version() -> int:
+    """Counter bumped whenever the catalog changes (for caches derived from it)."""
+    with _lock:
+        return _catalog_generation
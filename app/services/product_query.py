@@ -0,0 +1,269 @@
+"""Paginated product queries with filters pushed down into SQL.
+
+Pages are ordered partner-first, then by name and product id, and continue
+from an opaque keyset cursor. Cost scales with ``limit`` rather than with the
+size of the catalog. Categories that have not been imported into the DB are
+served from the YAML index with the same semantics.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import operator
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, cast, exists, func, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+from app.services.product_import import NUMERIC_SPEC_FIELDS, SPEC_FIELDS
+from app.services.product_index import get_product_index
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Keys returned regardless of the requested spec projection.
+BASE_FIELDS = (
+    "id",
+    "manufacturer",
+    "series",
+    "name",
+    "partner",
+    "catalog_url",
+    "recommended_zones",
+    "recommended_uses",
+)
+
+SPEC_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "eq": operator.eq,
+}
+_FIELD_RE = re.compile(r"^[a-z][a-z0-9_]*$")
+
+
+class ProductQueryError(ValueError):
+    """Invalid filter, projection or cursor supplied by the client."""
+
+
+@dataclass(frozen=True)
+class SpecFilter:
+    field: str
+    op: str
+    value: float
+
+    @classmethod
+    def parse(cls, raw: str) -> "SpecFilter":
+        """Parse ``field:op:value``, e.g. ``u_value:lte:1.5``."""
+        parts = raw.split(":")
+        if len(parts) != 3:
+            raise ProductQueryError(f"spec filter must be 'field:op:value': {raw}")
+        field, op, value = parts
+        if not _FIELD_RE.match(field):
+            raise ProductQueryError(f"invalid spec field: {field}")
+        if op not in SPEC_OPERATORS:
+            raise ProductQueryError(f"invalid spec operator '{op}' (use {', '.join(SPEC_OPERATORS)})")
+        try:
+            number = float(value)
+        except ValueError:
+            raise ProductQueryError(f"spec filter value must be numeric: {raw}") from None
+        return cls(field=field, op=op, value=number)
+
+
+@dataclass(frozen=True)
+class ProductQuery:
+    category: str
+    zone: Optional[int] = None
+    use: Optional[str] = None
+    manufacturer: Optional[str] = None
+    partner: Optional[bool] = None
+    specs: Tuple[SpecFilter, ...] = ()
+    fields: Optional[Tuple[str, ...]] = None
+    cursor: Optional[str] = None
+    limit: int = DEFAULT_PAGE_SIZE
+
+    def validate(self) -> None:
+        if not 1 <= self.limit <= MAX_PAGE_SIZE:
+            raise ProductQueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        known = SPEC_FIELDS.get(self.category)
+        if known is None:
+            return
+        unknown = [f for f in [s.field for s in self.specs] + list(self.fields or ()) if f not in known]
+        if unknown:
+            raise ProductQueryError(f"unknown spec field(s) for {self.category}: {', '.join(sorted(set(unknown)))}")
+        numeric = NUMERIC_SPEC_FIELDS.get(self.category, ())
+        not_numeric = [s.field for s in self.specs if s.field not in numeric]
+        if not_numeric:
+            raise ProductQueryError(
+                f"spec filter field(s) for {self.category} are not numeric: {', '.join(sorted(set(not_numeric)))}"
+            )
+
+
+def encode_cursor(product: Dict[str, Any]) -> str:
+    key = [bool(product.get("partner")), product.get("name") or "", product["id"]]
+    raw = json.dumps(key, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[bool, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        partner, name, product_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ProductQueryError("invalid cursor") from None
+    return bool(partner), str(name), str(product_id)
+
+
+# --- SQL path ---------------------------------------------------------------
+
+
+def _json_array_matches(column, value: Any, dialect: str):
+    """Row matches when the JSON array contains *value* or is empty/absent (wildcard)."""
+    if dialect == "postgresql":
+        as_jsonb = cast(column, JSONB)
+        return or_(
+            column.is_(None),
+            as_jsonb == cast("null", JSONB),
+            as_jsonb == cast("[]", JSONB),
+            as_jsonb.contains([value]),
+        )
+    elements = func.json_each(column).table_valued("value")
+    return or_(
+        column.is_(None),
+        func.json_type(column) != "array",
+        func.json_array_length(column) == 0,
+        exists(select(literal_column("1")).select_from(elements).where(elements.c.value == value)),
+    )
+
+
+def _after_cursor(cursor: str):
+    partner, name, product_id = decode_cursor(cursor)
+    # partner DESC, name ASC, product_id ASC
+    same_partner_after = and_(
+        Product.partner.is_(partner),
+        or_(Product.name > name, and_(Product.name == name, Product.product_id > product_id)),
+    )
+    if partner:
+        return or_(Product.partner.is_(False), same_partner_after)
+    return same_partner_after
+
+
+def build_select(query: ProductQuery, dialect: str):
+    """Build the page SELECT for *query* (exposed for EXPLAIN / tests)."""
+    columns = [
+        Product.product_id,
+        Product.manufacturer,
+        Product.series,
+        Product.name,
+        Product.partner,
+        Product.catalog_url,
+        Product.recommended_zones,
+        Product.recommended_uses,
+    ]
+    if query.fields is None:
+        columns.append(Product.specs)
+    else:
+        columns.extend(Product.specs[field].label(f"spec__{field}") for field in query.fields)
+
+    stmt = select(*columns).where(Product.category == query.category)
+    if query.manufacturer is not None:
+        stmt = stmt.where(Product.manufacturer == query.manufacturer)
+    if query.partner is not None:
+        stmt = stmt.where(Product.partner.is_(query.partner))
+    for spec in query.specs:
+        stmt = stmt.where(SPEC_OPERATORS[spec.op](Product.specs[spec.field].as_float(), spec.value))
+    if query.zone is not None:
+        stmt = stmt.where(_json_array_matches(Product.recommended_zones, query.zone, dialect))
+    if query.use is not None:
+        stmt = stmt.where(_json_array_matches(Product.recommended_uses, query.use, dialect))
+    if query.cursor:
+        stmt = stmt.where(_after_cursor(query.cursor))
+    return stmt.order_by(Product.partner.desc(), Product.name, Product.product_id).limit(query.limit + 1)
+
+
+def _row_to_page_item(row, fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    mapping = row._mapping
+    item = {
+        "id": mapping["product_id"],
+        "manufacturer": mapping["manufacturer"],
+        "series": mapping["series"],
+        "name": mapping["name"],
+        "partner": mapping["partner"],
+        "catalog_url": mapping["catalog_url"],
+        "recommended_zones": mapping["recommended_zones"] or [],
+        "recommended_uses": mapping["recommended_uses"] or [],
+    }
+    if fields is None:
+        item.update(mapping["specs"] or {})
+    else:
+        for field in fields:
+            value = mapping[f"spec__{field}"]
+            if value is not None:
+                item[field] = value
+    return item
+
+
+# --- YAML fallback ----------------------------------------------------------
+
+
+def _sort_key(product: Dict[str, Any]) -> Tuple[bool, str, str]:
+    return (not product.get("partner", False), product.get("name") or "", product.get("id") or "")
+
+
+def _matches(product: Dict[str, Any], query: ProductQuery) -> bool:
+    if query.manufacturer is not None and product.get("manufacturer") != query.manufacturer:
+        return False
+    if query.partner is not None and bool(product.get("partner")) is not query.partner:
+        return False
+    for spec in query.specs:
+        value = product.get(spec.field)
+        if not isinstance(value, (int, float)) or not SPEC_OPERATORS[spec.op](value, spec.value):
+            return False
+    return True
+
+
+def _project(product: Dict[str, Any], fields: Optional[Sequence[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return product
+    keep = set(BASE_FIELDS) | set(fields)
+    return {key: value for key, value in product.items() if key in keep}
+
+
+def _page_from_index(query: ProductQuery) -> List[Dict[str, Any]]:
+    # ProductIndex.filter is partner-first by name; add the id tiebreaker the cursor relies on.
+    candidates = sorted(get_product_index(query.category).filter(zone=query.zone, use=query.use), key=_sort_key)
+    if query.cursor:
+        partner, name, product_id = decode_cursor(query.cursor)
+        start = (not partner, name, product_id)
+        candidates = [p for p in candidates if _sort_key(p) > start]
+    page = []
+    for product in candidates:
+        if _matches(product, query):
+            page.append(_project(product, query.fields))
+            if len(page) > query.limit:
+                break
+    return page
+
+
+async def query_products_page(db: AsyncSession, query: ProductQuery) -> Dict[str, Any]:
+    """Return ``{"products": [...], "next_cursor": str | None}`` for one page.
+
+    Raises ProductQueryError for bad input and FileNotFoundError for an unknown category.
+    """
+    query.validate()
+    dialect = db.get_bind().dialect.name
+    rows = (await db.execute(build_select(query, dialect))).all()
+    if rows:
+        page = [_row_to_page_item(row, query.fields) for row in rows]
+    else:
+        in_db = await db.scalar(select(Product.id).where(Product.category == query.category).limit(1))
+        page = [] if in_db is not None else _page_from_index(query)
+
+    next_cursor = encode_cursor(page[query.limit - 1]) if len(page) > query.limit else None
+    return {"products": page[: query.limit], "next_cursor": next_cursor}
@@ -2,15 +2,20 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import yaml
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.product import Product
+from app.services.product_index import get_product_index
 
 PRODUCTS_DIR = Path(__file__).resolve().parents[2] / "data" / "products"
+PRODUCT_CATEGORIES = ["windows", "insulation", "hvac", "lighting", "solar"]
 
 
 def load_products(category: str, db: Optional[Session] = None) -> List[Dict[str, Any]]:
@@ -20,12 +25,27 @@ def load_products(category: str, db: Optional[Session] = None) -> List[Dict[str,
         if rows:
             return [_row_to_dict(row) for row in rows]
 
+    return [dict(product) for product in load_yaml_products(category)]
+
+
+async def load_products_async(category: str, db: AsyncSession) -> List[Dict[str, Any]]:
+    """Async variant of load_products for `async def` routes."""
+    result = await db.execute(select(Product).where(Product.category == category))
+    rows = result.scalars().all()
+    if rows:
+        return [_row_to_dict(row) for row in rows]
+    return load_products(category)
+
+
+@lru_cache(maxsize=None)
+def load_yaml_products(category: str) -> tuple:
+    """Parse a category YAML once per process. Callers must not mutate the items."""
     path = PRODUCTS_DIR / f"{category}.yaml"
     if not path.exists():
         raise FileNotFoundError(f"Product category not found: {category}")
 
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or []
+        return tuple(yaml.safe_load(f) or [])
 
 
 def get_recommended_products(
@@ -36,8 +56,19 @@ def get_recommended_products(
     db: Optional[Session] = None,
 ) -> List[Dict[str, Any]]:
     """Return products filtered by zone/use, partner products first."""
-    products = load_products(category, db=db)
+    return get_product_index(category, db=db).filter(zone=zone, use=use)
+
+
+def filter_products(
+    products: List[Dict[str, Any]],
+    *,
+    zone: Optional[int] = None,
+    use: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """Apply the zone/use filter and partner-first ordering to loaded products.
 
+    Reference implementation of ProductIndex.filter for ad-hoc product lists.
+    """
     filtered = []
     for product in products:
         if zone is not None:
@@ -0,0 +1,224 @@
+"""Project calculation history stored as JSON Patch deltas.
+
+Each calculation that changes a project's document (``{"input_data",
+"result_data"}``) adds a revision. Most revisions store only an RFC 6902
+patch against the previous one; every SNAPSHOT_INTERVAL-th revision (and any
+revision whose patch would not be smaller than the document) stores the full
+document. Reconstructing a revision therefore reads one snapshot and applies
+fewer than SNAPSHOT_INTERVAL patches, and storage grows with the size of the
+changes rather than the size of the document.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.project import Project
+from app.models.project_revision import ProjectRevision
+
+SNAPSHOT_INTERVAL = 10
+
+Patch = List[Dict[str, Any]]
+
+
+class RevisionNotFound(LookupError):
+    """The requested project revision does not exist."""
+
+
+# --- JSON Patch (add / remove / replace) ---------------------------------------
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(source: Any, target: Any) -> Patch:
+    """Operations that turn *source* into *target* (both JSON-compatible)."""
+    ops: Patch = []
+    _diff(source, target, "", ops)
+    return ops
+
+
+def _diff(source: Any, target: Any, path: str, ops: Patch) -> None:
+    if type(source) is type(target) and source == target:
+        return
+    if isinstance(source, dict) and isinstance(target, dict):
+        for key in source:
+            if key not in target:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in target.items():
+            child = f"{path}/{_escape(key)}"
+            if key in source:
+                _diff(source[key], value, child, ops)
+            else:
+                ops.append({"op": "add", "path": child, "value": copy.deepcopy(value)})
+        return
+    if isinstance(source, list) and isinstance(target, list):
+        for index in range(min(len(source), len(target))):
+            _diff(source[index], target[index], f"{path}/{index}", ops)
+        # Remove from the end so earlier indexes stay valid.
+        for index in range(len(source) - 1, len(target) - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{index}"})
+        for index in range(len(source), len(target)):
+            ops.append({"op": "add", "path": f"{path}/{index}", "value": copy.deepcopy(target[index])})
+        return
+    ops.append({"op": "replace", "path": path, "value": copy.deepcopy(target)})
+
+
+def apply_patch(document: Any, ops: Patch) -> Any:
+    """Return a copy of *document* with *ops* applied."""
+    return _apply_in_place(copy.deepcopy(document), ops)
+
+
+def _apply_in_place(result: Any, ops: Patch) -> Any:
+    for op in ops:
+        path = op["path"]
+        if path == "":
+            if op["op"] == "remove":
+                result = None
+            else:
+                result = copy.deepcopy(op["value"])
+            continue
+        *parents, leaf = [_unescape(token) for token in path.split("/")[1:]]
+        container = result
+        for token in parents:
+            container = container[int(token)] if isinstance(container, list) else container[token]
+        if isinstance(container, list):
+            index = len(container) if leaf == "-" else int(leaf)
+            if op["op"] == "add":
+                container.insert(index, copy.deepcopy(op["value"]))
+            elif op["op"] == "remove":
+                del container[index]
+            else:
+                container[index] = copy.deepcopy(op["value"])
+        elif op["op"] == "remove":
+            del container[leaf]
+        else:
+            container[leaf] = copy.deepcopy(op["value"])
+    return result
+
+
+# --- revisions ----------------------------------------------------------------
+
+
+def project_document(project: Project) -> Dict[str, Any]:
+    return {"input_data": project.input_data, "result_data": project.result_data}
+
+
+def _encoded_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+
+
+def record_revision(
+    db: Session,
+    project: Project,
+    previous_document: Optional[Dict[str, Any]] = None,
+    previous_hash: Optional[str] = None,
+) -> ProjectRevision:
+    """Add a revision for the project's current document (caller commits).
+
+    *previous_document* / *previous_hash* are the project's values before this
+    calculation; a delta is stored only when they match the latest revision.
+    """
+    latest = db.execute(
+        select(ProjectRevision.revision, ProjectRevision.input_hash)
+        .where(ProjectRevision.project_id == project.id)
+        .order_by(ProjectRevision.revision.desc())
+        .limit(1)
+    ).first()
+    number = 1 if latest is None else latest.revision + 1
+    document = project_document(project)
+
+    patch: Optional[Patch] = None
+    if (
+        latest is not None
+        and previous_document is not None
+        and latest.input_hash == previous_hash
+        and (number - 1) % SNAPSHOT_INTERVAL != 0
+    ):
+        patch = make_patch(previous_document, document)
+        if _encoded_size(patch) >= _encoded_size(document):
+            patch = None
+
+    revision = ProjectRevision(
+        project_id=project.id,
+        revision=number,
+        is_snapshot=patch is None,
+        snapshot=copy.deepcopy(document) if patch is None else None,
+        patch=patch,
+        input_hash=project.input_hash,
+    )
+    db.add(revision)
+    return revision
+
+
+def list_revisions(db: Session, project_id: int) -> List[Dict[str, Any]]:
+    rows = db.execute(
+        select(
+            ProjectRevision.revision,
+            ProjectRevision.is_snapshot,
+            ProjectRevision.input_hash,
+            ProjectRevision.created_at,
+        )
+        .where(ProjectRevision.project_id == project_id)
+        .order_by(ProjectRevision.revision.desc())
+    ).all()
+    return [
+        {
+            "revision": row.revision,
+            "is_snapshot": row.is_snapshot,
+            "input_hash": row.input_hash,
+            "created_at": str(row.created_at),
+        }
+        for row in rows
+    ]
+
+
+def reconstruct_revision(db: Session, project_id: int, revision: int) -> Dict[str, Any]:
+    """Full document of *revision*: nearest snapshot at or below it plus the patches after it."""
+    base = db.execute(
+        select(ProjectRevision.revision, ProjectRevision.snapshot)
+        .where(
+            ProjectRevision.project_id == project_id,
+            ProjectRevision.is_snapshot.is_(True),
+            ProjectRevision.revision <= revision,
+        )
+        .order_by(ProjectRevision.revision.desc())
+        .limit(1)
+    ).first()
+    if base is None:
+        raise RevisionNotFound(f"revision {revision} not found")
+
+    patches = db.execute(
+        select(ProjectRevision.revision, ProjectRevision.patch)
+        .where(
+            ProjectRevision.project_id == project_id,
+            ProjectRevision.revision > base.revision,
+            ProjectRevision.revision <= revision,
+        )
+        .order_by(ProjectRevision.revision)
+    ).all()
+    if (patches[-1].revision if patches else base.revision) != revision:
+        raise RevisionNotFound(f"revision {revision} not found")
+
+    # Loaded JSON is a fresh object per query, so patches can be applied in place.
+    document = base.snapshot
+    for row in patches:
+        document = _apply_in_place(document, row.patch or [])
+    return document
+
+
+def diff_revisions(db: Session, project_id: int, from_revision: int, to_revision: int) -> Patch:
+    return make_patch(
+        reconstruct_revision(db, project_id, from_revision),
+        reconstruct_revision(db, project_id, to_revision),
+    )
@@ -4,15 +4,25 @@ from __future__ import annotations
 
 import logging
 import os
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.email_outbox import EmailOutbox
+from app.services.email_outbox import enqueue_email
 
 logger = logging.getLogger(__name__)
 
 NOTIFY_EMAIL = os.getenv("REFERRAL_NOTIFY_EMAIL", "compass@archi-prisma.co.jp")
+REFERRAL_NOTIFICATION = "referral_notification"
 
 
-def send_referral_notification(referral_data: Dict[str, Any]) -> bool:
-    """Send email notification for new referral. Returns True on success."""
+def queue_referral_notification(
+    db: Session,
+    referral_data: Dict[str, Any],
+    referral_id: Optional[int] = None,
+) -> EmailOutbox:
+    """Queue the email notification for a new referral (caller commits)."""
     logger.info(
         "New referral: %s -> %s (%s) for %s",
         referral_data.get("architect_email"),
@@ -21,17 +31,7 @@ def send_referral_notification(referral_data: Dict[str, Any]) -> bool:
         referral_data.get("project_name", "unnamed"),
     )
 
-    try:
-        import smtplib
-        from email.mime.text import MIMEText
-
-        smtp_user = os.getenv("GMAIL_USER")
-        smtp_pass = os.getenv("GMAIL_APP_PASSWORD")
-        if not smtp_user or not smtp_pass:
-            logger.warning("Gmail credentials not set; skipping email notification")
-            return False
-
-        body = f"""新規見積依頼が届きました。
+    body = f"""新規見積依頼が届きました。
 
 ■ 建築士情報
   名前: {referral_data.get('architect_name')}
@@ -53,20 +53,15 @@ def send_referral_notification(referral_data: Dict[str, Any]) -> bool:
 ---
 楽々省エネ計算 紹介システム
 """
-        msg = MIMEText(body, "plain", "utf-8")
-        msg["Subject"] = (
-            f"[楽々省エネ] 見積依頼: {referral_data.get('product_name')} - "
-            f"{referral_data.get('architect_company', '個人')}"
-        )
-        msg["From"] = smtp_user
-        msg["To"] = NOTIFY_EMAIL
-
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-            server.login(smtp_user, smtp_pass)
-            server.send_message(msg)
-
-        logger.info("Referral notification sent to %s", NOTIFY_EMAIL)
-        return True
-    except Exception as exc:
-        logger.exception("Failed to send referral notification: %s", exc)
-        return False
+    subject = (
+        f"[楽々省エネ] 見積依頼: {referral_data.get('product_name')} - "
+        f"{referral_data.get('architect_company', '個人')}"
+    )
+    return enqueue_email(
+        db,
+        kind=REFERRAL_NOTIFICATION,
+        reference_id=referral_id,
+        to_email=NOTIFY_EMAIL,
+        subject=subject,
+        body=body,
+    )
@@ -0,0 +1,177 @@
+"""Monthly referral rollup behind ``/referral/stats``.
+
+``referral_monthly_stats`` holds one count per (month, manufacturer, status).
+``create_referral`` and ``update_referral`` adjust it in the same transaction
+as the referral itself, so the stats endpoint reads a table whose size
+depends on months x manufacturers x statuses, not on the number of referrals.
+``python -m scripts.rebuild_referral_stats`` recomputes it from the raw table;
+``scripts.migrate_db`` fills it from history while it is still empty. Months
+are UTC months on every path.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, exists, extract, func, select, text
+from sqlalchemy.orm import Session
+
+from app.models.referral import Referral
+from app.models.referral_monthly_stat import ReferralMonthlyStat
+from app.services.analytics_counters import OverviewSnapshot
+
+DEFAULT_STATUS = "pending"
+
+
+def month_of(value: Optional[datetime]) -> date:
+    """First day of the UTC month *value* falls in (now if unknown)."""
+    if value is None:
+        value = datetime.now(timezone.utc)
+    elif value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def apply_referral_delta(db: Session, month: date, manufacturer: str, status: str, delta: int) -> None:
+    """Add *delta* to one rollup cell (caller commits)."""
+    values = {
+        "month": month,
+        "manufacturer": manufacturer,
+        "status": status or DEFAULT_STATUS,
+        "count": delta,
+        "updated_at": _now(),
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    else:
+        key = {k: values[k] for k in ("month", "manufacturer", "status")}
+        existing = db.scalar(select(ReferralMonthlyStat).filter_by(**key).with_for_update())
+        if existing is None:
+            db.add(ReferralMonthlyStat(**values))
+        else:
+            existing.count += delta
+            existing.updated_at = values["updated_at"]
+        db.flush()
+        return
+
+    stmt = upsert(ReferralMonthlyStat).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["month", "manufacturer", "status"],
+        set_={"count": ReferralMonthlyStat.count + stmt.excluded.count, "updated_at": stmt.excluded.updated_at},
+    )
+    db.execute(stmt)
+
+
+def record_referral_created(db: Session, referral: Referral) -> None:
+    apply_referral_delta(db, month_of(referral.created_at), referral.manufacturer, referral.status, 1)
+
+
+def record_referral_status_change(db: Session, referral: Referral, previous_status: Optional[str]) -> None:
+    previous = previous_status or DEFAULT_STATUS
+    current = referral.status or DEFAULT_STATUS
+    if previous == current:
+        return
+    month = month_of(referral.created_at)
+    apply_referral_delta(db, month, referral.manufacturer, previous, -1)
+    apply_referral_delta(db, month, referral.manufacturer, current, 1)
+
+
+def rebuild_referral_stats(db: Session) -> int:
+    """Recompute the rollup from the referrals table and commit. Returns the number of rollup rows."""
+    dialect = db.get_bind().dialect.name
+    created_at = Referral.created_at
+    if dialect == "postgresql":
+        # Block concurrent deltas until the rebuilt rows are committed, so none
+        # is lost between the DELETE and the INSERT or counted twice.
+        db.execute(text("LOCK TABLE referral_monthly_stats IN EXCLUSIVE MODE"))
+        # extract() on a timestamptz follows the session TimeZone; month_of uses UTC.
+        created_at = func.timezone("UTC", created_at)
+    year = extract("year", created_at)
+    month = extract("month", created_at)
+    status = func.coalesce(Referral.status, DEFAULT_STATUS)
+    grouped = db.execute(
+        select(year, month, Referral.manufacturer, status, func.count(Referral.id)).group_by(
+            year, month, Referral.manufacturer, status
+        )
+    ).all()
+
+    now = _now()
+    db.execute(delete(ReferralMonthlyStat))
+    rows = [
+        ReferralMonthlyStat(
+            month=date(int(y), int(m), 1),
+            manufacturer=manufacturer,
+            status=state,
+            count=int(count),
+            updated_at=now,
+        )
+        for y, m, manufacturer, state, count in grouped
+    ]
+    db.add_all(rows)
+    db.commit()
+    return len(rows)
+
+
+def backfill_referral_stats(db: Session) -> Optional[int]:
+    """Fill the rollup from all referrals if it is empty but referrals exist.
+
+    Called by the migrate step, before workers start adding deltas, so an
+    empty rollup means it has never been filled. Returns the number of rollup
+    rows written, or None if nothing needed doing.
+    """
+    if db.scalar(select(exists().where(ReferralMonthlyStat.id.isnot(None)))):
+        return None
+    if not db.scalar(select(exists().where(Referral.id.isnot(None)))):
+        return None
+    return rebuild_referral_stats(db)
+
+
+def load_referral_stats(db: Session) -> OverviewSnapshot:
+    """Stats payload with ETag / Last-Modified, built from one query over the rollup."""
+    total = 0
+    by_status: Counter = Counter()
+    by_manufacturer: Counter = Counter()
+    by_month: Counter = Counter()
+    last_modified: Optional[datetime] = None
+    for month, manufacturer, status, count, updated_at in db.execute(
+        select(
+            ReferralMonthlyStat.month,
+            ReferralMonthlyStat.manufacturer,
+            ReferralMonthlyStat.status,
+            ReferralMonthlyStat.count,
+            ReferralMonthlyStat.updated_at,
+        )
+    ):
+        if updated_at is not None:
+            if updated_at.tzinfo is None:
+                updated_at = updated_at.replace(tzinfo=timezone.utc)
+            last_modified = updated_at if last_modified is None else max(last_modified, updated_at)
+        if not count:
+            continue
+        total += count
+        by_status[status] += count
+        by_manufacturer[manufacturer] += count
+        by_month[(month.year, month.month)] += count
+
+    payload: Dict[str, Any] = {
+        "total": total,
+        "by_status": dict(sorted(by_status.items())),
+        "by_manufacturer": dict(sorted(by_manufacturer.items())),
+        "by_month": [
+            {"year": year, "month": month, "count": count} for (year, month), count in sorted(by_month.items())
+        ],
+    }
+    digest = hashlib.sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    last_modified = (last_modified or _now()).replace(microsecond=0)
+    return OverviewSnapshot(payload, f'"{digest.hexdigest()[:32]}"', last_modified)
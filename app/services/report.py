@@ -8,18 +8,39 @@ See: https://api.lowenergy.jp/model/1/v390/
 
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Set
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Set
+import importlib
 import io
 import logging
 import time
 import random
 
-import openpyxl
-import requests
+if TYPE_CHECKING:
+    import openpyxl
+    import requests
 
 logger = logging.getLogger(__name__)
 
+# openpyxl / requests are only needed by the official-API routes; import them on
+# first use so workers serving /calc/* do not pay for them at cold start.
+_LAZY_MODULES = ("openpyxl", "requests")
+
+
+def _load_lazy_module(name: str) -> Any:
+    module = globals().get(name)
+    if module is None:
+        module = importlib.import_module(name)
+        globals()[name] = module
+    return module
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_MODULES:
+        return _load_lazy_module(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # ── API settings ────────────────────────────────────────────────────────────
 API_BASE = "https://api.lowenergy.jp/model/1/v390"
 API_REPORT = f"{API_BASE}/reportFromInputSheets"
@@ -487,6 +508,24 @@ def _select_template(total_floor_area: float) -> Path:
     return template
 
 
+@lru_cache(maxsize=4)
+def _read_template_bytes(template_path: Path) -> bytes:
+    """Keep template bytes in memory so requests do not hit the filesystem."""
+    return template_path.read_bytes()
+
+
+def preload_templates() -> List[str]:
+    """Import the official-API dependencies and cache template bytes (worker warm-up)."""
+    for name in _LAZY_MODULES:
+        _load_lazy_module(name)
+    loaded = []
+    for template in (STANDARD_TEMPLATE, SMALL_TEMPLATE):
+        if template.exists():
+            _read_template_bytes(template)
+            loaded.append(template.name)
+    return loaded
+
+
 def _build_excel_buffer(input_data: Dict[str, Any]) -> io.BytesIO:
     """Build an in-memory Excel file from *input_data* using the official template."""
     building_data = input_data.get("building", {})
@@ -499,7 +538,8 @@ def _build_excel_buffer(input_data: Dict[str, Any]) -> io.BytesIO:
     template_path = _select_template(total_area)
     logger.info("Using template %s for floor area %.2f", template_path, total_area)
 
-    workbook = openpyxl.load_workbook(template_path)
+    openpyxl = _load_lazy_module("openpyxl")
+    workbook = openpyxl.load_workbook(io.BytesIO(_read_template_bytes(template_path)))
     _write_data_to_workbook(workbook, input_data)
 
     buf = io.BytesIO()
@@ -526,6 +566,7 @@ def _post_to_api(
                               Defaults to {500, 502, 503, 504} for server errors only.
                               Client errors (4xx) will fail immediately.
     """
+    requests = _load_lazy_module("requests")
     if retry_on_status_codes is None:
         retry_on_status_codes = {500, 502, 503, 504}
 
@@ -664,6 +705,7 @@ def _extract_pdf_content_or_raise(response: requests.Response) -> bytes:
 
 def _is_smallmodel_original_upload(excel_bytes: bytes) -> bool:
     """Return True when uploaded bytes look like original SMALLMODEL workbook."""
+    openpyxl = _load_lazy_module("openpyxl")
     wb: Optional[openpyxl.Workbook] = None
     try:
         wb = openpyxl.load_workbook(io.BytesIO(excel_bytes), read_only=True, data_only=True)
@@ -3,11 +3,10 @@
 from __future__ import annotations
 
 import asyncio
+import importlib
 import xml.etree.ElementTree as ET
 from typing import Any
 
-import httpx
-
 ENVELOPE_API_URL = "https://api.lowenergy.jp/envelope/1/eval"
 _OFFICIAL_API_LOCK = asyncio.Lock()
 
@@ -65,6 +64,8 @@ def parse_calc_result_xml(raw_xml: str) -> dict[str, Any]:
 
 async def call_official_envelope_api(xml_body: str, timeout: int = 30, retries: int = 3) -> dict[str, Any]:
     """Call official envelope API and parse CalcResult."""
+    # httpx is imported on first call to keep it off the application cold-start path.
+    httpx = importlib.import_module("httpx")
     headers = {
         "Content-Type": "application/xml; charset=utf-8",
         "Accept": "*/*",
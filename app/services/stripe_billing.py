@@ -5,6 +5,8 @@ from __future__ import annotations
 import importlib
 import logging
 import os
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
@@ -27,6 +29,9 @@ ENERGY_KEYWORDS = ("energy", "Energy")
 PLAN_ENERGY_MONTHLY = "energy_monthly"
 PLAN_PROJECT_PASS = "project_pass"
 
+BILLING_ENTITLEMENT_CACHE_MAX_ENTRIES = 4096
+_UNRESOLVED = object()
+
 
 class BillingConfigurationError(RuntimeError):
     """Raised when Stripe billing is requested without required configuration."""
@@ -68,6 +73,24 @@ def _project_pass_price_id() -> str:
     return _get_env("STRIPE_PRICE_ID_PROJECT_PASS")
 
 
+def _entitlement_cache_ttl_seconds() -> float:
+    raw_value = _get_env("BILLING_ENTITLEMENT_CACHE_TTL_SECONDS", "30")
+    try:
+        seconds = float(raw_value)
+    except ValueError:
+        seconds = 30.0
+    return max(seconds, 0.0)
+
+
+def _entitlement_negative_cache_ttl_seconds() -> float:
+    raw_value = _get_env("BILLING_ENTITLEMENT_NEGATIVE_CACHE_TTL_SECONDS", "3")
+    try:
+        seconds = float(raw_value)
+    except ValueError:
+        seconds = 3.0
+    return max(seconds, 0.0)
+
+
 def _project_pass_days() -> int:
     raw_value = _get_env("STRIPE_PROJECT_PASS_DAYS", "30")
     try:
@@ -438,17 +461,103 @@ def _project_pass_summaries(project_passes: list[BillingProjectPass]) -> list[di
 
 
 def _match_project_pass(
-    project_passes: list[BillingProjectPass],
+    project_passes: list[dict[str, Any]],
     project_id: Optional[int],
-) -> Optional[BillingProjectPass]:
+) -> Optional[dict[str, Any]]:
     if project_id is None:
         return None
     for project_pass in project_passes:
-        if project_pass.project_id == project_id:
+        if project_pass["project_id"] == project_id:
             return project_pass
     return None
 
 
+@dataclass
+class _EntitlementState:
+    """What /billing/status needs for one email, cached between polls."""
+
+    project_passes: list[dict[str, Any]]
+    legacy_entitlement: Optional[dict[str, Any]]
+    expires_at: float
+    # Stripe subscription lookup, filled in on first need: dict or None.
+    subscription: Any = _UNRESOLVED
+    customer_ids: list[str] = field(default_factory=list)
+
+
+_entitlement_cache: dict[tuple[str, bool], _EntitlementState] = {}
+
+
+def reset_entitlement_cache() -> None:
+    _entitlement_cache.clear()
+
+
+def invalidate_entitlements(customer_email: Optional[str] = None, *, customer_id: Optional[str] = None) -> None:
+    """Drop cached billing status for an email and/or a Stripe customer id."""
+    normalized_email = _normalize_email(customer_email or "")
+    customer_id = _clean_value(customer_id)
+    for key, state in list(_entitlement_cache.items()):
+        if (normalized_email and key[0] == normalized_email) or (customer_id and customer_id in state.customer_ids):
+            _entitlement_cache.pop(key, None)
+
+
+def _load_entitlement_state(db: Optional[Session], normalized_email: str) -> _EntitlementState:
+    key = (normalized_email, bool(_stripe_secret_key()))
+    state = _entitlement_cache.get(key)
+    now = time.monotonic()
+    if state is not None and now < state.expires_at:
+        return state
+
+    project_passes = _get_active_project_passes(db, normalized_email)
+    legacy_entitlement = _get_active_entitlement(db, normalized_email)
+
+    # Invalidation only reaches this worker, so other workers see a purchase or
+    # refund only when their entry expires. Keep entries without a pass (a
+    # customer who may be paying right now) very short, the rest short.
+    rows: list[Any] = [*project_passes, *([legacy_entitlement] if legacy_entitlement else [])]
+    ttl = _entitlement_cache_ttl_seconds() if rows else _entitlement_negative_cache_ttl_seconds()
+    # Never serve a pass past its expiry: cap the TTL at the earliest one.
+    expiries = [_coerce_utc(row.expires_at) for row in rows if row.expires_at]
+    if expiries:
+        ttl = min(ttl, max((min(expiries) - datetime.now(timezone.utc)).total_seconds(), 0.0))
+
+    state = _EntitlementState(
+        project_passes=_project_pass_summaries(project_passes),
+        legacy_entitlement=_serialize_entitlement(legacy_entitlement) if legacy_entitlement else None,
+        expires_at=now + ttl,
+    )
+    if db is not None:
+        while len(_entitlement_cache) >= BILLING_ENTITLEMENT_CACHE_MAX_ENTRIES:
+            _entitlement_cache.pop(next(iter(_entitlement_cache)))
+        _entitlement_cache[key] = state
+    return state
+
+
+def _resolve_subscription(stripe_module: Any, normalized_email: str) -> tuple[Optional[dict[str, Any]], list[str]]:
+    """Return the first active paid subscription for the email and all its customer ids."""
+    customers = stripe_module.Customer.list(email=normalized_email, limit=10)
+    customer_rows = list(getattr(customers, "data", []) or [])
+    customer_ids = [str(customer.get("id")) for customer in customer_rows if customer.get("id")]
+
+    for customer in customer_rows:
+        subscriptions = stripe_module.Subscription.list(
+            customer=customer.get("id"),
+            status="all",
+            limit=50,
+        )
+        for subscription in getattr(subscriptions, "data", []) or []:
+            if subscription.get("status") not in ACTIVE_SUBSCRIPTION_STATUSES:
+                continue
+            for item in subscription.get("items", {}).get("data", []) or []:
+                subscription_type = _classify_subscription_item(stripe_module, item)
+                if subscription_type:
+                    return {
+                        "type": subscription_type,
+                        "subscription_id": subscription.get("id"),
+                        "customer_id": customer.get("id"),
+                    }, customer_ids
+    return None, customer_ids
+
+
 def _upsert_project_pass(
     *,
     db: Session,
@@ -797,6 +906,7 @@ def confirm_checkout_session(*, session_id: str, db: Session) -> dict[str, Any]:
             stripe_payment_intent_id=str(session.get("payment_intent") or "") or None,
             notes="Granted from Stripe Checkout one-project pass purchase.",
         )
+        invalidate_entitlements(customer_email)
         return {
             "confirmed": True,
             "active": True,
@@ -810,6 +920,7 @@ def confirm_checkout_session(*, session_id: str, db: Session) -> dict[str, Any]:
             **config,
         }
 
+    invalidate_entitlements(customer_email)
     status_payload = check_subscription(customer_email, db=db, project_id=project_id)
     status_payload.update(
         {
@@ -872,6 +983,7 @@ def process_webhook_event(*, event: dict[str, Any], db: Session) -> dict[str, An
                     stripe_payment_intent_id=str(payload.get("payment_intent") or "") or None,
                     notes=f"Granted from webhook event {event_type}.",
                 )
+                invalidate_entitlements(customer_email)
                 return {
                     "received": True,
                     "action": "project_pass_activated",
@@ -893,12 +1005,24 @@ def process_webhook_event(*, event: dict[str, Any], db: Session) -> dict[str, An
             status="refunded",
             notes="Marked refunded from Stripe webhook.",
         )
+        for refunded in (project_pass, entitlement):
+            if refunded is not None:
+                invalidate_entitlements(refunded.email)
         return {
             "received": True,
             "action": "project_pass_refunded" if project_pass or entitlement else "ignored",
             "event_type": event_type,
         }
 
+    if event_type.startswith("customer.subscription."):
+        # Status comes from Stripe on the next poll instead of after the cache TTL.
+        invalidate_entitlements(customer_id=str(payload.get("customer") or "") or None)
+        return {
+            "received": True,
+            "action": "subscription_status_refreshed",
+            "event_type": event_type,
+        }
+
     return {
         "received": True,
         "action": "ignored",
@@ -911,7 +1035,11 @@ def check_subscription(
     db: Optional[Session] = None,
     project_id: Optional[int] = None,
 ) -> dict[str, Any]:
-    """Check whether the given email has paid access via subscription or project pass."""
+    """Check whether the given email has paid access via subscription or project pass.
+
+    Served from the entitlement cache when possible; receipt links are not
+    included (see get_receipt_links), so a cache hit does no I/O at all.
+    """
     normalized_email = _normalize_email(customer_email)
     normalized_project_id = _normalize_project_id(project_id)
     config = billing_public_config()
@@ -933,130 +1061,97 @@ def check_subscription(
         payload.update({"active": True, "type": "development_bypass", "reason": None})
         return payload
 
-    project_passes = _get_active_project_passes(db, normalized_email)
-    payload["project_passes"] = _project_pass_summaries(project_passes)
+    state = _load_entitlement_state(db, normalized_email)
+    project_passes = state.project_passes
+    payload["project_passes"] = [dict(project_pass) for project_pass in project_passes]
     matched_project_pass = _match_project_pass(project_passes, normalized_project_id)
     if matched_project_pass is not None:
-        if _stripe_secret_key():
-            stripe_module = _load_stripe_module()
-            _configure_stripe(stripe_module)
-            payload.update(
-                _project_pass_receipt_links(
-                    stripe_module,
-                    stripe_session_id=matched_project_pass.stripe_session_id,
-                    stripe_payment_intent_id=matched_project_pass.stripe_payment_intent_id,
-                )
-            )
         payload.update(
             {
                 "active": True,
                 "type": PLAN_PROJECT_PASS,
                 "reason": None,
-                **_serialize_project_pass(matched_project_pass),
+                **matched_project_pass,
             }
         )
         return payload
 
-    legacy_entitlement = _get_active_entitlement(db, normalized_email)
-    if legacy_entitlement is not None:
-        if _stripe_secret_key():
-            stripe_module = _load_stripe_module()
-            _configure_stripe(stripe_module)
-            payload.update(
-                _project_pass_receipt_links(
-                    stripe_module,
-                    stripe_session_id=legacy_entitlement.stripe_session_id,
-                    stripe_payment_intent_id=legacy_entitlement.stripe_payment_intent_id,
-                )
-            )
+    if state.legacy_entitlement is not None:
         payload.update(
             {
                 "active": True,
                 "type": "project_pass_legacy",
                 "reason": None,
-                **_serialize_entitlement(legacy_entitlement),
+                **state.legacy_entitlement,
             }
         )
         return payload
 
-    if not _stripe_secret_key():
-        if project_passes:
-            payload["reason"] = (
-                "project_pass_other_project" if normalized_project_id else "project_selection_required"
-            )
-            if project_passes:
-                payload["bound_project_id"] = project_passes[0].project_id
-                payload["bound_project_name"] = project_passes[0].project_name
+    if _stripe_secret_key():
+        if state.subscription is _UNRESOLVED:
+            stripe_module = _load_stripe_module()
+            _configure_stripe(stripe_module)
+            state.subscription, state.customer_ids = _resolve_subscription(stripe_module, normalized_email)
+            if state.subscription is not None:
+                # An active subscription is a positive state: keep it for the full TTL.
+                state.expires_at = max(state.expires_at, time.monotonic() + _entitlement_cache_ttl_seconds())
+        if state.subscription is not None:
+            payload.update({"active": True, "reason": None, **state.subscription})
             return payload
+
+    if project_passes:
+        payload["reason"] = "project_pass_other_project" if normalized_project_id else "project_selection_required"
+        payload["bound_project_id"] = project_passes[0]["project_id"]
+        payload["bound_project_name"] = project_passes[0]["project_name"]
+        return payload
+
+    if not _stripe_secret_key():
         payload["reason"] = "stripe_not_configured"
+    elif not state.customer_ids:
+        payload["reason"] = "no_customer"
+    else:
+        payload["reason"] = "no_active_subscription"
+    return payload
+
+
+def get_receipt_links(
+    customer_email: str,
+    db: Optional[Session] = None,
+    project_id: Optional[int] = None,
+) -> dict[str, Any]:
+    """Return invoice/receipt links for the purchase behind the current billing status.
+
+    Each lookup is one or more Stripe API calls, so this is only called on demand.
+    """
+    status = check_subscription(customer_email, db=db, project_id=project_id)
+    payload: dict[str, Any] = {
+        "customer_email": status["customer_email"],
+        "project_id": status["project_id"],
+        "type": status["type"],
+    }
+    if not status["customer_email"] or status["type"] == "development_bypass" or not _stripe_secret_key():
         return payload
 
     stripe_module = _load_stripe_module()
     _configure_stripe(stripe_module)
-
-    customers = stripe_module.Customer.list(email=normalized_email, limit=10)
-    customer_rows = list(getattr(customers, "data", []) or [])
-    if not customer_rows:
-        if project_passes:
-            payload["reason"] = (
-                "project_pass_other_project" if normalized_project_id else "project_selection_required"
-            )
-            payload["bound_project_id"] = project_passes[0].project_id
-            payload["bound_project_name"] = project_passes[0].project_name
-            payload.update(
-                _project_pass_receipt_links(
-                    stripe_module,
-                    stripe_session_id=project_passes[0].stripe_session_id,
-                    stripe_payment_intent_id=project_passes[0].stripe_payment_intent_id,
-                )
+    if status.get("subscription_id"):
+        payload.update(
+            _latest_paid_invoice_links(
+                stripe_module,
+                customer_id=status.get("customer_id"),
+                subscription_id=status.get("subscription_id"),
             )
-            return payload
-        payload["reason"] = "no_customer"
-        return payload
-
-    for customer in customer_rows:
-        subscriptions = stripe_module.Subscription.list(
-            customer=customer.get("id"),
-            status="all",
-            limit=50,
         )
-        for subscription in getattr(subscriptions, "data", []) or []:
-            if subscription.get("status") not in ACTIVE_SUBSCRIPTION_STATUSES:
-                continue
-            for item in subscription.get("items", {}).get("data", []) or []:
-                subscription_type = _classify_subscription_item(stripe_module, item)
-                if subscription_type:
-                    receipt_links = _latest_paid_invoice_links(
-                        stripe_module,
-                        customer_id=customer.get("id"),
-                        subscription_id=subscription.get("id"),
-                    )
-                    payload.update(
-                        {
-                            "active": True,
-                            "type": subscription_type,
-                            "reason": None,
-                            "subscription_id": subscription.get("id"),
-                            "customer_id": customer.get("id"),
-                            **receipt_links,
-                        }
-                    )
-                    return payload
+        return payload
 
-    if project_passes:
-        payload["reason"] = (
-            "project_pass_other_project" if normalized_project_id else "project_selection_required"
-        )
-        payload["bound_project_id"] = project_passes[0].project_id
-        payload["bound_project_name"] = project_passes[0].project_name
+    # Matched or legacy pass, otherwise the pass bound to another project.
+    purchase = status if status["active"] else (status["project_passes"] or [None])[0]
+    if purchase:
         payload.update(
             _project_pass_receipt_links(
                 stripe_module,
-                stripe_session_id=project_passes[0].stripe_session_id,
-                stripe_payment_intent_id=project_passes[0].stripe_payment_intent_id,
+                stripe_session_id=purchase.get("stripe_session_id"),
+                stripe_payment_intent_id=purchase.get("stripe_payment_intent_id"),
             )
         )
-        return payload
-
-    payload["reason"] = "no_active_subscription"
     return payload
@@ -0,0 +1,232 @@
+"""Stripe webhook inbox: persist verified events, process them off the request path.
+
+The webhook endpoint only verifies the signature, inserts the event into
+``stripe_webhook_events`` (unique on Stripe's event id) and acknowledges.
+A background worker claims stored events one at a time and applies them with
+``process_webhook_event``; failures are retried with exponential backoff.
+
+A delivery is processed at most once because
+* redeliveries of the same event id hit the unique constraint and are not stored again;
+* a worker only processes an event after atomically moving it from
+  pending/failed to processing (``UPDATE ... WHERE status IN (...)``), so two
+  workers never run the same row. Rows stuck in processing longer than
+  PROCESSING_LEASE_SECONDS (worker crashed) become claimable again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.stripe_webhook_event import StripeWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+CLAIMABLE_STATUSES = ("pending", "failed")
+RETRY_BACKOFF_SECONDS = 30.0
+MAX_RETRY_DELAY_SECONDS = 3600.0
+PROCESSING_LEASE_SECONDS = 300.0
+POLL_BATCH_SIZE = 100
+
+SessionFactory = Callable[[], Session]
+
+
+def _default_session_factory() -> Session:
+    from app.db.session import SessionLocal
+
+    return SessionLocal()
+
+
+def record_webhook_event(db: Session, event: dict[str, Any]) -> Tuple[StripeWebhookEvent, bool]:
+    """Store a verified event; returns (row, created). Duplicates return the existing row."""
+    event_id = str(event.get("id") or "")
+    if not event_id:
+        raise ValueError("Stripe event has no id.")
+
+    row = StripeWebhookEvent(
+        event_id=event_id,
+        event_type=str(event.get("type") or ""),
+        payload=dict(event),
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(row)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = db.scalar(select(StripeWebhookEvent).where(StripeWebhookEvent.event_id == event_id))
+        if existing is None:  # pragma: no cover - the conflicting row was deleted meanwhile
+            raise
+        return existing, False
+    db.refresh(row)
+    return row, True
+
+
+def _claim(db: Session, row_id: int, now: datetime) -> bool:
+    stale = now - timedelta(seconds=PROCESSING_LEASE_SECONDS)
+    result = db.execute(
+        update(StripeWebhookEvent)
+        .where(StripeWebhookEvent.id == row_id)
+        .where(
+            or_(
+                and_(
+                    StripeWebhookEvent.status.in_(CLAIMABLE_STATUSES),
+                    StripeWebhookEvent.next_attempt_at <= now,
+                ),
+                and_(StripeWebhookEvent.status == "processing", StripeWebhookEvent.locked_at < stale),
+            )
+        )
+        .values(status="processing", locked_at=now, attempts=StripeWebhookEvent.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def process_stored_event(row_id: int, session_factory: SessionFactory = _default_session_factory) -> Optional[str]:
+    """Claim and apply one stored event. Returns its new status, or None if not claimed."""
+    from app.services.stripe_billing import process_webhook_event
+
+    db = session_factory()
+    try:
+        now = datetime.now(timezone.utc)
+        if not _claim(db, row_id, now):
+            return None
+        row = db.get(StripeWebhookEvent, row_id, populate_existing=True)
+        try:
+            result = process_webhook_event(event=row.payload, db=db)
+        except Exception as exc:
+            db.rollback()
+            row = db.get(StripeWebhookEvent, row_id, populate_existing=True)
+            if row.attempts >= settings.STRIPE_WEBHOOK_MAX_ATTEMPTS:
+                row.status = "dead"
+                logger.exception("Stripe webhook %s gave up after %d attempts", row.event_id, row.attempts)
+            else:
+                row.status = "failed"
+                delay = min(RETRY_BACKOFF_SECONDS * 2 ** (row.attempts - 1), MAX_RETRY_DELAY_SECONDS)
+                row.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+                logger.warning("Stripe webhook %s failed (attempt %d): %s", row.event_id, row.attempts, exc)
+            row.last_error = f"{type(exc).__name__}: {exc}"
+            row.locked_at = None
+            db.commit()
+            return row.status
+
+        row = db.get(StripeWebhookEvent, row_id, populate_existing=True)
+        row.status = "processed"
+        row.result = result
+        row.last_error = None
+        row.locked_at = None
+        row.processed_at = datetime.now(timezone.utc)
+        db.commit()
+        return row.status
+    finally:
+        db.close()
+
+
+def due_event_ids(db: Session, limit: int = POLL_BATCH_SIZE) -> list[int]:
+    """Ids of events ready to be (re)tried, oldest first."""
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=PROCESSING_LEASE_SECONDS)
+    return list(
+        db.scalars(
+            select(StripeWebhookEvent.id)
+            .where(
+                or_(
+                    and_(
+                        StripeWebhookEvent.status.in_(CLAIMABLE_STATUSES),
+                        StripeWebhookEvent.next_attempt_at <= now,
+                    ),
+                    and_(StripeWebhookEvent.status == "processing", StripeWebhookEvent.locked_at < stale),
+                )
+            )
+            .order_by(StripeWebhookEvent.id)
+            .limit(limit)
+        )
+    )
+
+
+class WebhookWorker:
+    """Per-worker consumer: handles freshly stored events immediately and polls for retries."""
+
+    def __init__(
+        self,
+        session_factory: SessionFactory = _default_session_factory,
+        *,
+        poll_seconds: float = settings.STRIPE_WEBHOOK_POLL_SECONDS,
+    ) -> None:
+        self._session_factory = session_factory
+        self.poll_seconds = poll_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"processed": 0, "failed": 0, "dead": 0, "skipped": 0}
+
+    def start(self) -> None:
+        """Start the worker on the running loop (idempotent)."""
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._run(), name="stripe-webhook-worker")
+
+    async def stop(self) -> None:
+        if self._task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def submit(self, row_id: int) -> None:
+        """Hint that *row_id* was just stored; the poller picks it up otherwise."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            self._queue.put_nowait(row_id)
+
+    async def run_once(self, row_id: int) -> Optional[str]:
+        status = await asyncio.to_thread(process_stored_event, row_id, self._session_factory)
+        self.stats["skipped" if status is None else status] += 1
+        return status
+
+    async def poll(self) -> int:
+        """Process every due event once; returns how many were looked at."""
+        ids = await asyncio.to_thread(self._due_ids)
+        for row_id in ids:
+            await self.run_once(row_id)
+        return len(ids)
+
+    def _due_ids(self) -> list[int]:
+        db = self._session_factory()
+        try:
+            return due_event_ids(db)
+        finally:
+            db.close()
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        while True:
+            try:
+                row_id = await asyncio.wait_for(self._queue.get(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                row_id = None
+            try:
+                if row_id is None:
+                    await self.poll()
+                else:
+                    await self.run_once(row_id)
+            except Exception:
+                logger.exception("Stripe webhook worker iteration failed")
+
+
+stripe_webhook_worker = WebhookWorker()
@@ -0,0 +1,97 @@
+"""Worker warm-up: preload catalogs and templates before taking traffic."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {}
+
+
+def _initial_state() -> Dict[str, Any]:
+    return {
+        "status": "cold",
+        "started_at": None,
+        "completed_at": None,
+        "duration_ms": None,
+        "steps": {},
+        "errors": {},
+    }
+
+
+def reset_warmup() -> None:
+    """Return the worker to the cold state (tests / reloads)."""
+    with _lock:
+        _state.clear()
+        _state.update(_initial_state())
+
+
+def warmup_state() -> Dict[str, Any]:
+    with _lock:
+        return {**_state, "steps": dict(_state["steps"]), "errors": dict(_state["errors"])}
+
+
+def is_warm() -> bool:
+    with _lock:
+        return _state["status"] == "warm"
+
+
+def _warm_bei_catalog() -> Any:
+    from app.services.bei import load_standard_intensities
+
+    return len(load_standard_intensities().get("uses", {}))
+
+
+def _warm_products() -> Any:
+    from app.services.product_index import get_product_index
+    from app.services.products import PRODUCT_CATEGORIES
+
+    return {category: len(get_product_index(category).products) for category in PRODUCT_CATEGORIES}
+
+
+def _warm_excel_templates() -> Any:
+    from app.services.report import preload_templates
+
+    return preload_templates()
+
+
+WARMUP_STEPS: Dict[str, Callable[[], Any]] = {
+    "bei_catalog": _warm_bei_catalog,
+    "products": _warm_products,
+    "excel_templates": _warm_excel_templates,
+}
+
+
+def run_warmup() -> Dict[str, Any]:
+    """Run every warm-up step. A failing step is recorded but does not block readiness."""
+    started = time.perf_counter()
+    with _lock:
+        _state.update(_initial_state())
+        _state["status"] = "warming"
+        _state["started_at"] = datetime.now(timezone.utc).isoformat()
+
+    for name, step in WARMUP_STEPS.items():
+        try:
+            result = step()
+            with _lock:
+                _state["steps"][name] = result
+        except Exception as exc:
+            logger.exception("Warm-up step '%s' failed", name)
+            with _lock:
+                _state["errors"][name] = str(exc)
+
+    with _lock:
+        _state["status"] = "warm"
+        _state["completed_at"] = datetime.now(timezone.utc).isoformat()
+        _state["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Worker warm-up finished in %.1fms", _state["duration_ms"])
+    return warmup_state()
+
+
+reset_warmup()
@@ -163,7 +163,7 @@ export default function Projects() {
                           : '-'}
                       </td>
                       <td className="py-3.5 px-5">
-                        {(project.result || project.result_data) ? (
+                        {(project.result || project.result_data || project.has_result) ? (
                           <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-green-50 text-green-700">計算済み</span>
                         ) : (
                           <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-amber-50 text-amber-700">未計算</span>
@@ -208,7 +208,7 @@ export default function Projects() {
                     <Link href={`/projects/${project.id}`} className="text-primary-800 hover:text-accent-500 font-medium transition-colors text-sm flex-1 min-w-0 truncate">
                       {project.projectInfo?.name || project.name}
                     </Link>
-                    {(project.result || project.result_data) ? (
+                    {(project.result || project.result_data || project.has_result) ? (
                       <span className="inline-flex items-center px-2 py-0.5 rounded-full text-xs font-medium bg-green-50 text-green-700 flex-shrink-0 ml-2">計算済み</span>
                     ) : (
                       <span className="inline-flex items-center px-2 py-0.5 rounded-full text-xs font-medium bg-amber-50 text-amber-700 flex-shrink-0 ml-2">未計算</span>
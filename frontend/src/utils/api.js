@@ -272,6 +272,18 @@ export const billingAPI = {
       });
   },
 
+  getReceipts: async (email, projectId = null) => {
+    if (isBillingBypass()) {
+      return { data: { customer_email: email || null, project_id: projectId || null, type: 'development_bypass' }, status: 200 };
+    }
+    return apiClient.get('/billing/receipts', {
+      params: {
+        email,
+        ...(projectId ? { project_id: projectId } : {}),
+      },
+    });
+  },
+
   createCheckout: async (payload) => {
     if (isBillingBypass()) {
         return {
@@ -345,8 +357,7 @@ export const contactAPI = {
           message: 'お問い合わせを受け付けました。',
           inquiry_id: Date.now(),
           stored: true,
-          notification_sent: true,
-          auto_reply_sent: true,
+          notification_queued: true,
           support_email: process.env.NEXT_PUBLIC_CONTACT_EMAIL || 'rse-support@archi-prisma.co.jp',
         },
         status: 200,
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Fill projects.bei / floor_area / is_compliant from stored result_data.
+
+New calculations set these columns directly; run this once after deploying
+the project list projection so older projects show their headline metrics.
+
+Usage: python -m scripts.backfill_project_metrics [--batch-size N]
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.models.project import Project
+from app.services.calculation import headline_metrics
+
+
+def backfill(db, batch_size: int = 200) -> int:
+    updated = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(Project)
+            .filter(Project.id > last_id, Project.result_data.isnot(None), Project.bei.is_(None))
+            .order_by(Project.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return updated
+        for project in rows:
+            for column, value in headline_metrics(project.input_data, project.result_data).items():
+                setattr(project, column, value)
+            updated += 1
+        last_id = rows[-1].id
+        db.commit()
+        db.expunge_all()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        count = backfill(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Backfilled headline metrics for {count} projects")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
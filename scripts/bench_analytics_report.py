@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Benchmark manufacturer report latency on a synthetic product_events table.
+
+Builds a throwaway database with N synthetic events (10M by default), then times:
+
+* ``before``       - the original report: seven queries over the raw table with
+                     only single-column indexes and no time window;
+* ``raw_indexed``  - the same queries bounded by ``months`` with the composite
+                     (manufacturer, created_at) / (category, event_type, created_at)
+                     indexes in place;
+* ``after``        - the served endpoint, ``manufacturer_report`` over
+                     ``product_event_daily``.
+
+Usage: python -m scripts.bench_analytics_report [--rows N] [--months M] [--db PATH] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import extract, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.v1.analytics import manufacturer_report
+from app.db.base import Base
+from app.db.schema import ensure_indexes, register_models
+from app.models.product_event import ProductEvent
+from app.models.referral import Referral
+from app.services.analytics_rollup import rebuild_daily_rollups, report_window_start
+
+DEFAULT_ROWS = 10_000_000
+INSERT_CHUNK = 20_000
+HISTORY_DAYS = 730
+COMPOSITE_INDEXES = [index.name for index in ProductEvent.__table__.indexes if len(index.columns) > 1] + [
+    "ix_product_events_created_at"
+]
+
+CATEGORIES = ["windows", "insulation", "hvac", "lighting", "water_heater", "solar"]
+USES = ["office", "hotel", "hospital", "shop", "school", None]
+# A long tail of manufacturers; the first few account for most selections.
+MANUFACTURERS = ["YKK AP", "LIXIL", "パナソニック", "ダイキン", "三菱電機"] + [f"メーカー{i:02d}" for i in range(35)]
+MANUFACTURER_WEIGHTS = [20, 18, 12, 10, 8] + [1] * 35
+
+
+def synthetic_events(rows: int, seed: int = 42, today: Optional[date] = None):
+    """Yield lists of event rows spread uniformly over the last HISTORY_DAYS days."""
+    rng = random.Random(seed)
+    end = datetime.combine(today or datetime.now(timezone.utc).date(), dt_time(), timezone.utc)
+    start = end - timedelta(days=HISTORY_DAYS - 1)
+    span = HISTORY_DAYS * 86400 - 1
+    produced = 0
+    while produced < rows:
+        size = min(INSERT_CHUNK, rows - produced)
+        manufacturers = rng.choices(MANUFACTURERS, weights=MANUFACTURER_WEIGHTS, k=size)
+        chunk = []
+        for manufacturer in manufacturers:
+            category = rng.choice(CATEGORIES)
+            chunk.append(
+                {
+                    "event_type": "selected" if rng.random() < 0.8 else "viewed",
+                    "product_id": f"{category}-{rng.randrange(500)}",
+                    "product_name": "製品",
+                    "manufacturer": manufacturer,
+                    "category": category,
+                    "building_zone": rng.randint(1, 8) if rng.random() < 0.9 else None,
+                    "building_use": rng.choice(USES),
+                    "floor_area": None,
+                    "created_at": start + timedelta(seconds=rng.randrange(span)),
+                }
+            )
+        produced += size
+        yield chunk
+
+
+async def raw_report(db: AsyncSession, manufacturer: str, since: Optional[date] = None) -> Dict[str, Any]:
+    """The pre-rollup report queries against product_events, optionally time-bounded."""
+    events = ProductEvent
+
+    def scoped(stmt):
+        if since is not None:
+            stmt = stmt.where(events.created_at >= datetime.combine(since, dt_time(), timezone.utc))
+        return stmt
+
+    own = events.manufacturer == manufacturer
+    selections = await db.scalar(
+        scoped(select(func.count(events.id)).where(own).where(events.event_type == "selected"))
+    )
+    by_category = dict(
+        (await db.execute(scoped(select(events.category, func.count(events.id)).where(own)).group_by(events.category))).all()
+    )
+    by_zone = dict(
+        (
+            await db.execute(
+                scoped(select(events.building_zone, func.count(events.id)).where(own))
+                .where(events.building_zone.isnot(None))
+                .group_by(events.building_zone)
+            )
+        ).all()
+    )
+    by_use = dict(
+        (
+            await db.execute(
+                scoped(select(events.building_use, func.count(events.id)).where(own))
+                .where(events.building_use.isnot(None))
+                .group_by(events.building_use)
+            )
+        ).all()
+    )
+    year = extract("year", events.created_at).label("year")
+    month = extract("month", events.created_at).label("month")
+    by_month = (
+        await db.execute(
+            scoped(select(year, month, func.count(events.id).label("count")).where(own))
+            .group_by("year", "month")
+            .order_by("year", "month")
+        )
+    ).all()
+    leads = await db.scalar(select(func.count(Referral.id)).where(Referral.manufacturer == manufacturer))
+    competitors = {}
+    for category in by_category:
+        competitors[category] = (
+            await db.execute(
+                scoped(select(events.manufacturer, func.count(events.id).label("cnt")))
+                .where(events.category == category)
+                .where(events.event_type == "selected")
+                .group_by(events.manufacturer)
+                .order_by(func.count(events.id).desc())
+                .limit(5)
+            )
+        ).all()
+    return {
+        "total_selections": selections or 0,
+        "total_leads": leads or 0,
+        "by_category": by_category,
+        "by_zone": by_zone,
+        "by_use": by_use,
+        "by_month": by_month,
+        "competitor_comparison": competitors,
+    }
+
+
+async def _time(fn: Callable[[], Awaitable[Any]], repeat: int) -> Dict[str, Any]:
+    samples: List[float] = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = await fn()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return {"median_ms": round(statistics.median(samples), 2), "samples_ms": [round(s, 2) for s in samples], "result": result}
+
+
+async def run_benchmark(
+    database_url: str,
+    rows: int,
+    *,
+    manufacturer: str = "YKK AP",
+    months: int = 3,
+    repeat: int = 3,
+    log: Callable[[str], None] = lambda message: None,
+) -> Dict[str, Any]:
+    register_models()
+    engine = create_async_engine(database_url)
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    timings: Dict[str, Any] = {"rows": rows, "manufacturer": manufacturer, "months": months}
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            # Start from the old schema: single-column indexes only.
+            for name in COMPOSITE_INDEXES:
+                await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            for i, chunk in enumerate(synthetic_events(rows)):
+                await conn.execute(insert(ProductEvent), chunk)
+                if i % 50 == 0:
+                    log(f"inserted {i * INSERT_CHUNK + len(chunk):,} / {rows:,}")
+        timings["load_s"] = round(time.perf_counter() - started, 1)
+        if engine.dialect.name == "sqlite":
+            async with engine.begin() as conn:
+                await conn.execute(text("ANALYZE"))
+
+        since = report_window_start(months)
+        async with Session() as db:
+            log("timing before (raw, unbounded, single-column indexes)")
+            before = await _time(lambda: raw_report(db, manufacturer), repeat)
+
+        started = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.run_sync(ensure_indexes)
+            if engine.dialect.name == "sqlite":
+                await conn.execute(text("ANALYZE"))
+        timings["create_indexes_s"] = round(time.perf_counter() - started, 1)
+
+        async with Session() as db:
+            log("timing raw_indexed (raw, months window, composite indexes)")
+            raw_indexed = await _time(lambda: raw_report(db, manufacturer, since), repeat)
+
+            started = time.perf_counter()
+            timings["rollup_rows"] = await rebuild_daily_rollups(db)
+            timings["rebuild_rollups_s"] = round(time.perf_counter() - started, 1)
+
+            log("timing after (rollup report)")
+            after = await _time(lambda: manufacturer_report(manufacturer, months=months, db=db), repeat)
+    finally:
+        await engine.dispose()
+
+    timings["before"] = {k: v for k, v in before.items() if k != "result"}
+    timings["raw_indexed"] = {k: v for k, v in raw_indexed.items() if k != "result"}
+    timings["after"] = {k: v for k, v in after.items() if k != "result"}
+    timings["consistent"] = after["result"]["total_selections"] == raw_indexed["result"]["total_selections"]
+    timings["speedup"] = round(before["median_ms"] / max(after["median_ms"], 1e-3), 1)
+    return timings
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--manufacturer", default="YKK AP")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--db", help="SQLite file to (re)create; defaults to a temporary file")
+    parser.add_argument("--database-url", help="async SQLAlchemy URL instead of --db (tables are dropped!)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args(argv)
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        path = args.db
+        if path is None:
+            tmpdir = tempfile.TemporaryDirectory()
+            path = os.path.join(tmpdir.name, "bench_analytics.db")
+        elif os.path.exists(path):
+            os.remove(path)
+        url = f"sqlite+aiosqlite:///{path}"
+
+    log = (lambda message: None) if args.json else (lambda message: print(f"  {message}", flush=True))
+    try:
+        result = asyncio.run(
+            run_benchmark(url, args.rows, manufacturer=args.manufacturer, months=args.months, repeat=args.repeat, log=log)
+        )
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(f"rows={result['rows']:,} load={result['load_s']}s indexes={result['create_indexes_s']}s "
+              f"rollup={result['rebuild_rollups_s']}s ({result['rollup_rows']:,} rows)")
+        for name in ("before", "raw_indexed", "after"):
+            print(f"{name:>12}: {result[name]['median_ms']:>10.2f} ms (median of {args.repeat})")
+        print(f"     speedup: {result['speedup']}x  consistent={result['consistent']}")
+    return 0 if result["consistent"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Measure application cold-start import cost and exit non-zero on budget regression.
+
+Runs ``python -X importtime -c "import app.main"`` in fresh interpreters, takes the
+median cumulative import time of ``app.main`` and checks that heavy optional
+dependencies stay off the startup path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+TARGET_MODULE = "app.main"
+DEFAULT_BUDGET_MS = 2500.0
+
+# Dependencies that must only be imported on first use (official API, billing, AI).
+LAZY_MODULES = ("openpyxl", "requests", "httpx", "stripe", "anthropic", "reportlab")
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Return {module: cumulative_us} from ``-X importtime`` output."""
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # header row
+        cumulative[parts[2].strip()] = cumulative_us
+    return cumulative
+
+
+def measure_once(target: str = TARGET_MODULE) -> Dict[str, int]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH", "")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def evaluate_startup(runs: int, budget_ms: float, target: str = TARGET_MODULE) -> dict:
+    samples: List[float] = []
+    eager: set[str] = set()
+    for _ in range(runs):
+        modules = measure_once(target)
+        samples.append(modules.get(target, 0) / 1000)
+        eager.update(name for name in LAZY_MODULES if name in modules)
+
+    median_ms = statistics.median(samples)
+    checks = {
+        "within_budget": median_ms <= budget_ms,
+        "heavy_modules_lazy": not eager,
+    }
+    return {
+        "ok": all(checks.values()),
+        "target": target,
+        "median_ms": round(median_ms, 1),
+        "samples_ms": [round(value, 1) for value in samples],
+        "budget_ms": budget_ms,
+        "eager_heavy_modules": sorted(eager),
+        "checks": checks,
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check application cold-start import time.")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to sample.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)),
+        help="Maximum median cumulative import time of app.main.",
+    )
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    return parser.parse_args()
+
+
+def _render_text(result: dict) -> str:
+    lines = [
+        f"Startup import: {'PASS' if result['ok'] else 'FAIL'}",
+        f"Median import {result['target']}: {result['median_ms']}ms (budget {result['budget_ms']}ms)",
+        f"Samples: {', '.join(str(v) for v in result['samples_ms'])}",
+        "Checks:",
+    ]
+    for name, ok in result["checks"].items():
+        lines.append(f"  - {name}: {'ok' if ok else 'ng'}")
+    if result["eager_heavy_modules"]:
+        lines.append(f"Eagerly imported: {', '.join(result['eager_heavy_modules'])}")
+    return "\n".join(lines)
+
+
+def main() -> int:
+    args = _parse_args()
+    result = evaluate_startup(args.runs, args.budget_ms)
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(_render_text(result))
+    return 0 if result["ok"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Import data/products/*.yaml into the products table and report throughput.
+
+Usage: python -m scripts.import_products [--category windows] [--incremental]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+
+from app.db.session import SessionLocal
+from app.services.product_import import DEFAULT_BATCH_SIZE, bulk_import_category
+from app.services.products import PRODUCT_CATEGORIES
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--category", action="append", choices=PRODUCT_CATEGORIES)
+    parser.add_argument("--incremental", action="store_true", help="skip rows whose content hash is unchanged")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        results = [
+            bulk_import_category(db, category, incremental=args.incremental, batch_size=args.batch_size)
+            for category in (args.category or PRODUCT_CATEGORIES)
+        ]
+    finally:
+        db.close()
+
+    if args.json:
+        print(json.dumps([stats.as_dict() for stats in results], ensure_ascii=False, indent=2))
+        return 0
+    for stats in results:
+        print(
+            f"{stats.category:<12} total={stats.total:<6} inserted={stats.inserted:<6} "
+            f"updated={stats.updated:<6} skipped={stats.skipped:<6} {stats.rows_per_sec:,.0f} rows/s"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
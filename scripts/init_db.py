@@ -7,13 +7,13 @@ from sqlalchemy import create_engine, text
 from app.core.config import settings
 from app.models.user import User
 from app.models.project import Project
-from app.db.base import Base
+from app.db.schema import create_schema
 
 
 def create_tables():
     """テーブル作成"""
     engine = create_engine(settings.DATABASE_URL)
-    Base.metadata.create_all(bind=engine)
+    create_schema(engine)
     print("データベーステーブルを作成しました")
     return engine
 
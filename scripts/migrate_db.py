@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Apply database schema once per deploy, before web workers start.
+
+Also backfills derived tables (analytics daily rollups, referral monthly
+stats) from history the first time they are deployed.
+
+Usage: python -m scripts.migrate_db
+"""
+
+from __future__ import annotations
+
+from app.core.config import settings
+from app.db.schema import create_schema
+from app.db.session import SessionLocal, engine
+from app.services.analytics_rollup import backfill_daily_rollups
+from app.services.referral_stats import backfill_referral_stats
+
+
+def main() -> int:
+    create_schema(engine)
+    print(f"Schema up to date: {settings.DATABASE_URL.split('@')[-1][:50]}")
+
+    with SessionLocal() as db:
+        rollup_rows = backfill_daily_rollups(db)
+        referral_rows = backfill_referral_stats(db)
+    if rollup_rows is not None:
+        print(f"Backfilled {rollup_rows} analytics rollup rows")
+    if referral_rows is not None:
+        print(f"Backfilled {referral_rows} referral stats rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
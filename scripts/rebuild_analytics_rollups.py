@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Rebuild product_event_daily from product_events.
+
+Run periodically (e.g. nightly with --days 2) to reconcile the incrementally
+maintained rollups, or without arguments for a full backfill.
+
+Usage: python -m scripts.rebuild_analytics_rollups [--days N | --since YYYY-MM-DD]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+from app.db.session import AsyncSessionLocal, dispose_async_engine
+from app.services.analytics_rollup import rebuild_daily_rollups
+
+
+async def _rebuild(since):
+    try:
+        async with AsyncSessionLocal() as db:
+            return await rebuild_daily_rollups(db, since=since)
+    finally:
+        await dispose_async_engine()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument("--days", type=int, help="rebuild the last N days (UTC), including today")
+    window.add_argument("--since", type=date.fromisoformat, help="rebuild from this UTC day onwards")
+    args = parser.parse_args(argv)
+
+    since = args.since
+    if args.days is not None:
+        since = datetime.now(timezone.utc).date() - timedelta(days=max(args.days - 1, 0))
+
+    count = asyncio.run(_rebuild(since))
+    print(f"Rebuilt {count} rollup rows" + (f" since {since.isoformat()}" if since else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
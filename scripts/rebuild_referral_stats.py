@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""Rebuild referral_monthly_stats from the referrals table.
+
+Run after bulk edits made outside the API (SQL imports, manual fixes) to
+reconcile the incrementally maintained referral rollup.
+
+Usage: python -m scripts.rebuild_referral_stats
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.referral_stats import rebuild_referral_stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        count = rebuild_referral_stats(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {count} referral rollup rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,24 @@
 """Tests for AI product recommendation engine."""
 
-from app.services.ai_recommend import build_recommendation_prompt, parse_recommendation
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.session import get_async_db
+from app.main import app
+from app.services import ai_recommend
+from app.services.ai_recommend import (
+    RecommendationStreamParser,
+    build_recommendation_prompt,
+    get_ai_recommendations,
+    parse_recommendation,
+    stream_ai_recommendations,
+)
+from app.services.product_index import invalidate_product_index
 
 
 class TestRecommendationPrompt:
@@ -49,3 +67,223 @@ class TestParseRecommendation:
         assert results[0]["product_id"] == "ykk-apw430-sliding"
         assert results[0]["category"] == "windows"
         assert "APW430" in results[0]["reason"]
+
+
+class TestRecommendationCache:
+    RAW = """
+    [RECOMMEND]
+    category: windows
+    product_id: ykk-apw430-sliding
+    reason: 断熱性能が高い。
+    estimated_bei_impact: -0.08
+    [/RECOMMEND]
+    """
+
+    def _install_fake_client(self, monkeypatch, delay: float = 0.0):
+        calls = []
+
+        async def fake_complete(prompt: str) -> str:
+            calls.append(prompt)
+            await asyncio.sleep(delay)
+            return self.RAW
+
+        ai_recommend.reset_recommendation_cache()
+        monkeypatch.setattr(ai_recommend, "ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(ai_recommend, "_complete", fake_complete)
+        return calls
+
+    def test_concurrent_identical_requests_share_one_call(self, monkeypatch) -> None:
+        calls = self._install_fake_client(monkeypatch, delay=0.05)
+
+        async def scenario():
+            return await asyncio.gather(
+                *[get_ai_recommendations(zone=6, use="office", floor_area=500 + i, current_bei=1.0) for i in range(10)]
+            )
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(r == results[0] for r in results)
+        assert results[0][0]["product"]["id"] == "ykk-apw430-sliding"
+
+        results[0][0]["reason"] = "mutated"
+        again = asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=800, current_bei=1.01))
+        assert len(calls) == 1
+        assert again[0]["reason"] == "断熱性能が高い。"
+
+    def test_cache_key_separates_buckets_and_catalog_versions(self, monkeypatch) -> None:
+        calls = self._install_fake_client(monkeypatch)
+
+        def request(**kwargs):
+            params = {"zone": 6, "use": "office", "floor_area": 500, "current_bei": 1.0, **kwargs}
+            return asyncio.run(get_ai_recommendations(**params))
+
+        request()
+        request(floor_area=2500)
+        request(current_bei=0.8)
+        request(zone=5)
+        assert len(calls) == 4
+
+        invalidate_product_index("windows")
+        request()
+        assert len(calls) == 5
+
+    def test_errors_are_not_cached(self, monkeypatch) -> None:
+        calls = self._install_fake_client(monkeypatch)
+
+        async def failing(prompt: str) -> str:
+            calls.append(prompt)
+            raise RuntimeError("upstream down")
+
+        monkeypatch.setattr(ai_recommend, "_complete", failing)
+        with pytest.raises(RuntimeError):
+            asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=500))
+        with pytest.raises(RuntimeError):
+            asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=500))
+        assert len(calls) == 2
+
+    def test_leader_disconnect_does_not_cancel_the_shared_call(self, monkeypatch) -> None:
+        calls = self._install_fake_client(monkeypatch, delay=0.05)
+
+        async def scenario():
+            leader = asyncio.ensure_future(get_ai_recommendations(zone=6, use="office", floor_area=500))
+            await asyncio.sleep(0)
+            waiters = [get_ai_recommendations(zone=6, use="office", floor_area=600) for _ in range(3)]
+            gathered = asyncio.gather(*waiters)
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            return await gathered
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert [r[0]["product_id"] for r in results] == ["ykk-apw430-sliding"] * 3
+
+    def test_empty_replies_are_not_cached(self, monkeypatch) -> None:
+        calls = self._install_fake_client(monkeypatch)
+
+        async def empty(prompt: str) -> str:
+            calls.append(prompt)
+            return ""
+
+        monkeypatch.setattr(ai_recommend, "_complete", empty)
+        assert asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=500)) == []
+        assert asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=500)) == []
+        assert len(calls) == 2
+
+
+class TestStreamingRecommendations:
+    RAW = TestRecommendationCache.RAW + """
+    [RECOMMEND]
+    category: hvac
+    product_id: daikin-vrv-x
+    reason: APFが高い。
+    estimated_bei_impact: -0.05
+    [/RECOMMEND]
+    """
+
+    def test_stream_parser_matches_batch_parser_for_any_chunking(self) -> None:
+        expected = parse_recommendation(self.RAW)
+        for size in (1, 3, 7, 64, len(self.RAW)):
+            parser = RecommendationStreamParser()
+            found = []
+            for start in range(0, len(self.RAW), size):
+                found.extend(parser.feed(self.RAW[start : start + size]))
+            assert found == expected
+
+    def test_blocks_are_yielded_before_the_reply_finishes(self, monkeypatch) -> None:
+        ai_recommend.reset_recommendation_cache()
+        monkeypatch.setattr(ai_recommend, "ANTHROPIC_API_KEY", "test-key")
+        first_block_end = self.RAW.index("[/RECOMMEND]") + len("[/RECOMMEND]")
+        sent = []
+
+        async def fake_stream(prompt: str):
+            for start in range(0, len(self.RAW), 5):
+                await asyncio.sleep(0)  # network read
+                sent.append(start + 5)
+                yield self.RAW[start : start + 5]
+
+        monkeypatch.setattr(ai_recommend, "_stream_completion", fake_stream)
+
+        async def scenario():
+            seen = []
+            async for rec in stream_ai_recommendations(zone=6, use="office", floor_area=500):
+                seen.append((rec["product_id"], sent[-1]))
+            return seen
+
+        seen = asyncio.run(scenario())
+        assert [product_id for product_id, _ in seen] == ["ykk-apw430-sliding", "daikin-vrv-x"]
+        assert seen[0][1] < first_block_end + 5
+        # A completed stream fills the shared cache.
+        monkeypatch.setattr(ai_recommend, "_complete", None)
+        cached = asyncio.run(get_ai_recommendations(zone=6, use="office", floor_area=500))
+        assert [r["product_id"] for r in cached] == ["ykk-apw430-sliding", "daikin-vrv-x"]
+
+    def test_concurrent_streams_and_batch_calls_share_one_upstream_stream(self, monkeypatch) -> None:
+        ai_recommend.reset_recommendation_cache()
+        monkeypatch.setattr(ai_recommend, "ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(ai_recommend, "_complete", None)
+        calls = []
+
+        async def fake_stream(prompt: str):
+            calls.append(prompt)
+            for start in range(0, len(self.RAW), 20):
+                await asyncio.sleep(0.001)
+                yield self.RAW[start : start + 20]
+
+        monkeypatch.setattr(ai_recommend, "_stream_completion", fake_stream)
+
+        async def collect():
+            return [rec["product_id"] async for rec in stream_ai_recommendations(zone=6, use="office", floor_area=500)]
+
+        async def scenario():
+            first = asyncio.ensure_future(collect())
+            await asyncio.sleep(0.005)
+            return await asyncio.gather(
+                first,
+                collect(),
+                get_ai_recommendations(zone=6, use="office", floor_area=500),
+            )
+
+        first, joined, batch = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert first == joined == ["ykk-apw430-sliding", "daikin-vrv-x"]
+        assert [r["product_id"] for r in batch] == first
+
+    def test_sse_endpoint_sends_cache_hit_as_one_event(self, monkeypatch) -> None:
+        ai_recommend.reset_recommendation_cache()
+        monkeypatch.setattr(ai_recommend, "ANTHROPIC_API_KEY", "test-key")
+        key = ai_recommend.recommendation_cache_key(zone=6, use="office", floor_area=500)
+        ai_recommend._cache_put(key, parse_recommendation(self.RAW))
+        monkeypatch.setattr(ai_recommend, "_stream_completion", None)
+
+        events = self._stream_events()
+        assert events == ["local", "recommendations", "done"]
+
+    def _stream_events(self):
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+        async def override_db():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            async with async_sessionmaker(engine)() as db:
+                yield db
+
+        app.dependency_overrides[get_async_db] = override_db
+        try:
+            client = TestClient(app)
+            params = {"zone": 6, "use": "office", "floor_area": 500}
+            response = client.get("/api/v1/products/recommend/stream", params=params)
+        finally:
+            app.dependency_overrides.pop(get_async_db, None)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return [line.split(": ", 1)[1] for line in response.text.splitlines() if line.startswith("event: ")]
+
+    def test_sse_endpoint_sends_local_then_ai_events(self, monkeypatch) -> None:
+        ai_recommend.reset_recommendation_cache()
+        monkeypatch.setattr(ai_recommend, "ANTHROPIC_API_KEY", "test-key")
+
+        async def fake_stream(prompt: str):
+            yield self.RAW
+
+        monkeypatch.setattr(ai_recommend, "_stream_completion", fake_stream)
+        assert self._stream_events() == ["local", "recommendation", "recommendation", "done"]
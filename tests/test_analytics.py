@@ -1,83 +1,304 @@
 """Tests for analytics aggregation endpoints."""
 
 import asyncio
+from collections import Counter
+from datetime import date, datetime, time, timezone
 
-from sqlalchemy import create_engine
+from fastapi import Response
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from app.api.v1.analytics import analytics_overview, manufacturer_report
 from app.db.base import Base
 from app.models.product_event import ProductEvent
+from app.models.product_event_daily import ProductEventDaily
 from app.models.referral import Referral
+from app.services.analytics_counters import OverviewCounters, overview_counters
+from app.services.analytics_rollup import (
+    _rebuild_statements,
+    backfill_daily_rollups,
+    rebuild_daily_rollups,
+    report_window_start,
+)
+from app.services.event_ingest import write_product_events
 
 
-def _make_db_session():
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
-    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    return engine, session
+def _make_async_engine():
+    return create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+
+async def _overview(db, headers=None):
+    request = Request({"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]})
+    response = Response()
+    result = await analytics_overview(request=request, response=response, db=db)
+    if isinstance(result, Response):
+        return result.status_code, None, result.headers
+    return 200, result, response.headers
 
 
 def test_manufacturer_report_and_overview() -> None:
-    engine, db = _make_db_session()
+    async def scenario() -> None:
+        engine = _make_async_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        TestingSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with TestingSessionLocal() as db:
+                db.add_all(
+                    [
+                        ProductEvent(
+                            event_type="selected",
+                            product_id="ykk-apw430-sliding",
+                            product_name="APW 430 引違い窓",
+                            manufacturer="YKK AP",
+                            category="windows",
+                            building_zone=6,
+                            building_use="office",
+                        ),
+                        ProductEvent(
+                            event_type="selected",
+                            product_id="ykk-apw330-fix",
+                            product_name="APW 330 FIX窓",
+                            manufacturer="YKK AP",
+                            category="windows",
+                            building_zone=5,
+                            building_use="office",
+                        ),
+                        ProductEvent(
+                            event_type="selected",
+                            product_id="panasonic-id-standard",
+                            product_name="iDシリーズ 一般タイプ",
+                            manufacturer="パナソニック",
+                            category="lighting",
+                            building_zone=6,
+                            building_use="office",
+                        ),
+                    ]
+                )
+                db.add(
+                    Referral(
+                        architect_name="A",
+                        architect_email="a@example.com",
+                        product_category="windows",
+                        product_id="ykk-apw430-sliding",
+                        product_name="APW 430 引違い窓",
+                        manufacturer="YKK AP",
+                        status="pending",
+                    )
+                )
+                await db.commit()
+                await rebuild_daily_rollups(db)
+
+                ykk = await manufacturer_report("YKK AP", months=3, db=db)
+                assert ykk["manufacturer"] == "YKK AP"
+                assert ykk["total_selections"] == 2
+                assert ykk["total_leads"] == 1
+                assert ykk["by_category"]["windows"] == 2
+                assert ykk["by_zone"][6] == 1
+
+                overview_counters.reset()
+                _, overview, _ = await _overview(db)
+                assert overview["total_calculations"] == 3
+                assert overview["total_leads"] == 1
+                assert overview["by_manufacturer"]["YKK AP"] == 2
+        finally:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_report_window_start_counts_calendar_months() -> None:
+    assert report_window_start(1, date(2026, 3, 15)) == date(2026, 3, 1)
+    assert report_window_start(3, date(2026, 3, 15)) == date(2026, 1, 1)
+    assert report_window_start(4, date(2026, 3, 15)) == date(2025, 12, 1)
+    assert report_window_start(12, date(2026, 1, 31)) == date(2025, 2, 1)
+
+
+def test_incremental_rollups_match_rebuild_and_raw_events(monkeypatch) -> None:
+    # Three consecutive calendar months ending with the current one.
+    month_starts = [report_window_start(n) for n in (3, 2, 1)]
+    rows = [
+        {
+            "event_type": "selected",
+            "product_id": f"p-{i}",
+            "product_name": "製品",
+            "manufacturer": ["YKK AP", "LIXIL", "パナソニック"][i % 3],
+            "category": "windows" if i % 3 != 2 else "lighting",
+            "building_zone": (i % 8) + 1 if i % 5 else None,
+            "building_use": "office" if i % 4 else None,
+            "created_at": datetime.combine(month_starts[(i // 3) % 3], time(10), timezone.utc),
+        }
+        for i in range(90)
+    ]
+
+    async def scenario():
+        engine = _make_async_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        TestingSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr("app.db.session.AsyncSessionLocal", TestingSessionLocal)
+        try:
+            overview_counters.reset()
+            await write_product_events(rows[:40])
+            await write_product_events(rows[40:])
+            async with TestingSessionLocal() as db:
+                incremental = await _rollup_snapshot(db)
+                report = await manufacturer_report("YKK AP", months=3, db=db)
+                current_month = await manufacturer_report("YKK AP", months=1, db=db)
+                _, overview, _ = await _overview(db)
+                await rebuild_daily_rollups(db)
+                assert await _rollup_snapshot(db) == incremental
+        finally:
+            await engine.dispose()
+        return report, current_month, overview
+
+    report, current_month, overview = asyncio.run(scenario())
+    ykk = [r for r in rows if r["manufacturer"] == "YKK AP"]
+    assert report["total_selections"] == len(ykk)
+    assert report["by_zone"] == dict(Counter(r["building_zone"] for r in ykk if r["building_zone"]))
+    assert report["by_use"] == {"office": sum(1 for r in ykk if r["building_use"])}
+    assert report["by_month"] == [
+        {"year": d.year, "month": d.month, "count": sum(1 for r in ykk if r["created_at"].date() == d)}
+        for d in month_starts
+    ]
+    assert report["since"] == month_starts[0].isoformat()
+    assert report["competitor_comparison"] == {
+        "windows": [{"manufacturer": "LIXIL", "count": 30}, {"manufacturer": "YKK AP", "count": 30}]
+    }
+    latest = [r for r in ykk if r["created_at"].date() == month_starts[-1]]
+    assert current_month["total_selections"] == len(latest)
+    assert [m["month"] for m in current_month["by_month"]] == [month_starts[-1].month]
+    assert current_month["competitor_comparison"]["windows"][0]["count"] == len(latest)
+    assert overview["total_calculations"] == 90
+    assert overview["by_manufacturer"] == {"LIXIL": 30, "YKK AP": 30, "パナソニック": 30}
+
+
+async def _rollup_snapshot(db):
+    result = await db.execute(
+        select(
+            ProductEventDaily.day,
+            ProductEventDaily.manufacturer,
+            ProductEventDaily.category,
+            ProductEventDaily.building_zone,
+            ProductEventDaily.building_use,
+            ProductEventDaily.count,
+        )
+    )
+    return sorted(tuple(row) for row in result.all())
+
+
+def test_report_benchmark_runs_and_agrees_with_raw_queries(tmp_path) -> None:
+    from scripts.bench_analytics_report import run_benchmark
+
+    result = asyncio.run(run_benchmark(f"sqlite+aiosqlite:///{tmp_path / 'bench.db'}", 3000, repeat=1))
+    assert result["consistent"]
+    assert result["after"]["median_ms"] > 0 and result["before"]["median_ms"] > 0
+
+
+def test_product_event_indexes_cover_report_access_paths() -> None:
+    indexes = {index.name: [c.name for c in index.columns] for index in ProductEvent.__table__.indexes}
+    assert indexes["ix_product_events_manufacturer_created_at"] == ["manufacturer", "created_at"]
+    assert indexes["ix_product_events_category_type_created_at"] == ["category", "event_type", "created_at"]
+    assert indexes["ix_product_events_created_at"] == ["created_at"]
+
+
+def test_overview_is_served_from_incremental_counters_with_validators(monkeypatch) -> None:
+    def selected(manufacturer, n):
+        return [
+            {"event_type": "selected", "product_id": "p", "product_name": "窓", "manufacturer": manufacturer, "category": "windows"}
+            for _ in range(n)
+        ]
+
+    async def scenario():
+        engine = _make_async_engine()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        TestingSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr("app.db.session.AsyncSessionLocal", TestingSessionLocal)
+        overview_counters.reset()
+        statements = []
+        try:
+            await write_product_events(selected("LIXIL", 2))
+            async with TestingSessionLocal() as db:
+                status, first, headers = await _overview(db)
+                assert (status, first["by_manufacturer"]) == (200, {"LIXIL": 2})
+                etag, last_modified = headers["etag"], headers["last-modified"]
+                assert headers["cache-control"] == "no-cache"
+
+                listen = lambda *args: statements.append(args[2])  # noqa: E731
+                event.listen(engine.sync_engine, "before_cursor_execute", listen)
+                assert (await _overview(db, {"If-None-Match": etag}))[0] == 304
+                assert (await _overview(db, {"If-Modified-Since": last_modified}))[0] == 304
+                event.remove(engine.sync_engine, "before_cursor_execute", listen)
+
+                await write_product_events(selected("YKK AP", 3) + [{**selected("LIXIL", 1)[0], "event_type": "viewed"}])
+                overview_counters.record_leads()
+                status, second, headers = await _overview(db, {"If-None-Match": etag})
+                assert status == 200 and headers["etag"] != etag
+                assert second == {"total_calculations": 5, "total_leads": 1, "by_manufacturer": {"YKK AP": 3, "LIXIL": 2}}
+
+                # Reconciliation replaces drifted counts with the database's.
+                await overview_counters.reconcile(db)
+                _, reconciled, _ = await _overview(db)
+                assert reconciled["total_leads"] == 0
+                assert reconciled["by_manufacturer"] == {"YKK AP": 3, "LIXIL": 2}
+        finally:
+            overview_counters.reset()
+            await engine.dispose()
+        return statements
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_reconcile_keeps_last_modified_when_counts_are_unchanged() -> None:
+    counters = OverviewCounters()
+    counters.replace({"A": 1}, 0)
+    first = counters.snapshot()
+    counters.replace({"A": 1}, 0)
+    assert counters.snapshot() is first
+    counters.replace({"A": 2}, 0)
+    assert counters.snapshot().etag != first.etag
+    assert not first.not_modified('"other"', None)
+    assert first.not_modified(f"W/{first.etag}", None)
+
+
+def test_migrate_backfills_empty_rollups_from_history_once() -> None:
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
     try:
-        db.add_all(
-            [
+        with SessionLocal() as db:
+            assert backfill_daily_rollups(db) is None
+            old = datetime(2025, 3, 31, 23, 30, tzinfo=timezone.utc)
+            db.add_all(
                 ProductEvent(
                     event_type="selected",
-                    product_id="ykk-apw430-sliding",
-                    product_name="APW 430 引違い窓",
+                    product_id=f"p{i}",
+                    product_name="窓",
                     manufacturer="YKK AP",
                     category="windows",
-                    building_zone=6,
-                    building_use="office",
-                ),
-                ProductEvent(
-                    event_type="selected",
-                    product_id="ykk-apw330-fix",
-                    product_name="APW 330 FIX窓",
-                    manufacturer="YKK AP",
-                    category="windows",
-                    building_zone=5,
-                    building_use="office",
-                ),
-                ProductEvent(
-                    event_type="selected",
-                    product_id="panasonic-id-standard",
-                    product_name="iDシリーズ 一般タイプ",
-                    manufacturer="パナソニック",
-                    category="lighting",
-                    building_zone=6,
-                    building_use="office",
-                ),
-            ]
-        )
-        db.add(
-            Referral(
-                architect_name="A",
-                architect_email="a@example.com",
-                product_category="windows",
-                product_id="ykk-apw430-sliding",
-                product_name="APW 430 引違い窓",
-                manufacturer="YKK AP",
-                status="pending",
+                    created_at=old,
+                )
+                for i in range(3)
             )
-        )
-        db.commit()
-
-        ykk = asyncio.run(manufacturer_report("YKK AP", db=db))
-        assert ykk["manufacturer"] == "YKK AP"
-        assert ykk["total_selections"] == 2
-        assert ykk["total_leads"] == 1
-        assert ykk["by_category"]["windows"] == 2
-        assert ykk["by_zone"][6] == 1
-
-        overview = asyncio.run(analytics_overview(db=db))
-        assert overview["total_calculations"] == 3
-        assert overview["total_leads"] == 1
-        assert overview["by_manufacturer"]["YKK AP"] == 2
+            db.commit()
+
+            assert backfill_daily_rollups(db) == 1
+            (row,) = db.scalars(select(ProductEventDaily)).all()
+            assert (row.day, row.count) == (date(2025, 3, 31), 3)
+            # Already filled: later deploys leave the rollup to the incremental path.
+            assert backfill_daily_rollups(db) is None
     finally:
-        db.close()
-        Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+def test_rebuild_buckets_postgresql_timestamps_by_utc_day() -> None:
+    _, fill = _rebuild_statements("postgresql", None)
+    sql = str(fill.compile(dialect=postgresql.dialect()))
+    assert "date(timezone(" in sql
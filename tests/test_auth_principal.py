@@ -0,0 +1,94 @@
+"""Tests for the JWT principal cache used by authenticated endpoints."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import jwt
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import deps
+from app.api.endpoints import auth
+from app.core import security
+from app.core.principal_cache import principal_cache
+from app.db.base import Base
+from app.db.schema import register_models
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    register_models()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    principal_cache.invalidate()
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(User(email="arch@example.com", username="arch", hashed_password="hashed", is_active=True))
+    session.commit()
+    session.queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: session.queries.append(args[2]))
+    yield session
+    session.close()
+    principal_cache.invalidate()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _user(db):
+    return db.query(User).filter(User.email == "arch@example.com").one()
+
+
+def test_login_token_carries_uid_claim(db, monkeypatch) -> None:
+    monkeypatch.setattr(security, "verify_password", lambda plain, hashed: True)
+    form = OAuth2PasswordRequestForm(username="arch@example.com", password="secret")
+    token = asyncio.run(auth._authenticate(db, form)).access_token
+
+    claims = jwt.decode(token, security.SECRET_KEY, algorithms=[security.ALGORITHM])
+    assert claims["sub"] == "arch@example.com"
+    assert claims["uid"] == _user(db).id
+
+
+def test_cached_principal_skips_user_query(db) -> None:
+    user_id = _user(db).id
+    token = security.create_access_token({"sub": "arch@example.com", "uid": user_id})
+    db.queries.clear()
+
+    first = asyncio.run(security.get_current_active_user(asyncio.run(security.get_current_user(db=db, token=token))))
+    assert (first.id, first.email, first.is_active) == (user_id, "arch@example.com", True)
+    assert len(db.queries) == 1
+
+    second = deps.get_current_user(db=db, token=token)
+    assert second == first
+    assert len(db.queries) == 1
+
+
+def test_user_update_invalidates_cached_principal(db) -> None:
+    user = _user(db)
+    token = security.create_access_token({"sub": "arch@example.com", "uid": user.id})
+    assert deps.get_current_user(db=db, token=token).is_active
+
+    user.is_active = False
+    db.commit()
+
+    principal = asyncio.run(security.get_current_user(db=db, token=token))
+    assert principal.is_active is False
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.get_current_active_user(principal))
+    assert exc.value.status_code == 400
+
+
+def test_legacy_and_mismatched_tokens(db) -> None:
+    user_id = _user(db).id
+    legacy = security.create_access_token({"sub": "arch@example.com"})
+    assert deps.get_current_user(db=db, token=legacy).id == user_id
+
+    forged = security.create_access_token({"sub": "other@example.com", "uid": user_id})
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(db=db, token=forged)
+    assert exc.value.status_code == 401
+
+    with pytest.raises(HTTPException):
+        deps.get_current_user(db=db, token="not-a-jwt")
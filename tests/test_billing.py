@@ -1,8 +1,10 @@
 """Tests for billing helpers and endpoints."""
 
 import asyncio
+import time
+from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 import app.models.billing_entitlement  # noqa: F401
@@ -17,6 +19,7 @@ from app.api.v1.billing import (
     confirm_checkout,
     create_checkout,
     open_customer_portal,
+    receipt_links,
     subscription_status,
 )
 from app.db.base import Base
@@ -31,6 +34,7 @@ def _make_db_session():
     engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
     testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
+    stripe_billing.reset_entitlement_cache()
     session = testing_session_local()
     return engine, session
 
@@ -164,6 +168,7 @@ class _FakeStripe:
             if signature != "sig_test":
                 raise ValueError("invalid signature")
             return {
+                "id": "evt_project_pass_paid",
                 "type": "checkout.session.completed",
                 "data": {
                     "object": {
@@ -280,8 +285,11 @@ def test_subscription_status_detects_energy_subscription(monkeypatch) -> None:
         assert payload["active"] is True
         assert payload["type"] == "energy_subscriber"
         assert payload["subscription_id"] == "sub_energy"
-        assert payload["receipt_url"] == "https://receipt.example.com/energy-monthly"
-        assert payload["invoice_pdf_url"] == "https://invoice.example.com/energy-monthly.pdf"
+        assert "receipt_url" not in payload
+
+        receipts = asyncio.run(receipt_links(email="active@example.com", db=db))
+        assert receipts["receipt_url"] == "https://receipt.example.com/energy-monthly"
+        assert receipts["invoice_pdf_url"] == "https://invoice.example.com/energy-monthly.pdf"
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
@@ -455,7 +463,10 @@ def test_confirm_project_pass_checkout_creates_project_scoped_pass(monkeypatch)
         assert status["active"] is True
         assert status["type"] == "project_pass"
         assert status["project_name"] == "テスト案件"
-        assert status["receipt_url"] == "https://receipt.example.com/project-pass"
+        assert "receipt_url" not in status
+
+        receipts = asyncio.run(receipt_links(email="pass@example.com", project_id=101, db=db))
+        assert receipts["receipt_url"] == "https://receipt.example.com/project-pass"
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
@@ -622,3 +633,143 @@ def test_process_webhook_marks_refunded_project_pass(monkeypatch) -> None:
         db.close()
         Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+class _CountingStripe(_FakeStripe):
+    calls = []
+
+    class Customer:
+        @staticmethod
+        def list(email, limit=10):
+            _CountingStripe.calls.append(("Customer.list", email))
+            return _FakeStripe.Customer.list(email, limit)
+
+    class checkout(_FakeStripe.checkout):
+        class Session(_FakeStripe.checkout.Session):
+            @staticmethod
+            def retrieve(session_id):
+                _CountingStripe.calls.append(("checkout.Session.retrieve", session_id))
+                return _FakeStripe.checkout.Session.retrieve(session_id)
+
+
+def test_status_polls_are_served_from_entitlement_cache(monkeypatch) -> None:
+    engine, db = _make_db_session()
+    try:
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test")
+        monkeypatch.setenv("STRIPE_PRICE_ID_ENERGY", "price_energy")
+        monkeypatch.setenv("BILLING_BYPASS", "false")
+        monkeypatch.setattr(stripe_billing, "_load_stripe_module", lambda: _CountingStripe)
+        _CountingStripe.calls = []
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        for _ in range(5):
+            payload = asyncio.run(subscription_status(email="Active@Example.com ", db=db))
+            assert payload["type"] == "energy_subscriber"
+        assert _CountingStripe.calls == [("Customer.list", "active@example.com")]
+        queries_after_first_poll = len(statements)
+
+        asyncio.run(subscription_status(email="active@example.com", db=db))
+        assert len(statements) == queries_after_first_poll
+
+        stripe_billing.process_webhook_event(
+            event={"type": "customer.subscription.deleted", "data": {"object": {"customer": "cus_active"}}},
+            db=db,
+        )
+        asyncio.run(subscription_status(email="active@example.com", db=db))
+        assert len(_CountingStripe.calls) == 2
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_project_pass_status_does_no_stripe_io_and_checkout_invalidates(monkeypatch) -> None:
+    engine, db = _make_db_session()
+    try:
+        _seed_project(db)
+        monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test")
+        monkeypatch.setenv("STRIPE_PRICE_ID_PROJECT_PASS", "price_project_pass")
+        monkeypatch.setenv("BILLING_BYPASS", "false")
+        monkeypatch.setattr(stripe_billing, "_load_stripe_module", lambda: _CountingStripe)
+
+        before = asyncio.run(subscription_status(email="pass@example.com", project_id=101, db=db))
+        assert before["active"] is False
+
+        stripe_billing.confirm_checkout_session(session_id="cs_project_pass_paid", db=db)
+        _CountingStripe.calls = []
+
+        after = asyncio.run(subscription_status(email="pass@example.com", project_id=101, db=db))
+        assert after["active"] is True
+        assert after["type"] == "project_pass"
+        assert _CountingStripe.calls == []
+
+        stripe_billing.process_webhook_event(
+            event={"type": "charge.refunded", "data": {"object": {"payment_intent": "pi_project_pass"}}},
+            db=db,
+        )
+        refunded = asyncio.run(subscription_status(email="pass@example.com", project_id=101, db=db))
+        assert refunded["active"] is False
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_entitlement_cache_expires_with_the_pass(monkeypatch) -> None:
+    engine, db = _make_db_session()
+    try:
+        project = _seed_project(db)
+        monkeypatch.setenv("BILLING_BYPASS", "false")
+        monkeypatch.delenv("STRIPE_SECRET_KEY", raising=False)
+        db.add(
+            BillingProjectPass(
+                email="pass@example.com",
+                project_id=project.id,
+                project_name=project.name,
+                status="active",
+                source="test",
+                stripe_session_id="cs_short",
+                expires_at=datetime.now(timezone.utc) + timedelta(seconds=30),
+            )
+        )
+        db.commit()
+
+        assert stripe_billing.check_subscription("pass@example.com", db=db, project_id=101)["active"] is True
+        (state,) = stripe_billing._entitlement_cache.values()
+        assert state.expires_at - time.monotonic() <= 30
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_states_without_a_pass_are_cached_only_briefly(monkeypatch) -> None:
+    engine, db = _make_db_session()
+    try:
+        _seed_project(db)
+        monkeypatch.setenv("BILLING_BYPASS", "false")
+        monkeypatch.delenv("STRIPE_SECRET_KEY", raising=False)
+        monkeypatch.setenv("BILLING_ENTITLEMENT_NEGATIVE_CACHE_TTL_SECONDS", "0")
+
+        assert stripe_billing.check_subscription("pass@example.com", db=db, project_id=101)["active"] is False
+        # A pass granted by another worker is visible on the next poll here.
+        db.add(
+            BillingProjectPass(
+                email="pass@example.com",
+                project_id=101,
+                project_name="案件",
+                status="active",
+                source="test",
+                stripe_session_id="cs_other_worker",
+                expires_at=datetime.now(timezone.utc) + timedelta(days=30),
+            )
+        )
+        db.commit()
+        assert stripe_billing.check_subscription("pass@example.com", db=db, project_id=101)["active"] is True
+        (state,) = stripe_billing._entitlement_cache.values()
+        assert state.expires_at - time.monotonic() <= 30
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
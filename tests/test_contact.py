@@ -9,7 +9,9 @@ import app.models.contact_inquiry  # noqa: F401
 from app.api.v1.contact import ContactInquiryRequest, contact_config, submit_contact_inquiry
 from app.db.base import Base
 from app.models.contact_inquiry import ContactInquiry
-from app.services import contact as contact_service
+from app.models.email_outbox import EmailOutbox
+from app.services import email_outbox
+from app.services.email_outbox import deliver_due_emails
 
 
 def _make_db_session():
@@ -26,45 +28,69 @@ def test_contact_config_uses_public_email(monkeypatch) -> None:
     assert payload["support_email"] == "hello@example.com"
 
 
-def test_submit_contact_inquiry_stores_and_notifies(monkeypatch) -> None:
+class _FakeSMTP:
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = []
+
+    def send_message(self, msg):
+        if msg["To"] in self.fail_for:
+            raise RuntimeError(f"rejected {msg['To']}")
+        self.sent.append(msg)
+
+    def quit(self):
+        pass
+
+
+def _submit(db, **fields):
+    return asyncio.run(submit_contact_inquiry(req=ContactInquiryRequest(**fields), db=db))
+
+
+def test_submit_contact_inquiry_queues_messages_and_delivery_marks_notified(monkeypatch) -> None:
     engine, db = _make_db_session()
     try:
         monkeypatch.setenv("CONTACT_PUBLIC_EMAIL", "support@example.com")
-
-        def _fake_delivery(_inquiry):
-            return contact_service.ContactDeliveryResult(
-                notification_sent=True,
-                auto_reply_sent=True,
-            )
-
-        monkeypatch.setattr(contact_service, "send_contact_messages", _fake_delivery)
-        monkeypatch.setattr("app.api.v1.contact.send_contact_messages", _fake_delivery)
-
-        payload = asyncio.run(
-            submit_contact_inquiry(
-                req=ContactInquiryRequest(
-                    name="山田太郎",
-                    email="yamada@example.com",
-                    company="山田設計",
-                    category="support",
-                    subject="公式BEIの使い方",
-                    message="使い方を教えてください。",
-                    page_url="https://rakuraku-energy.archi-prisma.co.jp/contact",
-                ),
-                db=db,
-            )
+        monkeypatch.setenv("CONTACT_NOTIFY_EMAIL", "notify@example.com")
+        monkeypatch.setenv("GMAIL_USER", "sender@example.com")
+        monkeypatch.setenv("GMAIL_APP_PASSWORD", "app-password")
+
+        payload = _submit(
+            db,
+            name="山田太郎",
+            email="Yamada@example.com",
+            company="山田設計",
+            category="support",
+            subject="公式BEIの使い方",
+            message="使い方を教えてください。",
+            page_url="https://rakuraku-energy.archi-prisma.co.jp/contact",
         )
 
         assert payload["status"] == "received"
         assert payload["stored"] is True
-        assert payload["notification_sent"] is True
-        assert payload["auto_reply_sent"] is True
+        assert payload["notification_queued"] is True
         assert payload["support_email"] == "support@example.com"
 
         saved = db.query(ContactInquiry).one()
-        assert saved.status == "notified"
+        assert saved.status == "received"
         assert saved.email == "yamada@example.com"
-        assert saved.subject == "公式BEIの使い方"
+        queued = db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+        assert [(m.kind, m.to_email, m.status) for m in queued] == [
+            ("contact_notification", "notify@example.com", "pending"),
+            ("contact_auto_reply", "yamada@example.com", "pending"),
+        ]
+        assert queued[0].reply_to == "yamada@example.com"
+
+        server = _FakeSMTP()
+        stats = deliver_due_emails(sessionmaker(bind=engine), lambda: server)
+        assert stats == {"sent": 2, "failed": 0, "dead": 0}
+        assert [msg["Subject"] for msg in server.sent] == [
+            "[楽々省エネ計算] お問い合わせ: 公式BEIの使い方",
+            "お問い合わせを受け付けました | 楽々省エネ計算",
+        ]
+
+        db.expire_all()
+        saved = db.query(ContactInquiry).one()
+        assert saved.status == "notified"
         assert saved.notification_sent_at is not None
     finally:
         db.close()
@@ -72,39 +98,23 @@ def test_submit_contact_inquiry_stores_and_notifies(monkeypatch) -> None:
         engine.dispose()
 
 
-def test_submit_contact_inquiry_survives_notification_failure(monkeypatch) -> None:
+def test_failed_contact_delivery_is_recorded_on_the_inquiry(monkeypatch) -> None:
     engine, db = _make_db_session()
     try:
-        def _failed_delivery(_inquiry):
-            return contact_service.ContactDeliveryResult(
-                notification_sent=False,
-                auto_reply_sent=False,
-                notification_error="SMTP credentials are not configured.",
-                auto_reply_error="SMTP credentials are not configured.",
-            )
-
-        monkeypatch.setattr(contact_service, "send_contact_messages", _failed_delivery)
-        monkeypatch.setattr("app.api.v1.contact.send_contact_messages", _failed_delivery)
-
-        payload = asyncio.run(
-            submit_contact_inquiry(
-                req=ContactInquiryRequest(
-                    name="佐藤花子",
-                    email="sato@example.com",
-                    subject="料金について",
-                    message="月額の違いを知りたいです。",
-                ),
-                db=db,
-            )
-        )
+        monkeypatch.setenv("CONTACT_NOTIFY_EMAIL", "notify@example.com")
+        monkeypatch.setenv("GMAIL_USER", "sender@example.com")
+        monkeypatch.setenv("GMAIL_APP_PASSWORD", "app-password")
+        monkeypatch.setattr(email_outbox.settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 1)
 
-        assert payload["status"] == "received"
-        assert payload["stored"] is True
-        assert payload["notification_sent"] is False
+        _submit(db, name="佐藤花子", email="sato@example.com", subject="料金について", message="月額の違いを知りたいです。")
+
+        stats = deliver_due_emails(sessionmaker(bind=engine), lambda: _FakeSMTP(fail_for={"notify@example.com"}))
+        assert stats == {"sent": 1, "failed": 0, "dead": 1}
 
+        db.expire_all()
         saved = db.query(ContactInquiry).one()
-        assert saved.status == "stored"
-        assert "SMTP credentials" in (saved.notification_error or "")
+        assert saved.status == "received"
+        assert "rejected notify@example.com" in (saved.notification_error or "")
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,23 @@
+"""Tests for engine configuration helpers."""
+
+from app.db.session import async_database_url, engine_options
+
+
+def test_async_database_url_maps_sync_drivers() -> None:
+    assert async_database_url("sqlite:///./energy_calc.db") == "sqlite+aiosqlite:///./energy_calc.db"
+    assert async_database_url("postgresql://u:p@db:5432/energy") == "postgresql+asyncpg://u:p@db:5432/energy"
+    assert async_database_url("postgresql+psycopg2://u@db/energy") == "postgresql+asyncpg://u@db/energy"
+    assert (
+        async_database_url("postgresql://u:p@db/energy?sslmode=require")
+        == "postgresql+asyncpg://u:p@db/energy?ssl=require"
+    )
+
+
+def test_engine_options_apply_pool_settings_only_to_server_databases() -> None:
+    assert engine_options("sqlite:///./energy_calc.db") == {"connect_args": {"check_same_thread": False}}
+
+    options = engine_options("postgresql://u:p@db/energy")
+    assert options["pool_pre_ping"] is True
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 10
+    assert options["pool_recycle"] == 1800
@@ -0,0 +1,148 @@
+"""Tests for the email outbox sender."""
+
+import asyncio
+import smtplib
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.models.email_outbox import EmailOutbox
+from app.services import email_outbox
+from app.services.email_outbox import EmailSender, claim_due_emails, deliver_due_emails, enqueue_email
+
+
+class _FakeSMTP:
+    """Stands in for an authenticated smtplib connection."""
+
+    def __init__(self, disconnect_after=None):
+        self.disconnect_after = disconnect_after
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg):
+        if self.disconnect_after is not None and len(self.sent) >= self.disconnect_after:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        self.closed = True
+
+
+class _Connector:
+    def __init__(self, *servers):
+        self.servers = list(servers)
+        self.connections = 0
+
+    def __call__(self):
+        self.connections += 1
+        server = self.servers.pop(0)
+        if isinstance(server, Exception):
+            raise server
+        return server
+
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    monkeypatch.setenv("GMAIL_USER", "sender@example.com")
+    monkeypatch.setenv("GMAIL_APP_PASSWORD", "app-password")
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _queue(session_factory, count):
+    db = session_factory()
+    try:
+        for i in range(count):
+            enqueue_email(db, kind="test", to_email=f"user{i}@example.com", subject=f"件名{i}", body="本文")
+        db.commit()
+    finally:
+        db.close()
+
+
+def _statuses(session_factory):
+    db = session_factory()
+    try:
+        return [(row.to_email, row.status, row.attempts) for row in db.query(EmailOutbox).order_by(EmailOutbox.id)]
+    finally:
+        db.close()
+
+
+def test_batch_is_sent_over_one_connection(session_factory) -> None:
+    _queue(session_factory, 5)
+    server = _FakeSMTP()
+    connect = _Connector(server)
+
+    assert deliver_due_emails(session_factory, connect) == {"sent": 5, "failed": 0, "dead": 0}
+    assert connect.connections == 1
+    assert server.sent == [f"user{i}@example.com" for i in range(5)]
+    assert server.closed
+    assert deliver_due_emails(session_factory, connect) == {"sent": 0, "failed": 0, "dead": 0}
+    assert connect.connections == 1
+
+
+def test_connection_failure_backs_off_and_retries(session_factory) -> None:
+    _queue(session_factory, 2)
+    connect = _Connector(smtplib.SMTPAuthenticationError(535, b"bad credentials"), _FakeSMTP())
+
+    assert deliver_due_emails(session_factory, connect) == {"sent": 0, "failed": 2, "dead": 0}
+    # Not due again until the backoff has passed.
+    assert deliver_due_emails(session_factory, connect) == {"sent": 0, "failed": 0, "dead": 0}
+
+    db = session_factory()
+    try:
+        for row in db.query(EmailOutbox):
+            assert "SMTPAuthenticationError" in row.last_error
+            row.next_attempt_at = datetime.now(timezone.utc)
+        db.commit()
+    finally:
+        db.close()
+
+    assert deliver_due_emails(session_factory, connect) == {"sent": 2, "failed": 0, "dead": 0}
+    assert _statuses(session_factory) == [("user0@example.com", "sent", 2), ("user1@example.com", "sent", 2)]
+
+
+def test_disconnect_mid_batch_fails_only_the_unsent_rest(session_factory, monkeypatch) -> None:
+    monkeypatch.setattr(email_outbox.settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 1)
+    _queue(session_factory, 3)
+
+    stats = deliver_due_emails(session_factory, _Connector(_FakeSMTP(disconnect_after=1)))
+    assert stats == {"sent": 1, "failed": 0, "dead": 2}
+    assert [status for _, status, _ in _statuses(session_factory)] == ["sent", "dead", "dead"]
+
+
+def test_messages_wait_while_smtp_is_not_configured(session_factory, monkeypatch) -> None:
+    monkeypatch.delenv("GMAIL_APP_PASSWORD")
+    _queue(session_factory, 1)
+    connect = _Connector()
+
+    assert deliver_due_emails(session_factory, connect) == {"sent": 0, "failed": 0, "dead": 0}
+    assert connect.connections == 0
+    assert _statuses(session_factory) == [("user0@example.com", "pending", 0)]
+
+
+def test_rows_are_claimed_by_one_sender_only(session_factory) -> None:
+    _queue(session_factory, 3)
+    first, second = session_factory(), session_factory()
+    try:
+        assert len(claim_due_emails(first, 10)) == 3
+        assert claim_due_emails(second, 10) == []
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sender_flush_drains_multiple_batches(session_factory, monkeypatch) -> None:
+    monkeypatch.setattr(email_outbox.settings, "EMAIL_OUTBOX_BATCH_SIZE", 2)
+    _queue(session_factory, 5)
+    connect = _Connector(_FakeSMTP(), _FakeSMTP(), _FakeSMTP())
+    sender = EmailSender(session_factory, connect)
+
+    assert asyncio.run(sender.flush()) == {"sent": 5, "failed": 0, "dead": 0}
+    assert connect.connections == 3
@@ -0,0 +1,143 @@
+"""Tests for buffered product-event ingestion."""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1 import products as products_api
+from app.db.base import Base
+from app.models.product_event import ProductEvent
+from app.services import event_ingest
+from app.services.event_ingest import EventBuffer, IngestQueueFull, write_product_events
+
+
+def _event(i: int) -> dict:
+    return {
+        "event_type": "selected",
+        "product_id": f"p-{i}",
+        "product_name": "窓",
+        "manufacturer": "M",
+        "category": "windows",
+    }
+
+
+class _RecordingWriter:
+    def __init__(self) -> None:
+        self.batches = []
+
+    async def __call__(self, rows):
+        self.batches.append(list(rows))
+
+
+def test_flushes_in_size_batches_and_drains_on_stop() -> None:
+    writer = _RecordingWriter()
+
+    async def scenario():
+        buffer = EventBuffer(writer, max_size=5000, batch_size=500, flush_seconds=60)
+        for i in range(1200):
+            await buffer.submit(_event(i))
+        await asyncio.sleep(0)
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert [len(b) for b in writer.batches] == [500, 500, 200]
+    assert buffer.stats["written"] == buffer.stats["accepted"] == 1200
+    assert [row["product_id"] for batch in writer.batches for row in batch] == [f"p-{i}" for i in range(1200)]
+
+
+def test_flushes_partial_batch_after_interval() -> None:
+    writer = _RecordingWriter()
+
+    async def scenario():
+        buffer = EventBuffer(writer, batch_size=500, flush_seconds=0.05)
+        for i in range(3):
+            await buffer.submit(_event(i))
+        await asyncio.sleep(0.2)
+        flushed_before_stop = [len(b) for b in writer.batches]
+        await buffer.stop()
+        return flushed_before_stop
+
+    assert asyncio.run(scenario()) == [3]
+
+
+def test_full_queue_applies_backpressure() -> None:
+    release = None
+
+    async def slow_writer(rows):
+        await release.wait()
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        buffer = EventBuffer(slow_writer, max_size=3, batch_size=1, flush_seconds=0.01, enqueue_timeout=0.05)
+        await buffer.submit(_event(0))
+        await asyncio.sleep(0.01)  # flusher takes event 0 and blocks in the writer
+        for i in range(1, 4):
+            await buffer.submit(_event(i))
+        with pytest.raises(IngestQueueFull):
+            await buffer.submit(_event(99))
+        release.set()
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.stats["rejected"] == 1
+    assert buffer.stats["written"] == 4
+
+
+def test_failed_batches_are_retried_then_counted_as_dropped(monkeypatch) -> None:
+    attempts = []
+
+    async def failing_writer(rows):
+        attempts.append(len(rows))
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(event_ingest, "RETRY_BACKOFF_SECONDS", 0)
+
+    async def scenario():
+        buffer = EventBuffer(failing_writer, batch_size=10, flush_seconds=60)
+        await buffer.submit(_event(0))
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert attempts == [1, 1, 1]
+    assert buffer.stats["dropped"] == 1
+
+
+def test_write_product_events_uses_one_multi_row_insert(monkeypatch) -> None:
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        statements = []
+        event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        monkeypatch.setattr("app.db.session.AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+        try:
+            await write_product_events([_event(i) for i in range(50)])
+            async with async_sessionmaker(engine)() as db:
+                count = await db.scalar(select(func.count()).select_from(ProductEvent))
+        finally:
+            await engine.dispose()
+        return count, [s for s in statements if s.startswith("INSERT INTO product_events ")]
+
+    count, inserts = asyncio.run(scenario())
+    assert count == 50
+    assert len(inserts) == 1
+
+
+def test_track_selection_returns_503_when_buffer_is_full(monkeypatch) -> None:
+    class FullBuffer:
+        async def submit(self, row):
+            raise IngestQueueFull("full")
+
+    monkeypatch.setattr(products_api, "product_event_buffer", FullBuffer())
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(products_api.track_product_selection(product_id="p", product_name="n", manufacturer="m", category="c"))
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers["Retry-After"] == "1"
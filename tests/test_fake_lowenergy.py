@@ -0,0 +1,50 @@
+"""Tests for the fake lowenergy.jp upstream and load-report summarizer."""
+
+from fastapi.testclient import TestClient
+
+from app.services.residential_official_api import parse_calc_result_xml
+from tools.fake_lowenergy import FakeUpstreamConfig, create_app
+from tools.load_official import RouteStats, summarize
+
+
+def test_fake_upstream_serves_all_official_endpoints() -> None:
+    client = TestClient(create_app(FakeUpstreamConfig(latency_ms=0)))
+
+    report = client.post("/model/1/v390/reportFromInputSheets", content=b"xlsx")
+    assert report.status_code == 200
+    assert report.content.startswith(b"%PDF")
+
+    compute = client.post("/model/1/v390/computeFromInputSheets", content=b"xlsx")
+    assert compute.status_code == 200
+    assert compute.json()["Status"] == "OK"
+
+    envelope = client.post("/envelope/1/eval", content=b"<Envelope />")
+    assert envelope.status_code == 200
+    parsed = parse_calc_result_xml(envelope.text)
+    assert parsed["ua"] == 0.87
+    assert parsed["eta_ac"] == 3.5
+
+    assert client.get("/stats").json() == {"report": 1, "compute": 1, "envelope": 1, "errors": 0}
+
+
+def test_fake_upstream_injects_errors() -> None:
+    client = TestClient(create_app(FakeUpstreamConfig(latency_ms=0, error_rate=1.0, error_status=502)))
+
+    response = client.post("/model/1/v390/computeFromInputSheets", content=b"xlsx")
+    assert response.status_code == 502
+    assert client.get("/stats").json()["errors"] == 1
+
+
+def test_summarize_reports_percentiles_and_error_rate() -> None:
+    route = RouteStats()
+    for i in range(1, 101):
+        route.latencies_ms.append(float(i))
+        route.statuses[200 if i <= 90 else 503] += 1
+
+    result = summarize({"compute": route}, elapsed_s=2.0)
+    assert result["requests"] == 100
+    assert result["throughput_rps"] == 50.0
+    assert result["error_rate"] == 0.1
+    assert result["p50_ms"] == 50.0
+    assert result["p99_ms"] == 99.0
+    assert result["routes"]["compute"]["errors"] == 10
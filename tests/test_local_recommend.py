@@ -0,0 +1,122 @@
+"""Tests for the deterministic local recommendation tier."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.products import recommend_products
+from app.db.base import Base
+from app.models.product import Product
+from app.services.local_recommend import (
+    PARTNER_BONUS,
+    end_use_shares,
+    get_local_recommendations,
+    get_local_recommendations_async,
+    rank_category,
+)
+from app.services.product_index import invalidate_product_index
+
+
+def _with_db(scenario, products=()):
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        invalidate_product_index()
+        try:
+            async with async_sessionmaker(engine)() as db:
+                db.add_all(products)
+                await db.commit()
+                return await scenario(db)
+        finally:
+            await engine.dispose()
+            invalidate_product_index()
+
+    return asyncio.run(run())
+
+
+def test_end_use_shares_follow_zone_correction() -> None:
+    cold = end_use_shares(1, "office")
+    warm = end_use_shares(8, "office")
+    assert sum(cold.values()) == pytest.approx(1.0)
+    assert cold["heating"] > warm["heating"]
+    assert cold["cooling"] < warm["cooling"]
+    assert end_use_shares(6, "unknown-use") == end_use_shares(6, "office")
+
+
+def test_local_recommendations_are_deterministic_and_complete() -> None:
+    first = get_local_recommendations(zone=6, use="office", floor_area=500, current_bei=1.05)
+    second = get_local_recommendations(zone=6, use="office", floor_area=500, current_bei=1.05)
+    assert first == second
+    assert [r["category"] for r in first] == ["windows", "insulation", "hvac", "lighting"]
+    for rec in first:
+        assert rec["product"]["id"] == rec["product_id"]
+        assert rec["estimated_bei_impact"] < 0
+        assert rec["reason"]
+
+
+def test_ranking_orders_by_bei_reduction() -> None:
+    ranked = rank_category("hvac", zone=6, use="office", limit=10)
+    scores = [r["estimated_bei_impact"] - (PARTNER_BONUS if r["product"]["partner"] else 0) for r in ranked]
+    assert scores == sorted(scores)
+    doubled = rank_category("hvac", zone=6, use="office", current_bei=2.0, limit=1)
+    assert doubled[0]["estimated_bei_impact"] == pytest.approx(2 * ranked[0]["estimated_bei_impact"], abs=0.002)
+    assert rank_category("solar", zone=6, use="office") == []
+
+
+def test_heating_products_matter_more_in_cold_zones() -> None:
+    cold = get_local_recommendations(zone=1, use="office", floor_area=500, categories=["windows"])
+    warm = get_local_recommendations(zone=8, use="office", floor_area=500, categories=["windows"])
+    assert cold[0]["estimated_bei_impact"] < warm[0]["estimated_bei_impact"]
+
+
+def test_local_recommendations_use_the_db_catalog() -> None:
+    imported = Product(
+        product_id="db-hvac-top",
+        category="hvac",
+        manufacturer="DB Maker",
+        name="DB高効率マルチ",
+        partner=False,
+        specs={"apf": 9.5, "capacity_kw": 28.0},
+        recommended_zones=[],
+        recommended_uses=[],
+    )
+
+    async def scenario(db):
+        return await get_local_recommendations_async(db, zone=6, use="office", floor_area=500, categories=["hvac"])
+
+    (rec,) = _with_db(scenario, [imported])
+    assert rec["product_id"] == "db-hvac-top"
+    assert rec["product"]["apf"] == 9.5
+
+
+def test_recommend_endpoint_defaults_to_local_and_falls_back_from_ai(monkeypatch) -> None:
+    async def local(db):
+        return await recommend_products(zone=6, use="office", floor_area=500, current_bei=1.0, tier="local", db=db)
+
+    result = _with_db(local)
+    assert result["tier"] == "local"
+    assert result["count"] == 4
+
+    async def failing(**kwargs):
+        raise RuntimeError("upstream down")
+
+    async def ai(db):
+        return await recommend_products(zone=6, use="office", floor_area=500, current_bei=1.0, tier="ai", db=db)
+
+    monkeypatch.setattr("app.api.v1.products.get_ai_recommendations", failing)
+    result = _with_db(ai)
+    assert result["tier"] == "local"
+    assert result["count"] == 4
+
+
+def test_recommend_endpoint_uses_ai_result_when_available(monkeypatch) -> None:
+    async def fake_ai(**kwargs):
+        return [{"category": "windows", "product_id": "ykk-apw430-sliding"}]
+
+    monkeypatch.setattr("app.api.v1.products.get_ai_recommendations", fake_ai)
+    result = asyncio.run(recommend_products(zone=6, use="office", floor_area=500, current_bei=1.0, tier="ai", db=None))
+    assert result["tier"] == "ai"
+    assert result["recommendations"][0]["product_id"] == "ykk-apw430-sliding"
@@ -0,0 +1,57 @@
+"""Tests for partner onboarding endpoints."""
+
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.v1.onboarding import (
+    OnboardingRequest,
+    OnboardingUpdateRequest,
+    list_partner_users,
+    register_partner_user,
+    update_partner_user,
+)
+from app.db.base import Base
+
+
+def _make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine, TestingSessionLocal()
+
+
+def _list(db, **kwargs):
+    params = {"source": None, "status": None, "cursor": None, "limit": 100, **kwargs}
+    return asyncio.run(list_partner_users(db=db, **params))
+
+
+def test_list_registrations_filters_and_pages() -> None:
+    engine, db = _make_db_session()
+    try:
+        ids = []
+        for i in range(5):
+            req = OnboardingRequest(
+                company_name=f"会社{i}",
+                email=f"user{i}@example.com",
+                source="technostructure" if i % 2 == 0 else "other",
+            )
+            ids.append(asyncio.run(register_partner_user(req=req, db=db))["registration_id"])
+        asyncio.run(
+            update_partner_user(registration_id=ids[0], req=OnboardingUpdateRequest(status="approved"), db=db)
+        )
+
+        first = _list(db, source="technostructure", limit=2)
+        assert [row["id"] for row in first["registrations"]] == [ids[4], ids[2]]
+        assert first["registrations"][0]["company_name"] == "会社4"
+        second = _list(db, source="technostructure", cursor=first["next_cursor"], limit=2)
+        assert [row["id"] for row in second["registrations"]] == [ids[0]]
+        assert second["next_cursor"] is None
+
+        approved = _list(db, status="approved")["registrations"]
+        assert [(row["id"], row["status"]) for row in approved] == [(ids[0], "approved")]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
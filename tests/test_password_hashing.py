@@ -0,0 +1,120 @@
+"""Tests for the password hashing pool and login throttling."""
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import auth
+from app.core import password_hashing, security
+from app.core.password_hashing import HashingBusyError, LoginThrottle, PasswordHasher
+from app.db.base import Base
+from app.db.schema import register_models
+from app.models.user import User
+
+
+@pytest.fixture
+def db(monkeypatch):
+    register_models()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(password_hashing, "login_throttle", LoginThrottle(max_failures=3, lockout_seconds=60))
+    monkeypatch.setattr(auth, "login_throttle", password_hashing.login_throttle)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(User(email="arch@example.com", username="arch", hashed_password="right", is_active=True))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _login(db, password):
+    form = OAuth2PasswordRequestForm(username="arch@example.com", password=password)
+    return asyncio.run(auth._authenticate(db, form))
+
+
+def test_repeated_failures_lock_out_before_hashing(db, monkeypatch) -> None:
+    calls = []
+
+    def verify(plain, hashed):
+        calls.append(threading.current_thread().name)
+        return plain == hashed
+
+    monkeypatch.setattr(security, "verify_password", verify)
+    for _ in range(3):
+        with pytest.raises(HTTPException) as exc:
+            _login(db, "wrong")
+        assert exc.value.status_code == 401
+
+    with pytest.raises(HTTPException) as exc:
+        _login(db, "right")
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) > 0
+    assert len(calls) == 3
+    assert all(name.startswith("password-hash") for name in calls)
+
+
+def test_successful_login_clears_failures(db, monkeypatch) -> None:
+    monkeypatch.setattr(security, "verify_password", lambda plain, hashed: plain == hashed)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            _login(db, "wrong")
+    assert _login(db, "right").token_type == "bearer"
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc:
+            _login(db, "wrong")
+        assert exc.value.status_code == 401
+
+
+def test_login_and_signup_keep_db_work_off_the_event_loop(db, monkeypatch) -> None:
+    from app.api.endpoints import users
+    from app.schemas.user import UserCreate
+
+    monkeypatch.setattr(security, "verify_password", lambda plain, hashed: plain == hashed)
+    monkeypatch.setattr(security, "get_password_hash", lambda password: f"hashed:{password}")
+    threads = []
+    original_execute = type(db).execute
+
+    def execute(self, *args, **kwargs):
+        threads.append(threading.current_thread())
+        return original_execute(self, *args, **kwargs)
+
+    monkeypatch.setattr(type(db), "execute", execute)
+
+    async def scenario():
+        loop_thread = threading.current_thread()
+        form = OAuth2PasswordRequestForm(username="arch@example.com", password="right")
+        await auth._authenticate(db, form)
+        user_in = UserCreate(email="new@example.com", password="Passw0rd!x", username="new")
+        created = await users.create_user(db=db, user_in=user_in)
+        return loop_thread, created
+
+    loop_thread, created = asyncio.run(scenario())
+    assert created.hashed_password == "hashed:Passw0rd!x"
+    assert threads and loop_thread not in threads
+
+
+def test_hasher_rejects_work_beyond_its_queue() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(hasher.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["queue_depth"] == 1
+        with pytest.raises(HashingBusyError):
+            await hasher.run(release.wait)
+        release.set()
+        return await asyncio.gather(*running)
+
+    try:
+        assert asyncio.run(scenario()) == [True, True]
+        assert hasher.stats() == {"workers": 1, "in_flight": 0, "queue_depth": 0, "completed": 2, "rejected": 1}
+    finally:
+        hasher.shutdown()
@@ -1,14 +1,25 @@
 """Tests for DB-backed product service with YAML fallback."""
 
+import asyncio
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.db.base import Base
 from app.models.product import Product
-from app.services.products import get_recommended_products, load_products
+from app.services.product_index import invalidate_product_index
+from app.services.products import (
+    filter_products,
+    get_recommended_products,
+    load_products,
+    load_products_async,
+)
 
 
 def _make_db_session():
+    invalidate_product_index()
     engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     Base.metadata.create_all(bind=engine)
@@ -93,3 +104,34 @@ def test_get_recommended_products_filters_and_sorts() -> None:
         db.close()
         Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+def test_load_products_async_reads_db_and_falls_back_to_yaml() -> None:
+    async def scenario() -> None:
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                fallback = await load_products_async("windows", db)
+                assert len(fallback) > 0
+
+                db.add(
+                    Product(
+                        product_id="async-window-1",
+                        category="windows",
+                        manufacturer="A",
+                        name="Async窓",
+                        specs={"u_value": 1.2},
+                        recommended_zones=[6],
+                    )
+                )
+                await db.commit()
+
+                products = await load_products_async("windows", db)
+                assert [p["id"] for p in products] == ["async-window-1"]
+                assert filter_products(products, zone=5) == []
+        finally:
+            await engine.dispose()
+
+    asyncio.run(scenario())
@@ -0,0 +1,90 @@
+"""Tests for the batched product importer."""
+
+import yaml
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.product import Product
+from app.services import product_import
+from app.services.product_import import bulk_import_category, content_hash, import_category
+
+
+def _make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def _write_catalog(tmp_path, items):
+    (tmp_path / "windows.yaml").write_text(yaml.safe_dump(items, allow_unicode=True), encoding="utf-8")
+
+
+def _items(count):
+    return [
+        {"id": f"w-{i}", "manufacturer": "M", "series": "S", "name": f"窓{i}", "u_value": 1.0 + i / 1000}
+        for i in range(count)
+    ]
+
+
+def test_bulk_import_inserts_then_updates_in_batches(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(product_import, "PRODUCTS_DIR", tmp_path)
+    _write_catalog(tmp_path, _items(25))
+    engine, db = _make_db_session()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    try:
+        stats = bulk_import_category(db, "windows", batch_size=10)
+        assert (stats.total, stats.inserted, stats.updated, stats.skipped) == (25, 25, 0, 0)
+        # 3 batches x (SELECT existing + one INSERT ... ON CONFLICT); no per-row queries.
+        assert len([s for s in statements if s.lstrip().upper().startswith(("SELECT", "INSERT"))]) == 6
+        assert all("ON CONFLICT" in s for s in statements if s.lstrip().upper().startswith("INSERT"))
+        assert db.query(Product).count() == 25
+
+        items = _items(25)
+        items[3]["u_value"] = 9.9
+        _write_catalog(tmp_path, items)
+        stats = bulk_import_category(db, "windows", batch_size=10)
+        assert (stats.inserted, stats.updated) == (0, 25)
+        assert db.query(Product).filter(Product.product_id == "w-3").one().specs["u_value"] == 9.9
+        assert stats.rows_per_sec > 0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_incremental_import_skips_unchanged_rows(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(product_import, "PRODUCTS_DIR", tmp_path)
+    items = _items(5)
+    _write_catalog(tmp_path, items)
+    engine, db = _make_db_session()
+    try:
+        bulk_import_category(db, "windows")
+        items[1]["name"] = "改名"
+        items.append({"id": "w-new", "manufacturer": "M", "name": "新製品"})
+        _write_catalog(tmp_path, items)
+
+        stats = bulk_import_category(db, "windows", incremental=True)
+        assert (stats.total, stats.inserted, stats.updated, stats.skipped) == (6, 1, 1, 4)
+        assert db.query(Product).filter(Product.product_id == "w-1").one().name == "改名"
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_import_category_keeps_count_contract_for_real_catalog() -> None:
+    engine, db = _make_db_session()
+    try:
+        count = import_category(db, "windows")
+        assert count == db.query(Product).count() > 0
+        assert import_category(db, "windows") == count
+        assert db.query(Product).count() == count
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_content_hash_ignores_non_content_columns() -> None:
+    row = {"product_id": "x", "name": "A", "specs": {"b": 1, "a": 2}}
+    assert content_hash(row) == content_hash({**row, "product_id": "y", "specs": {"a": 2, "b": 1}})
+    assert content_hash(row) != content_hash({**row, "name": "B"})
@@ -0,0 +1,161 @@
+"""Tests for the in-memory product index (zone/use bitsets, spec columns)."""
+
+import asyncio
+import operator
+import random
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.v1.products import search_products
+from app.db.base import Base
+from app.models.product import Product
+from app.services import product_index
+from app.services.product_import import import_category
+from app.services.product_index import (
+    ProductIndex,
+    UnsearchableSpecFieldError,
+    get_product_index,
+    invalidate_product_index,
+)
+from app.services.product_query import SpecFilter
+from app.services.products import PRODUCT_CATEGORIES, filter_products, load_products
+
+
+def test_index_filter_matches_linear_filter_for_all_zones_and_uses() -> None:
+    invalidate_product_index()
+    for category in PRODUCT_CATEGORIES:
+        products = load_products(category)
+        index = get_product_index(category)
+        uses = {use for p in products for use in (p.get("recommended_uses") or [])}
+        for zone in [None, *range(1, 9)]:
+            for use in [None, *sorted(uses), "unknown-use"]:
+                expected = filter_products(products, zone=zone, use=use)
+                actual = index.filter(zone=zone, use=use)
+                assert [p["id"] for p in actual] == [p["id"] for p in expected], (category, zone, use)
+
+
+def test_index_treats_missing_zone_and_use_as_wildcards() -> None:
+    index = ProductIndex.build(
+        "windows",
+        [
+            {"id": "a", "name": "A", "recommended_zones": [6], "recommended_uses": ["office"]},
+            {"id": "b", "name": "B"},
+            {"id": "c", "name": "C", "partner": True, "recommended_zones": [1]},
+        ],
+    )
+    assert [p["id"] for p in index.filter(zone=6, use="office")] == ["a", "b"]
+    assert [p["id"] for p in index.filter(zone=1)] == ["c", "b"]
+    assert [p["id"] for p in index.filter(use="hotel")] == ["c", "b"]
+
+
+def test_index_returns_copies() -> None:
+    invalidate_product_index()
+    first = get_product_index("windows").filter()
+    first[0]["name"] = "mutated"
+    assert get_product_index("windows").filter()[0]["name"] != "mutated"
+
+
+def test_index_is_cached_and_rebuilt_after_ttl(monkeypatch) -> None:
+    invalidate_product_index()
+    index = get_product_index("windows")
+    assert get_product_index("windows") is index
+
+    monkeypatch.setattr(product_index, "INDEX_TTL_SECONDS", -1.0)
+    assert get_product_index("windows") is not index
+
+
+def test_import_category_invalidates_db_index() -> None:
+    invalidate_product_index()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add(Product(product_id="only-row", category="windows", manufacturer="M", series="S", name="Only"))
+        db.commit()
+        assert [p["id"] for p in get_product_index("windows", db=db).filter()] == ["only-row"]
+
+        count = import_category(db, "windows")
+        assert count > 0
+        assert len(get_product_index("windows", db=db).filter()) == count + 1
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        invalidate_product_index()
+
+
+def _brute_force(products, specs, zone=None, use=None):
+    ops = {"lt": operator.lt, "lte": operator.le, "gt": operator.gt, "gte": operator.ge, "eq": operator.eq}
+    matches = []
+    for product in filter_products(products, zone=zone, use=use):
+        values = [product.get(spec.field) for spec in specs]
+        if all(isinstance(v, (int, float)) and ops[s.op](v, s.value) for v, s in zip(values, specs)):
+            matches.append(product["id"])
+    return matches
+
+
+def test_spec_search_matches_brute_force() -> None:
+    rng = random.Random(7)
+    products = [
+        {
+            "id": f"hvac-{i}",
+            "name": f"機種{i:05d}",
+            "partner": i % 7 == 0,
+            "capacity_kw": round(rng.uniform(2, 30), 1),
+            "apf": round(rng.uniform(3, 8), 2) if i % 11 else None,
+            "recommended_zones": rng.sample(range(1, 9), 3) if i % 3 else [],
+        }
+        for i in range(3000)
+    ]
+    index = ProductIndex.build("hvac", products)
+    for _ in range(200):
+        specs = [
+            SpecFilter("apf", rng.choice(["lt", "lte", "gt", "gte"]), round(rng.uniform(3, 8), 2)),
+            SpecFilter("capacity_kw", "gte", round(rng.uniform(2, 20), 1)),
+            SpecFilter("capacity_kw", "lte", round(rng.uniform(10, 30), 1)),
+        ]
+        zone = rng.choice([None, 6])
+        assert [p["id"] for p in index.search(specs, zone=zone)] == _brute_force(products, specs, zone=zone)
+
+
+def test_spec_search_on_catalog_and_unknown_field() -> None:
+    invalidate_product_index()
+    index = get_product_index("windows")
+    specs = [SpecFilter.parse("u_value:lte:1.5"), SpecFilter.parse("eta_c:lte:0.4")]
+    expected = _brute_force(load_products("windows"), specs, zone=6)
+    assert [p["id"] for p in index.search(specs, zone=6)] == expected
+    assert len(index.search(specs, zone=6, limit=1)) == min(1, len(expected))
+    with pytest.raises(UnsearchableSpecFieldError):
+        index.search([SpecFilter("apf", "gte", 6)])
+    with pytest.raises(UnsearchableSpecFieldError):
+        index.search([SpecFilter("window_type", "eq", 1)])
+
+
+def test_search_endpoint_reports_matches_and_rejects_bad_specs() -> None:
+    invalidate_product_index()
+
+    async def scenario():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine)() as db:
+                result = await search_products("hvac", spec=["apf:gte:6"], zone=None, use=None, limit=50, db=db)
+                assert result["count"] == len(result["products"]) > 0
+                assert all(p["apf"] >= 6 for p in result["products"])
+                with pytest.raises(HTTPException) as exc_info:
+                    await search_products("hvac", spec=["u_value:lte:1"], zone=None, use=None, limit=50, db=db)
+                assert exc_info.value.status_code == 422
+                with pytest.raises(HTTPException) as exc_info:
+                    await search_products("hvac", spec=["source:gte:1"], zone=None, use=None, limit=50, db=db)
+                assert exc_info.value.status_code == 422
+        finally:
+            await engine.dispose()
+            invalidate_product_index()
+
+    asyncio.run(scenario())
@@ -0,0 +1,123 @@
+"""Tests for paginated, SQL-filtered product queries."""
+
+import asyncio
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.services.product_import import import_category
+from app.services.product_query import (
+    ProductQuery,
+    ProductQueryError,
+    SpecFilter,
+    build_select,
+    query_products_page,
+)
+from app.services.products import filter_products, load_products
+
+
+def _run(scenario, *, imported: bool):
+    async def wrapper():
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                if imported:
+                    await db.run_sync(lambda sync_db: import_category(sync_db, "windows"))
+                await scenario(db)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(wrapper())
+
+
+async def _all_pages(db, **kwargs):
+    products, cursor, pages = [], None, 0
+    while True:
+        page = await query_products_page(db, ProductQuery(category="windows", cursor=cursor, **kwargs))
+        products.extend(page["products"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return products, pages
+
+
+@pytest.mark.parametrize("imported", [True, False], ids=["db", "yaml"])
+def test_cursor_pages_cover_filtered_catalog_once(imported) -> None:
+    async def scenario(db):
+        expected = filter_products(load_products("windows"), zone=6, use="office")
+        products, pages = await _all_pages(db, zone=6, use="office", limit=4)
+        assert sorted(p["id"] for p in products) == sorted(p["id"] for p in expected)
+        assert len({p["id"] for p in products}) == len(products)
+        assert pages == -(-len(expected) // 4)
+        partners = [p["partner"] for p in products]
+        assert partners == sorted(partners, reverse=True)
+
+    _run(scenario, imported=imported)
+
+
+@pytest.mark.parametrize("imported", [True, False], ids=["db", "yaml"])
+def test_spec_manufacturer_and_partner_filters(imported) -> None:
+    async def scenario(db):
+        catalog = load_products("windows")
+        products, _ = await _all_pages(db, specs=(SpecFilter.parse("u_value:lte:1.5"),))
+        assert {p["id"] for p in products} == {p["id"] for p in catalog if p["u_value"] <= 1.5}
+
+        manufacturer = catalog[0]["manufacturer"]
+        products, _ = await _all_pages(db, manufacturer=manufacturer, partner=True)
+        assert {p["id"] for p in products} == {
+            p["id"] for p in catalog if p["manufacturer"] == manufacturer and p.get("partner")
+        }
+
+    _run(scenario, imported=imported)
+
+
+@pytest.mark.parametrize("imported", [True, False], ids=["db", "yaml"])
+def test_field_projection_returns_only_chosen_specs(imported) -> None:
+    async def scenario(db):
+        page = await query_products_page(db, ProductQuery(category="windows", fields=("u_value",), limit=3))
+        assert len(page["products"]) == 3
+        for product in page["products"]:
+            assert "u_value" in product
+            assert "eta_c" not in product and "glass_type" not in product
+            assert {"id", "name", "partner"} <= set(product)
+
+    _run(scenario, imported=imported)
+
+
+def test_invalid_input_is_rejected() -> None:
+    with pytest.raises(ProductQueryError):
+        SpecFilter.parse("u_value<=1.5")
+    with pytest.raises(ProductQueryError):
+        SpecFilter.parse("u_value:lte:abc")
+    with pytest.raises(ProductQueryError):
+        ProductQuery(category="windows", fields=("secret",)).validate()
+    with pytest.raises(ProductQueryError):
+        ProductQuery(category="windows", specs=(SpecFilter("window_type", "eq", 1.0),)).validate()
+    ProductQuery(category="windows", specs=(SpecFilter("eta_h", "gte", 0.5),), fields=("window_type",)).validate()
+
+    async def scenario(db):
+        with pytest.raises(ProductQueryError):
+            await query_products_page(db, ProductQuery(category="windows", cursor="not-a-cursor"))
+
+    _run(scenario, imported=True)
+
+
+def test_postgresql_select_pushes_filters_into_sql() -> None:
+    query = ProductQuery(
+        category="hvac",
+        zone=6,
+        use="office",
+        specs=(SpecFilter("apf", "gte", 6.0),),
+        fields=("apf",),
+        limit=20,
+    )
+    sql = str(build_select(query, "postgresql").compile(dialect=postgresql.dialect()))
+    assert "CAST((products.specs ->> " in sql
+    assert "@>" in sql
+    assert "LIMIT" in sql
+    assert "products.specs," not in sql
@@ -0,0 +1,169 @@
+"""Tests for project calculation deduplication and incremental recalculation."""
+
+import copy
+
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import calc
+from app.core.principal_cache import Principal
+from app.db.base import Base
+from app.db.schema import create_schema, register_models
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.calculation import CalculationInput
+from app.services import calculation
+from app.services.calculation import (
+    CALCULATION_VERSION,
+    input_hash,
+    perform_energy_calculation,
+    recalculate_energy,
+)
+from app.validators import building_validators
+
+SAMPLE = {
+    "building": {"building_type": "office", "total_floor_area": 1000, "climate_zone": 6, "num_stories": 3},
+    "envelope": {
+        "parts": [
+            {"part_name": "外壁", "part_type": "壁", "area": 500, "u_value": 0.5},
+            {"part_name": "窓", "part_type": "窓", "area": 100, "u_value": 2.3, "eta_value": 0.4},
+        ]
+    },
+    "systems": {
+        "heating": {"system_type": "heat_pump", "efficiency": 4.0},
+        "cooling": {"system_type": "heat_pump", "efficiency": 3.5},
+        "ventilation": {"system_type": "mechanical", "power_consumption": 2.0},
+        "hot_water": {"system_type": "gas", "efficiency": 0.9},
+        "lighting": {"system_type": "led", "power_density": 8.0},
+    },
+}
+
+
+def _input(**changes):
+    data = copy.deepcopy(SAMPLE)
+    for path, value in changes.items():
+        target = data
+        *parents, leaf = path.split("__")
+        for key in parents:
+            target = target[int(key)] if key.isdigit() else target[key]
+        target[leaf] = value
+    return CalculationInput(**data)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(building_validators, "validate_calculation_input", lambda data: ([], True))
+    register_models()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    user = User(email="arch@example.com", username="arch", hashed_password="hashed", is_active=True)
+    session.add(user)
+    session.flush()
+    session.add(Project(id=1, name="事務所ビル", owner_id=user.id))
+    session.commit()
+    session.principal = Principal(id=user.id, email=user.email, username=user.username, is_active=True)
+    session.writes = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statement.startswith("UPDATE") and session.writes.append(statement),
+    )
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _calculate(db, input_data):
+    return calc.calculate_energy(project_id=1, input_data=input_data, db=db, current_user=db.principal)
+
+
+def test_input_hash_is_canonical() -> None:
+    reordered = CalculationInput(**dict(reversed(list(copy.deepcopy(SAMPLE).items()))))
+    assert input_hash(reordered) == input_hash(_input())
+    assert input_hash(_input(building__total_floor_area=1000.0)) == input_hash(_input())
+    assert input_hash(_input(building__num_stories=4)) != input_hash(_input())
+
+
+def test_unchanged_input_returns_stored_result_without_writing(db, monkeypatch) -> None:
+    first = _calculate(db, _input())
+    assert len(db.writes) == 1
+    assert db.get(Project, 1).input_hash == input_hash(_input())
+
+    monkeypatch.setattr(calculation, "perform_energy_calculation", pytest.fail)
+    monkeypatch.setattr(building_validators, "validate_calculation_input", pytest.fail)
+    again = _calculate(db, _input())
+    assert again == first
+    assert len(db.writes) == 1
+
+
+def test_only_changed_sections_are_recomputed(monkeypatch) -> None:
+    base = _input()
+    previous = perform_energy_calculation(base)
+
+    def untouched(_):
+        raise AssertionError("section should have been reused")
+
+    envelope_change = _input(envelope__parts__0__u_value=0.3)
+    monkeypatch.setattr(calculation, "calculate_primary_energy_section", untouched)
+    result, recomputed = recalculate_energy(
+        envelope_change, base.model_dump(), previous.model_dump(), CALCULATION_VERSION
+    )
+    monkeypatch.undo()
+    assert recomputed == {"envelope"}
+    assert result == perform_energy_calculation(envelope_change)
+
+    systems_change = _input(systems__lighting__power_density=5.0)
+    monkeypatch.setattr(calculation, "calculate_envelope_section", untouched)
+    result, recomputed = recalculate_energy(
+        systems_change, base.model_dump(), previous.model_dump(), CALCULATION_VERSION
+    )
+    monkeypatch.undo()
+    assert recomputed == {"primary_energy"}
+    assert result == perform_energy_calculation(systems_change)
+
+    building_change = _input(building__climate_zone=5)
+    result, recomputed = recalculate_energy(
+        building_change, base.model_dump(), previous.model_dump(), CALCULATION_VERSION
+    )
+    assert recomputed == {"envelope", "primary_energy"}
+    assert result == perform_energy_calculation(building_change)
+
+    # Results from another calculation version are never reused.
+    _, recomputed = recalculate_energy(envelope_change, base.model_dump(), previous.model_dump(), None)
+    assert recomputed == {"envelope", "primary_energy"}
+
+
+def test_calculation_version_change_forces_recalculation(db, monkeypatch) -> None:
+    first = _calculate(db, _input())
+    assert db.get(Project, 1).calculation_version == CALCULATION_VERSION
+
+    stale = first.model_dump()
+    stale["overall_compliance"] = not first.overall_compliance
+    project = db.get(Project, 1)
+    project.result_data = stale
+    db.commit()
+    assert _calculate(db, _input()).overall_compliance == (not first.overall_compliance)
+
+    monkeypatch.setattr(calculation, "CALCULATION_VERSION", CALCULATION_VERSION + 1)
+    monkeypatch.setattr(calc, "CALCULATION_VERSION", CALCULATION_VERSION + 1)
+    again = _calculate(db, _input())
+    assert again == first
+    project = db.get(Project, 1)
+    assert project.calculation_version == CALCULATION_VERSION + 1
+    assert project.input_hash == input_hash(_input())
+
+
+def test_create_schema_adds_columns_to_existing_tables() -> None:
+    engine = create_engine("sqlite:///:memory:", poolclass=StaticPool)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE projects (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, owner_id INTEGER NOT NULL)"))
+    try:
+        create_schema(engine)
+        columns = {column["name"] for column in inspect(engine).get_columns("projects")}
+        assert {"input_data", "result_data", "input_hash", "calculation_version"} <= columns
+    finally:
+        engine.dispose()
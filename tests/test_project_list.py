@@ -0,0 +1,104 @@
+"""Tests for the lightweight project list projection."""
+
+import copy
+
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import calc, projects
+from app.core.principal_cache import Principal
+from app.db.base import Base
+from app.db.schema import register_models
+from app.models.project import Project
+from app.models.user import User
+from app.schemas.calculation import CalculationInput
+from app.schemas.project import ProjectSummary
+from app.validators import building_validators
+from scripts.backfill_project_metrics import backfill
+
+SAMPLE = {
+    "building": {"building_type": "office", "total_floor_area": 1000, "climate_zone": 6, "num_stories": 3},
+    "envelope": {"parts": [{"part_name": "外壁", "part_type": "壁", "area": 500, "u_value": 0.5}]},
+    "systems": {
+        "heating": {"system_type": "heat_pump", "efficiency": 4.0},
+        "cooling": {"system_type": "heat_pump", "efficiency": 3.5},
+        "ventilation": {"system_type": "mechanical", "power_consumption": 2.0},
+        "hot_water": {"system_type": "gas", "efficiency": 0.9},
+        "lighting": {"system_type": "led", "power_density": 8.0},
+    },
+}
+PRINCIPAL = Principal(id=1, email="arch@example.com", username="arch", is_active=True)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(building_validators, "validate_calculation_input", lambda data: ([], True))
+    register_models()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(User(id=1, email="arch@example.com", username="arch", hashed_password="x", is_active=True))
+    session.add(User(id=2, email="other@example.com", username="other", hashed_password="x", is_active=True))
+    for project_id in range(1, 6):
+        session.add(Project(id=project_id, name=f"案件{project_id}", owner_id=1))
+    session.add(Project(id=6, name="他人の案件", owner_id=2))
+    session.commit()
+    session.statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *a: session.statements.append(statement))
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _list(db, **params):
+    response = Response()
+    rows = projects.read_projects(response=response, db=db, current_user=PRINCIPAL, **{"cursor": None, "limit": 100, **params})
+    return [ProjectSummary.model_validate(row) for row in rows], response.headers.get("x-next-cursor")
+
+
+def test_calculation_stores_headline_metrics_for_the_list(db) -> None:
+    result = calc.calculate_energy(project_id=2, input_data=CalculationInput(**SAMPLE), db=db, current_user=PRINCIPAL)
+    db.statements.clear()
+
+    summaries, next_cursor = _list(db)
+    assert [s.id for s in summaries] == [5, 4, 3, 2, 1]
+    assert next_cursor is None
+    calculated = summaries[3]
+    primary = result.primary_energy_result
+    expected_bei = round(primary.total_energy_consumption / primary.standard_energy_consumption, 2)
+    assert (calculated.bei, calculated.floor_area, calculated.is_compliant) == (
+        expected_bei,
+        1000.0,
+        result.overall_compliance,
+    )
+    assert calculated.has_result and not summaries[0].has_result
+    (statement,) = db.statements
+    assert "projects.input_data" not in statement and "projects.result_data," not in statement
+
+
+def test_project_list_pages_by_keyset(db) -> None:
+    first, cursor = _list(db, limit=2)
+    assert [s.id for s in first] == [5, 4] and cursor == "4"
+    second, cursor = _list(db, limit=2, cursor=int(cursor))
+    assert [s.id for s in second] == [3, 2] and cursor == "2"
+    last, cursor = _list(db, limit=2, cursor=int(cursor))
+    assert [s.id for s in last] == [1] and cursor is None
+
+
+def test_backfill_fills_metrics_from_stored_results(db) -> None:
+    project = db.get(Project, 1)
+    project.input_data = copy.deepcopy(SAMPLE)
+    project.result_data = {
+        "primary_energy_result": {"total_energy_consumption": 90.0, "standard_energy_consumption": 100.0},
+        "overall_compliance": True,
+    }
+    db.commit()
+
+    assert backfill(db, batch_size=1) == 1
+    project = db.get(Project, 1)
+    assert (project.bei, project.floor_area, project.is_compliant) == (0.9, 1000, True)
+    assert backfill(db) == 0
@@ -0,0 +1,116 @@
+"""Tests for project revision history (JSON Patch deltas + snapshots)."""
+
+import copy
+import json
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.endpoints import calc, projects
+from app.core.principal_cache import Principal
+from app.db.base import Base
+from app.db.schema import register_models
+from app.models.project import Project
+from app.models.project_revision import ProjectRevision
+from app.models.user import User
+from app.schemas.calculation import CalculationInput
+from app.services import project_revisions
+from app.services.project_revisions import apply_patch, make_patch
+from app.validators import building_validators
+
+SAMPLE = {
+    "building": {"building_type": "office", "total_floor_area": 1000, "climate_zone": 6, "num_stories": 3},
+    "envelope": {
+        "parts": [
+            {"part_name": "外壁", "part_type": "壁", "area": 500, "u_value": 0.5},
+            {"part_name": "窓", "part_type": "窓", "area": 100, "u_value": 2.3, "eta_value": 0.4},
+        ]
+    },
+    "systems": {
+        "heating": {"system_type": "heat_pump", "efficiency": 4.0},
+        "cooling": {"system_type": "heat_pump", "efficiency": 3.5},
+        "ventilation": {"system_type": "mechanical", "power_consumption": 2.0},
+        "hot_water": {"system_type": "gas", "efficiency": 0.9},
+        "lighting": {"system_type": "led", "power_density": 8.0},
+    },
+}
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(building_validators, "validate_calculation_input", lambda data: ([], True))
+    register_models()
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    for user_id, email in ((1, "arch@example.com"), (2, "other@example.com")):
+        session.add(User(id=user_id, email=email, username=email.split("@")[0], hashed_password="x", is_active=True))
+    session.add(Project(id=1, name="事務所ビル", owner_id=1))
+    session.commit()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _principal(user_id=1):
+    return Principal(id=user_id, email="arch@example.com", username="arch", is_active=True)
+
+
+def _variant(i):
+    data = copy.deepcopy(SAMPLE)
+    data["systems"]["lighting"]["power_density"] = 8.0 - i * 0.25
+    if i % 3 == 2:
+        data["envelope"]["parts"].append({"part_name": f"天窓{i}", "part_type": "窓", "area": 5, "u_value": 2.0})
+    return CalculationInput(**data)
+
+
+def test_patch_round_trip() -> None:
+    source = {"a": [1, 2, 3, {"x/y": 1}], "b": {"c": "d", "~": None}, "e": 1.0}
+    target = {"a": [1, 5, {"x/y": 2, "z": [True]}], "b": {"~": 0}, "f": "new"}
+    patch = make_patch(source, target)
+    assert apply_patch(source, patch) == target
+    assert make_patch(target, target) == []
+    assert apply_patch(source, make_patch(source, [1])) == [1]
+
+
+def test_calculations_record_deltas_with_periodic_snapshots(db) -> None:
+    documents = {}
+    for i in range(12):
+        calc.calculate_energy(project_id=1, input_data=_variant(i), db=db, current_user=_principal())
+        project = db.get(Project, 1)
+        documents[i + 1] = json.loads(json.dumps({"input_data": project.input_data, "result_data": project.result_data}))
+    # Same input again: served from the stored result, no new revision.
+    calc.calculate_energy(project_id=1, input_data=_variant(11), db=db, current_user=_principal())
+
+    rows = db.query(ProjectRevision).order_by(ProjectRevision.revision).all()
+    assert [row.revision for row in rows] == list(range(1, 13))
+    assert [row.revision for row in rows if row.is_snapshot] == [1, 1 + project_revisions.SNAPSHOT_INTERVAL]
+    for row in rows:
+        if not row.is_snapshot:
+            full = len(json.dumps(documents[row.revision], ensure_ascii=False))
+            assert len(json.dumps(row.patch, ensure_ascii=False)) < full / 2
+
+    listed = projects.read_project_revisions(db=db, project_id=1, current_user=_principal())
+    assert [r["revision"] for r in listed["revisions"]] == list(range(12, 0, -1))
+    for number, document in documents.items():
+        restored = projects.read_project_revision(db=db, project_id=1, revision=number, current_user=_principal())
+        assert {k: restored[k] for k in ("input_data", "result_data")} == document
+
+    diff = projects.diff_project_revisions(
+        db=db, project_id=1, from_revision=3, to_revision=12, current_user=_principal()
+    )
+    assert apply_patch(documents[3], diff["patch"]) == documents[12]
+
+
+def test_revision_lookups_are_scoped_and_checked(db) -> None:
+    calc.calculate_energy(project_id=1, input_data=_variant(0), db=db, current_user=_principal())
+    with pytest.raises(HTTPException) as exc:
+        projects.read_project_revision(db=db, project_id=1, revision=2, current_user=_principal())
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        projects.read_project_revisions(db=db, project_id=1, current_user=_principal(2))
+    assert exc.value.status_code == 404
@@ -1,10 +1,14 @@
 """Tests for referral endpoints and aggregation."""
 
 import asyncio
-from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
 
+import pytest
+from fastapi import HTTPException, Response
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
 
 from app.api.v1.referral import (
     ReferralRequest,
@@ -15,6 +19,10 @@ from app.api.v1.referral import (
     update_referral,
 )
 from app.db.base import Base
+from app.models.email_outbox import EmailOutbox
+from app.models.referral import Referral
+from app.models.referral_monthly_stat import ReferralMonthlyStat
+from app.services.referral_stats import backfill_referral_stats, rebuild_referral_stats
 
 
 def _make_db_session():
@@ -25,6 +33,20 @@ def _make_db_session():
     return engine, session
 
 
+def _list(db, **kwargs):
+    params = {"status": None, "manufacturer": None, "cursor": None, "limit": 100, **kwargs}
+    return asyncio.run(list_referrals(db=db, **params))
+
+
+def _stats(db, headers=None):
+    request = Request({"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]})
+    response = Response()
+    result = asyncio.run(referral_stats(request=request, response=response, db=db))
+    if isinstance(result, Response):
+        return result.status_code, None, result.headers
+    return 200, result, response.headers
+
+
 def test_create_referral_and_list() -> None:
     engine, db = _make_db_session()
     try:
@@ -41,13 +63,19 @@ def test_create_referral_and_list() -> None:
             floor_area=500,
         )
 
-        with patch("app.api.v1.referral.send_referral_notification", return_value=True):
-            result = asyncio.run(create_referral(req=req, db=db))
+        result = asyncio.run(create_referral(req=req, db=db))
 
         assert result["status"] == "pending"
         assert "referral_id" in result
+        queued = db.query(EmailOutbox).one()
+        assert (queued.kind, queued.reference_id, queued.status) == (
+            "referral_notification",
+            result["referral_id"],
+            "pending",
+        )
+        assert "APW 430 引違い窓" in queued.subject
 
-        listed = asyncio.run(list_referrals(db=db))
+        listed = _list(db)
         assert len(listed["referrals"]) == 1
         assert listed["referrals"][0]["manufacturer"] == "YKK AP"
     finally:
@@ -67,12 +95,11 @@ def test_referral_stats() -> None:
             "product_name": "Product",
             "manufacturer": "YKK AP",
         }
-        with patch("app.api.v1.referral.send_referral_notification", return_value=True):
-            asyncio.run(create_referral(req=ReferralRequest(**base), db=db))
-            payload = {**base, "architect_email": "b@example.com", "manufacturer": "パナソニック"}
-            asyncio.run(create_referral(req=ReferralRequest(**payload), db=db))
+        asyncio.run(create_referral(req=ReferralRequest(**base), db=db))
+        payload = {**base, "architect_email": "b@example.com", "manufacturer": "パナソニック"}
+        asyncio.run(create_referral(req=ReferralRequest(**payload), db=db))
 
-        stats = asyncio.run(referral_stats(db=db))
+        _, stats, _ = _stats(db)
         assert stats["total"] == 2
         assert stats["by_status"]["pending"] == 2
         assert stats["by_manufacturer"]["YKK AP"] == 1
@@ -96,8 +123,7 @@ def test_update_referral_status_and_notes() -> None:
             manufacturer="YKK AP",
         )
 
-        with patch("app.api.v1.referral.send_referral_notification", return_value=True):
-            created = asyncio.run(create_referral(req=req, db=db))
+        created = asyncio.run(create_referral(req=req, db=db))
 
         updated = asyncio.run(
             update_referral(
@@ -110,10 +136,168 @@ def test_update_referral_status_and_notes() -> None:
         assert updated["status"] == "quoted"
         assert updated["notes"] == "一次見積を送付済み"
 
-        listed = asyncio.run(list_referrals(db=db))
+        listed = _list(db)
         assert listed["referrals"][0]["status"] == "quoted"
         assert listed["referrals"][0]["notes"] == "一次見積を送付済み"
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
         engine.dispose()
+
+
+def _seed_referrals(db, count):
+    # Pairs share a timestamp so pages have to break ties on id.
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        db.add(
+            Referral(
+                architect_name=f"A{i}",
+                architect_email=f"a{i}@example.com",
+                product_category="windows",
+                product_id=f"id-{i}",
+                product_name="Product",
+                manufacturer="YKK AP" if i % 2 else "LIXIL",
+                status="quoted" if i % 3 == 0 else "pending",
+                created_at=start + timedelta(minutes=i // 2),
+            )
+        )
+    db.commit()
+
+
+def test_list_referrals_pages_with_keyset_cursor() -> None:
+    engine, db = _make_db_session()
+    try:
+        _seed_referrals(db, 7)
+        seen = []
+        cursor = None
+        while True:
+            page = _list(db, cursor=cursor, limit=3)
+            seen.extend(row["id"] for row in page["referrals"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+        assert set(page["referrals"][0]) == {c.name for c in Referral.__table__.columns}
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_list_referrals_filters_by_status_and_manufacturer() -> None:
+    engine, db = _make_db_session()
+    try:
+        _seed_referrals(db, 7)
+        quoted = _list(db, status="Quoted")["referrals"]
+        assert [row["id"] for row in quoted] == [7, 4, 1]
+        ykk = _list(db, manufacturer="YKK AP", limit=2)
+        assert [row["id"] for row in ykk["referrals"]] == [6, 4]
+        rest = _list(db, manufacturer="YKK AP", cursor=ykk["next_cursor"], limit=2)
+        assert [row["id"] for row in rest["referrals"]] == [2]
+        assert rest["next_cursor"] is None
+
+        with pytest.raises(HTTPException) as exc:
+            _list(db, cursor="not-a-cursor")
+        assert exc.value.status_code == 422
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_referral_list_indexes_are_declared() -> None:
+    names = {index.name for index in Referral.__table__.indexes}
+    assert {
+        "ix_referrals_created_at_id",
+        "ix_referrals_status_created_at_id",
+        "ix_referrals_manufacturer_created_at_id",
+    } <= names
+
+
+def test_referral_stats_follow_status_updates_with_validators() -> None:
+    engine, db = _make_db_session()
+    try:
+        req = ReferralRequest(
+            architect_name="A",
+            architect_email="a@example.com",
+            product_category="windows",
+            product_id="id-1",
+            product_name="Product",
+            manufacturer="YKK AP",
+        )
+        created = asyncio.run(create_referral(req=req, db=db))
+        status, first, headers = _stats(db)
+        assert status == 200 and first["by_status"] == {"pending": 1}
+        assert _stats(db, {"If-None-Match": headers["etag"]})[0] == 304
+        assert _stats(db, {"If-Modified-Since": headers["last-modified"]})[0] == 304
+
+        asyncio.run(
+            update_referral(
+                referral_id=created["referral_id"], req=ReferralUpdateRequest(status="contacted"), db=db
+            )
+        )
+        status, second, _ = _stats(db, {"If-None-Match": headers["etag"]})
+        assert status == 200
+        assert second["total"] == 1
+        assert second["by_status"] == {"contacted": 1}
+        now = datetime.now(timezone.utc)
+        assert second["by_month"] == [{"year": now.year, "month": now.month, "count": 1}]
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_migrate_backfills_referral_stats_before_new_referrals_arrive() -> None:
+    engine, db = _make_db_session()
+    try:
+        assert backfill_referral_stats(db) is None
+        _seed_referrals(db, 7)
+        assert db.query(ReferralMonthlyStat).count() == 0
+
+        assert backfill_referral_stats(db) == 4
+        assert backfill_referral_stats(db) is None
+        req = ReferralRequest(
+            architect_name="B",
+            architect_email="b@example.com",
+            product_category="windows",
+            product_id="id-new",
+            product_name="Product",
+            manufacturer="LIXIL",
+        )
+        asyncio.run(create_referral(req=req, db=db))
+
+        _, stats, _ = _stats(db)
+        assert stats["total"] == 8
+        assert stats["by_status"] == {"pending": 5, "quoted": 3}
+        assert stats["by_manufacturer"] == {"LIXIL": 5, "YKK AP": 3}
+        assert stats["by_month"][0] == {"year": 2026, "month": 1, "count": 7}
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_rebuild_buckets_postgresql_months_in_utc(monkeypatch) -> None:
+    statements = []
+
+    class _FakeDialect:
+        name = "postgresql"
+
+    class _FakeSession:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": _FakeDialect})()
+
+        def execute(self, stmt):
+            statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+            return type("Result", (), {"all": lambda self: []})()
+
+        def add_all(self, rows):
+            pass
+
+        def commit(self):
+            pass
+
+    assert rebuild_referral_stats(_FakeSession()) == 0
+    assert statements[0].startswith("LOCK TABLE referral_monthly_stats")
+    assert "EXTRACT(year FROM timezone(" in statements[1]
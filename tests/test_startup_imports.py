@@ -0,0 +1,43 @@
+"""Tests for cold-start import hygiene."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+from scripts.check_startup_time import LAZY_MODULES, parse_importtime
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_parse_importtime_reads_cumulative_microseconds() -> None:
+    stderr = "\n".join(
+        [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |   yaml",
+            "import time:     96773 |    1656681 | app.main",
+            "unrelated warning line",
+        ]
+    )
+    assert parse_importtime(stderr) == {"yaml": 120, "app.main": 1656681}
+
+
+def test_app_main_does_not_import_heavy_dependencies() -> None:
+    code = (
+        "import sys, app.main; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert proc.stdout.strip() == ""
+
+
+def test_lazy_report_dependencies_resolve_on_attribute_access() -> None:
+    from app.services import report
+
+    assert report.openpyxl.__name__ == "openpyxl"
+    assert report.requests.__name__ == "requests"
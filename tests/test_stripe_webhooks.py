@@ -0,0 +1,193 @@
+"""Tests for the Stripe webhook inbox and worker."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.schema import register_models
+from app.db.session import get_db
+from app.main import app
+from app.models.billing_project_pass import BillingProjectPass
+from app.models.project import Project
+from app.models.stripe_webhook_event import StripeWebhookEvent
+from app.models.user import User
+from app.services import stripe_billing, stripe_webhooks
+from app.services.stripe_webhooks import WebhookWorker, process_stored_event, record_webhook_event
+
+PROJECT_PASS_EVENT = {
+    "id": "evt_project_pass_paid",
+    "type": "checkout.session.completed",
+    "data": {
+        "object": {
+            "id": "cs_project_pass_paid",
+            "mode": "payment",
+            "payment_status": "paid",
+            "payment_intent": "pi_project_pass",
+            "metadata": {"plan_code": "project_pass", "customer_email": "pass@example.com", "project_id": "101"},
+            "customer_details": {"email": "pass@example.com"},
+        }
+    },
+}
+
+
+class _FakeStripe:
+    api_key = None
+
+    class Webhook:
+        @staticmethod
+        def construct_event(payload, signature, secret):
+            if signature != "sig_test":
+                raise ValueError("invalid signature")
+            return PROJECT_PASS_EVENT
+
+
+@pytest.fixture
+def session_factory():
+    register_models()
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    stripe_billing.reset_entitlement_cache()
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+def _seed_project(db):
+    user = User(email="pass@example.com", username="pass", hashed_password="hashed", is_active=True)
+    db.add(user)
+    db.flush()
+    db.add(Project(id=101, name="テスト案件", description="webhook test project", owner_id=user.id))
+    db.commit()
+
+
+def _event(event_id="evt_1", event_type="customer.subscription.updated"):
+    return {"id": event_id, "type": event_type, "data": {"object": {"customer": "cus_1"}}}
+
+
+def test_webhook_endpoint_stores_event_once_and_acknowledges(monkeypatch, session_factory) -> None:
+    monkeypatch.setenv("STRIPE_SECRET_KEY", "sk_test")
+    monkeypatch.setenv("STRIPE_WEBHOOK_SECRET", "whsec_test")
+    monkeypatch.setattr(stripe_billing, "_load_stripe_module", lambda: _FakeStripe)
+    processed = []
+    monkeypatch.setattr(stripe_billing, "process_webhook_event", lambda **kwargs: processed.append(kwargs))
+
+    def override_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_db
+    try:
+        client = TestClient(app)
+        first = client.post("/api/v1/billing/webhook", content=b"{}", headers={"stripe-signature": "sig_test"})
+        second = client.post("/api/v1/billing/webhook", content=b"{}", headers={"stripe-signature": "sig_test"})
+        bad = client.post("/api/v1/billing/webhook", content=b"{}", headers={"stripe-signature": "nope"})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    assert first.status_code == 200 and first.json()["duplicate"] is False
+    assert second.status_code == 200 and second.json()["duplicate"] is True
+    assert bad.status_code == 400
+    assert processed == []  # nothing runs inline in the request
+
+    db = session_factory()
+    try:
+        (row,) = db.query(StripeWebhookEvent).all()
+        assert (row.event_id, row.status) == ("evt_project_pass_paid", "pending")
+    finally:
+        db.close()
+
+
+def test_stored_event_is_processed_exactly_once(session_factory) -> None:
+    db = session_factory()
+    try:
+        _seed_project(db)
+        row, created = record_webhook_event(db, PROJECT_PASS_EVENT)
+        _, created_again = record_webhook_event(db, PROJECT_PASS_EVENT)
+        row_id = row.id
+    finally:
+        db.close()
+    assert (created, created_again) == (True, False)
+
+    assert process_stored_event(row_id, session_factory) == "processed"
+    assert process_stored_event(row_id, session_factory) is None
+
+    db = session_factory()
+    try:
+        stored = db.get(StripeWebhookEvent, row_id)
+        assert stored.attempts == 1
+        assert stored.result["action"] == "project_pass_activated"
+        assert db.query(BillingProjectPass).count() == 1
+    finally:
+        db.close()
+
+
+def test_failures_are_retried_with_backoff_then_marked_dead(monkeypatch, session_factory) -> None:
+    monkeypatch.setattr(stripe_webhooks.settings, "STRIPE_WEBHOOK_MAX_ATTEMPTS", 2)
+    calls = []
+
+    def failing(**kwargs):
+        calls.append(kwargs["event"]["id"])
+        raise RuntimeError("stripe down")
+
+    monkeypatch.setattr(stripe_billing, "process_webhook_event", failing)
+    db = session_factory()
+    try:
+        row_id = record_webhook_event(db, _event())[0].id
+    finally:
+        db.close()
+
+    assert process_stored_event(row_id, session_factory) == "failed"
+    # Not due yet: the backoff keeps it from being claimed again right away.
+    assert process_stored_event(row_id, session_factory) is None
+
+    db = session_factory()
+    try:
+        stored = db.get(StripeWebhookEvent, row_id)
+        assert stored.last_error == "RuntimeError: stripe down"
+        assert stored.next_attempt_at is not None
+        stored.next_attempt_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db.commit()
+    finally:
+        db.close()
+
+    assert process_stored_event(row_id, session_factory) == "dead"
+    assert calls == ["evt_1", "evt_1"]
+
+
+def test_worker_poll_picks_up_due_and_stale_events(monkeypatch, session_factory) -> None:
+    seen = []
+    def record(**kwargs):
+        seen.append(kwargs["event"]["id"])
+        return {}
+
+    monkeypatch.setattr(stripe_billing, "process_webhook_event", record)
+    db = session_factory()
+    try:
+        fresh = record_webhook_event(db, _event("evt_fresh"))[0]
+        stale = record_webhook_event(db, _event("evt_stale"))[0]
+        busy = record_webhook_event(db, _event("evt_busy"))[0]
+        now = datetime.now(timezone.utc)
+        lease = timedelta(seconds=stripe_webhooks.PROCESSING_LEASE_SECONDS + 5)
+        stale.status, stale.locked_at = "processing", now - lease
+        busy.status, busy.locked_at = "processing", now
+        db.commit()
+        fresh_id = fresh.id
+    finally:
+        db.close()
+
+    worker = WebhookWorker(session_factory)
+    assert asyncio.run(worker.poll()) == 2
+    assert sorted(seen) == ["evt_fresh", "evt_stale"]
+    assert worker.stats["processed"] == 2
+    assert asyncio.run(worker.run_once(fresh_id)) is None
@@ -0,0 +1,40 @@
+"""Tests for worker warm-up and the readiness endpoint."""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import warmup
+
+
+def test_run_warmup_preloads_catalogs_and_templates() -> None:
+    warmup.reset_warmup()
+    assert warmup.is_warm() is False
+
+    state = warmup.run_warmup()
+    assert state["status"] == "warm"
+    assert state["errors"] == {}
+    assert state["steps"]["bei_catalog"] > 0
+    assert state["steps"]["products"]["windows"] > 0
+    assert "MODEL_inputSheet_for_Ver3.8_beta.xlsx" in state["steps"]["excel_templates"]
+
+
+def test_failed_step_is_recorded_without_blocking_readiness(monkeypatch) -> None:
+    def broken() -> None:
+        raise RuntimeError("catalog missing")
+
+    monkeypatch.setitem(warmup.WARMUP_STEPS, "bei_catalog", broken)
+    state = warmup.run_warmup()
+    assert state["status"] == "warm"
+    assert state["errors"] == {"bei_catalog": "catalog missing"}
+
+
+def test_readyz_reports_cold_until_lifespan_warmup() -> None:
+    warmup.reset_warmup()
+    cold = TestClient(app).get("/readyz")
+    assert cold.status_code == 503
+    assert cold.json()["status"] == "cold"
+
+    with TestClient(app) as client:
+        warm = client.get("/readyz")
+    assert warm.status_code == 200
+    assert warm.json()["status"] == "warm"
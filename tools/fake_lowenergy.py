@@ -0,0 +1,158 @@
+"""Local stand-in for api.lowenergy.jp used by load tests.
+
+Mimics the three upstream endpoints the service depends on:
+  - /model/1/v390/reportFromInputSheets  → 公式様式PDF (bytes)
+  - /model/1/v390/computeFromInputSheets → 公式計算結果JSON
+  - /envelope/1/eval                     → 住宅外皮 CalcResult XML
+
+Latency and failure rate are configurable so the service can be exercised
+under realistic upstream behaviour without touching the real API.
+
+Usage: python -m tools.fake_lowenergy --port 8900 --latency-ms 800 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+MODEL_API_PREFIX = "/model/1/v390"
+ENVELOPE_API_PATH = "/envelope/1/eval"
+
+FAKE_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    b"2 0 obj << /Type /Pages /Kids [] /Count 0 >> endobj\n"
+    b"trailer << /Root 1 0 R >>\n"
+    b"%%EOF\n"
+)
+
+FAKE_COMPUTE_RESULT = {
+    "Status": "OK",
+    "BEIm": "0.82",
+    "BEImAC": "0.91",
+    "BEImV": "0.75",
+    "BEImL": "0.68",
+    "BEImHW": "0.88",
+    "BEImEV": "1.00",
+    "Errors": [],
+}
+
+FAKE_CALC_RESULT_XML = """<?xml version="1.0" encoding="utf-8"?>
+<CalcResult BuildingName="load-test" Region="R6" Description="fake upstream"
+  UA="0.87" UAStandard="0.87"
+  EaterAC="3.5" EaterACStandard="2.8"
+  EaterAH="1.1" TotalArea="145.0">
+  <Components>
+    <ComponentResult Name="外壁北" ComponentType="ExternalWall" Area="60.0" U="1.0" />
+    <ComponentResult Name="窓-南" ComponentType="Window" Area="20.0" U="1.31" />
+  </Components>
+</CalcResult>
+"""
+
+
+@dataclass
+class FakeUpstreamConfig:
+    """Upstream behaviour knobs. Latency is ``latency_ms`` ± ``jitter_ms`` (uniform)."""
+
+    latency_ms: float = 500.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    seed: int | None = None
+
+
+def create_app(config: FakeUpstreamConfig | None = None) -> FastAPI:
+    """Build the fake upstream application."""
+    cfg = config or FakeUpstreamConfig()
+    rng = random.Random(cfg.seed)
+    app = FastAPI(title="fake lowenergy.jp")
+    app.state.config = cfg
+    app.state.request_counts = {"report": 0, "compute": 0, "envelope": 0, "errors": 0}
+
+    async def _simulate(kind: str, request: Request) -> Response | None:
+        await request.body()
+        app.state.request_counts[kind] += 1
+        delay_ms = cfg.latency_ms + rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if cfg.error_rate > 0 and rng.random() < cfg.error_rate:
+            app.state.request_counts["errors"] += 1
+            return JSONResponse(
+                status_code=cfg.error_status,
+                content={"Status": "NG", "Errors": [{"Message": "fake upstream failure"}]},
+            )
+        return None
+
+    @app.post(f"{MODEL_API_PREFIX}/reportFromInputSheets")
+    async def report_from_input_sheets(request: Request) -> Response:
+        failure = await _simulate("report", request)
+        if failure is not None:
+            return failure
+        return Response(content=FAKE_PDF, media_type="application/pdf")
+
+    @app.post(f"{MODEL_API_PREFIX}/computeFromInputSheets")
+    async def compute_from_input_sheets(request: Request) -> Response:
+        failure = await _simulate("compute", request)
+        if failure is not None:
+            return failure
+        return JSONResponse(content=FAKE_COMPUTE_RESULT)
+
+    @app.post(ENVELOPE_API_PATH)
+    async def envelope_eval(request: Request) -> Response:
+        failure = await _simulate("envelope", request)
+        if failure is not None:
+            return failure
+        return Response(content=FAKE_CALC_RESULT_XML, media_type="application/xml")
+
+    @app.get("/stats")
+    async def stats() -> dict:
+        return dict(app.state.request_counts)
+
+    return app
+
+
+def point_service_at(base_url: str) -> None:
+    """Redirect the in-process service's upstream URLs to *base_url*."""
+    from app.services import report, residential_official_api
+
+    base_url = base_url.rstrip("/")
+    report.API_BASE = f"{base_url}{MODEL_API_PREFIX}"
+    report.API_REPORT = f"{report.API_BASE}/reportFromInputSheets"
+    report.API_COMPUTE = f"{report.API_BASE}/computeFromInputSheets"
+    residential_official_api.ENVELOPE_API_URL = f"{base_url}{ENVELOPE_API_PATH}"
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a fake lowenergy.jp upstream.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+
+def main() -> None:
+    import uvicorn
+
+    args = _parse_args()
+    config = FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Load driver for the official-API backed routes.
+
+Starts the fake lowenergy.jp upstream (tools.fake_lowenergy) and the full
+FastAPI app in-process, points the app's upstream URLs at the fake, then
+fires concurrent requests at /official/compute, /official/report and
+/residential/verify. Reports throughput, latency percentiles and error rates.
+
+Usage: python -m tools.load_official --concurrency 20 --requests 200 --latency-ms 800 --error-rate 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import httpx
+from uvicorn import Config, Server
+
+from tools.fake_lowenergy import FakeUpstreamConfig, create_app, point_service_at
+
+API_PREFIX = "/api/v1"
+
+BEI_PAYLOAD = {
+    "building_area_m2": 1000.0,
+    "use": "office",
+    "zone": "6",
+    "design_energy": [],
+}
+
+RESIDENTIAL_PAYLOAD = {
+    "region": 6,
+    "a_env": 145.0,
+    "a_a": 54.0,
+    "parts": [
+        {"type": "wall", "orientation": "N", "area": 60.0, "u_value": 1.0, "h_value": 1.0},
+        {"type": "roof", "orientation": "TOP", "area": 20.0, "u_value": 0.5, "h_value": 1.0},
+        {"type": "window", "orientation": "S", "area": 20.0, "u_value": 1.31, "h_value": 1.0, "eta_d_C": 0.4},
+    ],
+    "front_result": {"ua_value": 0.87, "eta_a_c": 3.5},
+}
+
+ROUTES = {
+    "compute": ("POST", f"{API_PREFIX}/official/compute", BEI_PAYLOAD),
+    "report": ("POST", f"{API_PREFIX}/official/report", BEI_PAYLOAD),
+    "verify": ("POST", f"{API_PREFIX}/residential/verify", RESIDENTIAL_PAYLOAD),
+}
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=lambda: defaultdict(int))
+    transport_errors: int = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies_ms)
+
+    @property
+    def errors(self) -> int:
+        failed = sum(n for code, n in self.statuses.items() if code >= 400)
+        return failed + self.transport_errors
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(stats: Dict[str, RouteStats], elapsed_s: float) -> dict:
+    """Collapse raw samples into throughput / latency / error-rate figures."""
+    routes = {}
+    all_latencies: List[float] = []
+    total_errors = 0
+    for name, route in stats.items():
+        values = sorted(route.latencies_ms)
+        all_latencies.extend(values)
+        total_errors += route.errors
+        routes[name] = {
+            "requests": route.count,
+            "errors": route.errors,
+            "error_rate": round(route.errors / route.count, 4) if route.count else 0.0,
+            "statuses": dict(route.statuses),
+            "p50_ms": round(_percentile(values, 50), 1),
+            "p95_ms": round(_percentile(values, 95), 1),
+            "p99_ms": round(_percentile(values, 99), 1),
+            "max_ms": round(values[-1], 1) if values else 0.0,
+        }
+
+    all_latencies.sort()
+    total = len(all_latencies)
+    return {
+        "elapsed_s": round(elapsed_s, 3),
+        "requests": total,
+        "throughput_rps": round(total / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "error_rate": round(total_errors / total, 4) if total else 0.0,
+        "p50_ms": round(_percentile(all_latencies, 50), 1),
+        "p95_ms": round(_percentile(all_latencies, 95), 1),
+        "p99_ms": round(_percentile(all_latencies, 99), 1),
+        "routes": routes,
+    }
+
+
+async def run_load(
+    base_url: str,
+    *,
+    routes: List[str],
+    concurrency: int,
+    total_requests: int,
+    timeout_s: float,
+) -> dict:
+    """Fire *total_requests* round-robin across *routes* with bounded concurrency."""
+    stats: Dict[str, RouteStats] = {name: RouteStats() for name in routes}
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(routes[i % len(routes)])
+
+    async def worker(worker_id: int, client: httpx.AsyncClient) -> None:
+        # Each virtual user gets its own forwarded IP so RateLimitMiddleware
+        # sees many clients, as it would behind the production proxy.
+        headers = {"X-Forwarded-For": f"10.0.{worker_id // 250}.{worker_id % 250 + 1}"}
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            method, path, payload = ROUTES[name]
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=payload, headers=headers)
+                stats[name].statuses[response.status_code] += 1
+            except httpx.HTTPError:
+                stats[name].transport_errors += 1
+            stats[name].latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(stats, elapsed)
+
+
+def _start_server(app, port: int) -> tuple[Server, threading.Thread]:
+    server = Server(Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    for _ in range(100):
+        if server.started:
+            return server, thread
+        time.sleep(0.1)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _render_text(result: dict, args: argparse.Namespace) -> str:
+    lines = [
+        f"Upstream: latency={args.latency_ms}ms ±{args.jitter_ms}ms error_rate={args.error_rate}",
+        f"Load: concurrency={args.concurrency} requests={result['requests']} elapsed={result['elapsed_s']}s",
+        f"Throughput: {result['throughput_rps']} req/s  error_rate={result['error_rate']:.2%}",
+        f"Latency: p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms",
+        "Routes:",
+    ]
+    for name, route in result["routes"].items():
+        lines.append(
+            f"  - {name}: n={route['requests']} err={route['error_rate']:.2%} "
+            f"p50={route['p50_ms']}ms p95={route['p95_ms']}ms p99={route['p99_ms']}ms "
+            f"max={route['max_ms']}ms statuses={route['statuses']}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test official API routes against a fake upstream.")
+    parser.add_argument("--routes", default="compute,report,verify", help="Comma-separated subset of: compute,report,verify")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=200.0, help="Client timeout per request (seconds).")
+    parser.add_argument("--app-port", type=int, default=8765)
+    parser.add_argument("--upstream-port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = _parse_args()
+    routes = [name.strip() for name in args.routes.split(",") if name.strip()]
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        raise SystemExit(f"unknown routes: {', '.join(unknown)}")
+
+    upstream_config = FakeUpstreamConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    upstream, upstream_thread = _start_server(create_app(upstream_config), args.upstream_port)
+    point_service_at(f"http://127.0.0.1:{args.upstream_port}")
+
+    from app.main import app
+
+    service, service_thread = _start_server(app, args.app_port)
+    try:
+        result = asyncio.run(
+            run_load(
+                f"http://127.0.0.1:{args.app_port}",
+                routes=routes,
+                concurrency=args.concurrency,
+                total_requests=args.requests,
+                timeout_s=args.timeout,
+            )
+        )
+    finally:
+        service.should_exit = True
+        upstream.should_exit = True
+        service_thread.join(timeout=5)
+        upstream_thread.join(timeout=5)
+
+    if args.format == "json":
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(_render_text(result, args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())